@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to evaluate range filters and aggregates over an array of flat records, row by row and
+    using a columnar table (it needs NumPy; otherwise both measures are row by row)
+
+    e.g.
+        $ python benchmarks/columnar.py -n 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj import JSONDB
+
+QUERIES = [
+    "select $ from items[] where price > 900",
+    "select $ from items[] where price >= 100 and price < 200 and qty in (1, 2, 3)",
+    "select count(*), sum(qty), avg(price), max(price) from items[] where price > 500"
+]
+
+def make_document(rows: int) -> str:
+    random.seed(0)
+    return json.dumps({ "items": [ { "id": i, "price": random.uniform(0, 1000), "qty": random.randint(0, 10), "name": f"item{i % 100}" } for i in range(rows) ] })
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--rows", help="The amount of records", dest="rows", type=int, default=200000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    doc = make_document(args.rows)
+    rows = JSONDB(doc)
+    columnar = JSONDB(doc)
+    table = columnar.create_columnar("items[]")
+    t_build = timeit.timeit(lambda: columnar._find_columnar("items[]"), number=1)
+    print(f"{table} built in {t_build:.4f}s")
+
+    print(f"{'rows (s)':>10}{'columnar (s)':>14}{'speedup':>9}  query")
+    for query in QUERIES:
+        t_rows = min(timeit.repeat(lambda: len(list(rows.query(query))), number=1, repeat=args.repeat))
+        t_columnar = min(timeit.repeat(lambda: len(list(columnar.query(query))), number=1, repeat=args.repeat))
+        print(f"{t_rows:>10.4f}{t_columnar:>14.4f}{t_rows / t_columnar:>8.1f}x  {query}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Measures the time needed to evaluate a recursive descent (..field) over documents of growing size, to check that it
+    scales linearly with the amount of nodes
+
+    e.g.
+        $ python benchmarks/explorer.py -s 100000 250000 500000 1000000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.parser.parser import Parser
+
+def make_document(nodes: int, width: int = 100) -> dict:
+    """Creates a document with (approximately) the given amount of nodes, made of wide objects
+
+    Args:
+        nodes (int): the amount of nodes
+        width (int, optional): the amount of keys of each object. Defaults to 100.
+
+    Returns:
+        dict: the document
+    """
+    groups = max(1, nodes // (width + 1))
+    return { f"g{i}": { f"k{j}": { "id": j } if j % 10 == 0 else j for j in range(width) } for i in range(groups) }
+
+def count_nodes(obj) -> int:
+    count = 0
+    stack = [ obj ]
+    while stack:
+        obj = stack.pop()
+        count += 1
+        if isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-s", "--sizes", help="The sizes of the documents (in nodes)", dest="sizes", type=int, nargs="+", default=[ 100000, 250000, 500000, 1000000 ])
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    selector = Parser().parse_selection("..id")
+    compiled = selector.compile()
+    print(f"{'nodes':>10}{'select (s)':>12}{'iterate (s)':>13}{'compiled (s)':>14}{'ns/node':>10}")
+    for size in args.sizes:
+        doc = make_document(size)
+        nodes = count_nodes(doc)
+        t_select = min(timeit.repeat(lambda: len(selector.select(doc)), number=1, repeat=args.repeat))
+        t_iterate = min(timeit.repeat(lambda: sum(1 for _ in selector.iterate(doc)), number=1, repeat=args.repeat))
+        t_compiled = min(timeit.repeat(lambda: len(compiled(doc)), number=1, repeat=args.repeat))
+        print(f"{nodes:>10}{t_select:>12.4f}{t_iterate:>13.4f}{t_compiled:>14.4f}{t_select * 1e9 / nodes:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to decode and encode JSON documents using each of the JSON backends that are installed
+    (if no file is given, a document of the given amount of records is generated)
+
+    e.g.
+        $ python benchmarks/json_backends.py myjson.json other.json
+        $ python benchmarks/json_backends.py -n 500000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsonbackend import available_backends, get_backend
+
+def make_document(rows: int) -> str:
+    random.seed(0)
+    return json.dumps({ "items": [ { "id": i, "price": random.uniform(0, 1000), "tags": [ f"tag{i % 7}", f"tag{i % 11}" ], "user": { "name": f"user{i % 100}", "active": i % 2 == 0 } } for i in range(rows) ] })
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("files", help="The JSON documents", nargs="*")
+    parser.add_argument("-n", "--rows", help="The amount of records of the generated document", dest="rows", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if len(args.files) > 0:
+        documents = []
+        for path in args.files:
+            with open(path) as f:
+                documents.append((path, f.read()))
+    else:
+        documents = [ (f"generated ({args.rows} records)", make_document(args.rows)) ]
+
+    backends = [ get_backend(name) for name in available_backends() ]
+    print(f"{'backend':<10}{'parse (s)':>11}{'dump (s)':>10}  document")
+    for name, doc in documents:
+        for backend in backends:
+            value = backend.loads(doc)
+            t_parse = min(timeit.repeat(lambda: backend.loads(doc), number=1, repeat=args.repeat))
+            t_dump = min(timeit.repeat(lambda: backend.dumps(value), number=1, repeat=args.repeat))
+            print(f"{backend.name:<10}{t_parse:>11.4f}{t_dump:>10.4f}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to run queries with recursive descents into keys (e.g. ..name), visiting the nodes of the
+    document and using the index of the keys (see KeyIndex), along with the time needed to build the index and the
+    memory that it uses
+
+    e.g.
+        $ python benchmarks/keyindex.py -n 100000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+
+QUERIES = [
+    "select $ from ..sku",
+    "select $ from catalog..sku where $ == 'sku5'",
+    "select id, ..sku from orders[]",
+    "select id from orders[] where ..status == 'returned'"
+]
+
+def make_document(rows: int) -> str:
+    return json.dumps({
+        "orders": [ { "id": i, "customer": { "name": f"user{i % 1000}", "address": { "city": f"city{i % 50}" } },
+            "lines": [ { "product": { "sku": f"sku{i % 100 + j}", "price": j }, "quantity": j, "history": [ { "status": "ok" } ] } for j in range(3) ],
+            "status": "returned" if i % 100 == 0 else "sent" } for i in range(rows) ],
+        "catalog": { "sections": [ { "items": [ { "sku": f"sku{s * 10 + k}", "tags": [ "a", "b" ] } for k in range(10) ] } for s in range(100) ] }
+    })
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--rows", help="The amount of orders in the document", dest="rows", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = JSONDB(make_document(args.rows))
+    indexed = JSONDB(None)
+    indexed.document = db.document
+    index = indexed.create_key_index()
+    t_build = min(timeit.repeat(lambda: index.build(indexed.document), number=1, repeat=args.repeat))
+    print(f"build: {t_build:.3f} s, {index}")
+
+    print(f"{'walk (s)':>10}{'index (s)':>11}  query")
+    for query in QUERIES:
+        t_walk = min(timeit.repeat(lambda: list(db.query(query)), number=1, repeat=args.repeat))
+        t_index = min(timeit.repeat(lambda: list(indexed.query(query)), number=1, repeat=args.repeat))
+        print(f"{t_walk:>10.4f}{t_index:>11.4f}  {query}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to run queries whose WHERE and SELECT clauses share the prefixes of their selectors, with
+    and without sharing the lookups of the prefixes on each row (see RowMemo), along with the path steps saved per row
+
+    e.g.
+        $ python benchmarks/memo.py -n 100000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+from soj.memo import RowMemo
+
+QUERIES = [
+    "select user.id, user.name from items[] where user.id > 10",
+    "select user.id, user.name, user.address.city from items[] where user.id > 10 and user.address.country == 'es'",
+    "select order.lines[0].product.sku, order.lines[0].product.price from items[] where order.lines[0].product.price > 50 "
+        "and order.lines[0].product.stock > 0",
+    "select id, name from items[] where price > 10"
+]
+
+def make_document(rows: int) -> str:
+    return json.dumps({ "items": [ { "id": i, "name": f"item{i}", "price": i % 100,
+        "user": { "id": i % 1000, "name": f"user{i % 1000}", "address": { "city": f"city{i % 50}", "country": [ "es", "fr", "pt" ][i % 3] } },
+        "order": { "lines": [ { "product": { "sku": f"sku{i}", "price": i % 100, "stock": i % 7 } } ] } } for i in range(rows) ] })
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--rows", help="The amount of rows", dest="rows", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = JSONDB(make_document(args.rows))
+    print(f"{'no memo (us/row)':>17}{'memo (us/row)':>15}{'steps saved/row':>17}  query")
+    for query in QUERIES:
+        t_plain = min(timeit.repeat(lambda: list(db.query(query, memo=RowMemo(0))), number=1, repeat=args.repeat))
+        t_memo = min(timeit.repeat(lambda: list(db.query(query)), number=1, repeat=args.repeat))
+        memo = RowMemo()
+        list(db.query(query, memo=memo))
+        saved = memo.stats["steps_saved"] / args.rows
+        print(f"{t_plain / args.rows * 1e6:>17.3f}{t_memo / args.rows * 1e6:>15.3f}{saved:>17.2f}  {query[:60]}{'...' if len(query) > 60 else ''}")
+
+if __name__ == "__main__":
+    main()
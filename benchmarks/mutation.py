@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to apply small changes to a document with secondary indexes and to run an indexed query
+    after each of them, updating the indexes in place (see JSONDB.execute) and modifying the document by hand (i.e.
+    the indexes are rebuilt by the next query)
+
+    e.g.
+        $ python benchmarks/mutation.py -n 100000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+
+QUERY = "select id, price from items[] where id == 42"
+
+def make_document(rows: int) -> str:
+    return json.dumps({ "items": [ { "id": i, "name": f"item{i}", "price": i % 100, "tags": [ f"t{i % 7}" ] } for i in range(rows) ] })
+
+def make_database(document: str) -> JSONDB:
+    db = JSONDB(document)
+    db.create_index("items[]", "id")
+    db.create_index("items[]", "price", "sorted")
+    list(db.query(QUERY))
+    return db
+
+def by_hand(db: JSONDB, change: str, i: int) -> None:
+    """Applies the same change than the statement, directly on the document"""
+    items = db.document["items"]
+    if change == "update":
+        for item in items:
+            if item["id"] == i:
+                item["price"] = 7
+    elif change == "insert":
+        items.append({ "id": i, "name": "new", "price": 1, "tags": [] })
+    else:
+        items[:] = [ item for item in items if item["id"] != i ]
+    db.changed()
+
+def statement(change: str, i: int) -> str:
+    if change == "update":
+        return f"update items[] set price = 7 where id == {i}"
+    if change == "insert":
+        return f"insert into items values {{\"id\": {i}, \"name\": \"new\", \"price\": 1, \"tags\": []}}"
+    return f"delete from items[] where id == {i}"
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--rows", help="The amount of rows", dest="rows", type=int, default=100000)
+    parser.add_argument("-c", "--changes", help="The amount of changes applied in each measure", dest="changes", type=int, default=20)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    document = make_document(args.rows)
+    print(f"{'rebuild (ms)':>13}{'in place (ms)':>15}  change (and query)")
+    for change in [ "update", "insert", "delete" ]:
+        def apply(db, mutate):
+            for i in range(args.changes):
+                mutate(db, i * 97 % args.rows)
+                list(db.query(QUERY))
+        t_rebuild = min([ timeit.timeit(lambda: apply(db, lambda db, i: by_hand(db, change, i)), number=1)
+            for db in [ make_database(document) for _ in range(args.repeat) ] ])
+        t_place = min([ timeit.timeit(lambda: apply(db, lambda db, i: db.execute(statement(change, i))), number=1)
+            for db in [ make_database(document) for _ in range(args.repeat) ] ])
+        print(f"{t_rebuild / args.changes * 1e3:>13.3f}{t_place / args.changes * 1e3:>15.3f}  {change}")
+
+if __name__ == "__main__":
+    main()
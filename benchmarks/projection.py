@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time and the memory blocks per row needed to build the output rows of the SELECT clause, merging the
+    values obtained by each selector (see merge_objects; it fails for several selectors), walking each row once per
+    selector, and using a Projection (that walks each row once for all the selectors)
+
+    e.g.
+        $ python benchmarks/projection.py -n 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.parser.parser import Parser
+from soj.projection import Projection
+from soj.aggregate import _value
+from soj.result import Result, merge_objects, _flatten
+
+# A wide SELECT list with heavy prefix overlap (e.g. a report over nested records)
+WIDE = ", ".join([ f"report.s{i % 4}.g{i % 3}.f{i}" for i in range(40) ] + [ "report.items[].v", "report.items[0].w" ])
+
+SELECTS = [ "$", "a.b", "a.b.c[]", "id, a.b.c[0], name, tags", "id, a, name, tags, a.b.c[1], extra.x, extra.y, extra.z", WIDE ]
+
+def make_rows(n: int) -> list:
+    return [ { "id": i, "a": { "b": { "c": [ i, i + 1, i + 2 ] } }, "name": f"item{i}", "tags": [ "x", "y" ],
+        "extra": { "x": i, "y": str(i), "z": [ { "k": i } ] },
+        "report": { **{ f"s{s}": { f"g{g}": { f"f{f}": f for f in range(40) if f % 4 == s and f % 3 == g } for g in range(3) } for s in range(4) },
+            "items": [ { "v": i, "w": i } for i in range(3) ] } } for i in range(n) ]
+
+def merge_rows(rows: list, selectors: list):
+    """The output rows obtained by merging the values of each selector (i.e. the previous implementation of select)"""
+    compiled = [ s.compile() for s in selectors ]
+    for row in rows:
+        obj = None
+        for select in compiled:
+            obj = merge_objects(obj, Result().extend(select(row)))
+        if obj is not None:
+            yield from _flatten(obj)
+
+def separate_rows(rows: list, selectors: list):
+    """The output rows obtained by walking each row once for each selector"""
+    compiled = [ s.compile() for s in selectors ]
+    labels = [ s.label() for s in selectors ]
+    for row in rows:
+        values = [ select(row) for select in compiled ]
+        if len(compiled) == 1:
+            yield from values[0]
+        elif any(values):
+            yield { label: _value(v) for label, v in zip(labels, values) }
+
+def projected_rows(rows: list, selectors: list):
+    rows_of = Projection(selectors).rows
+    for row in rows:
+        yield from rows_of(row)
+
+def measure(function, rows: list, selectors: list, repeat: int) -> tuple:
+    """Obtains the time per row and the memory blocks per output row (i.e. the blocks allocated for the output rows
+        that are not shared with the input rows)"""
+    try:
+        t = min(timeit.repeat(lambda: list(function(rows, selectors)), number=1, repeat=repeat)) / len(rows)
+    except Exception:
+        return None, None
+    gc.collect()
+    gc.disable()
+    blocks = sys.getallocatedblocks()
+    output = list(function(rows, selectors))
+    blocks = sys.getallocatedblocks() - blocks
+    gc.enable()
+    return t, blocks / max(len(output), 1)
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--rows", help="The amount of rows", dest="rows", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{'merge (us/row)':>15}{'separate (us/row)':>19}{'projection (us/row)':>21}{'blocks/row':>11}  select")
+    for select in SELECTS:
+        selectors = Parser().parse_selectors(select)
+        results = []
+        for function in [ merge_rows, separate_rows, projected_rows ]:
+            t, blocks = measure(function, rows, selectors, args.repeat)
+            results.append("failed" if t is None else f"{t * 1e6:.3f}")
+        results.append(f"{blocks:.1f}")
+        print(f"{results[0]:>15}{results[1]:>19}{results[2]:>21}{results[3]:>11}  {select[:60]}{'...' if len(select) > 60 else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Compares the time needed to evaluate selectors using the reference path (Selector.select) and the compiled path
+    (Selector.compile)
+
+    e.g.
+        $ python benchmarks/selectors.py -n 100000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.parser.parser import Parser
+
+SELECTORS = [ "items[]", "items[].a.b", "items[].a.b.c[0]", "items[].a.b.c[]", "items[1:].a.b.c[0]" ]
+
+def make_document(n: int) -> dict:
+    return {
+        "items": [ { "a": { "b": { "c": [ i, i + 1, i + 2 ] } }, "id": i } for i in range(n) ]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--elements", help="The amount of elements in the document", dest="n", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    doc = make_document(args.n)
+    print(f"{'selector':<24}{'select (s)':>12}{'compiled (s)':>14}{'speedup':>10}")
+    for s in SELECTORS:
+        selector = Parser().parse_selection(s)
+        compiled = selector.compile()
+        t_select = min(timeit.repeat(lambda: list(selector.select(doc)), number=1, repeat=args.repeat))
+        t_compiled = min(timeit.repeat(lambda: compiled(doc), number=1, repeat=args.repeat))
+        print(f"{s:<24}{t_select:>12.4f}{t_compiled:>14.4f}{t_select / t_compiled:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""Measures the time needed to tokenize and to parse queries of different sizes (without the plan cache, i.e. the
+    cost of each ad-hoc query that is not in the cache)
+
+    e.g.
+        $ python benchmarks/tokenizer.py -n 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.parser.parser import Parser
+
+QUERIES = [
+    "select $ from items[] where price > 900",
+    "select name, user.email from items[1:] where user.age >= 18 and (country in ('es', 'fr', 'pt') or vip) order by name desc limit 10",
+    "select user.country, count(*), avg(price), count(distinct user.id) from orders[]..items[] where price > 10.5e+2 and not "
+        "(status == 'cancelled' or status like 'refund%') group by user.country order by count(*) desc limit 20 offset 40"
+]
+
+def main():
+    parser = argparse.ArgumentParser(allow_abbrev=False, description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--number", help="The amount of times that each query is processed in each measure", dest="number", type=int, default=10000)
+    parser.add_argument("-r", "--repeat", help="The amount of repetitions of each measure", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    p = Parser()
+    print(f"{'tokens':>7}{'tokenize (us)':>15}{'parse (us)':>12}  query")
+    for query in QUERIES:
+        tokens = len(p.tokenize(query))
+        t_tokenize = min(timeit.repeat(lambda: p.tokenize(query), number=args.number, repeat=args.repeat)) / args.number
+        t_parse = min(timeit.repeat(lambda: p.parse(query), number=args.number, repeat=args.repeat)) / args.number
+        print(f"{tokens:>7}{t_tokenize * 1e6:>15.1f}{t_parse * 1e6:>12.1f}  {query[:60]}{'...' if len(query) > 60 else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 from .result import Result
 from .jsondb import JSONDB
+from .stream import JSONStream, JSONStreamDB, NDJSONDB
 from .utils import debug_function
\ No newline at end of file
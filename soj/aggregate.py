@@ -0,0 +1,357 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import json
+import math
+from hashlib import blake2b
+from numbers import Number
+from .selector import Empty
+from .sort import _sort_value
+
+def _distinct_key(value):
+    """Obtains a hashable value that identifies a value of a document (e.g. to count the distinct values)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    # True and 1 are different values in a JSON document
+    return (isinstance(value, bool), value)
+
+def _is_number(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+class Accumulator:
+    """Accumulator is the base class for the one-pass accumulators of the aggregate functions: the values obtained from
+        each row are added as the rows are read, and only the state needed to obtain the aggregate is kept.
+
+       (*) the accumulators can be merged (e.g. to combine the partial aggregates obtained by the workers of a parallel
+           query), so their state must be picklable
+    """
+    def add(self, values: list) -> None:
+        """Adds the values obtained from a row
+
+        Args:
+            values (list): the values (the nulls are ignored by every function but count(*))
+        """
+        raise NotImplementedError()
+
+    def merge(self, other: "Accumulator") -> None:
+        """Adds the state of another accumulator of the same type"""
+        raise NotImplementedError()
+
+    def result(self):
+        """Obtains the value of the aggregate"""
+        raise NotImplementedError()
+
+class CountRows(Accumulator):
+    def __init__(self) -> None:
+        self._count = 0
+
+    def add(self, values: list) -> None:
+        self._count += 1
+
+    def merge(self, other: "CountRows") -> None:
+        self._count += other._count
+
+    def result(self):
+        return self._count
+
+class Count(CountRows):
+    def add(self, values: list) -> None:
+        for value in values:
+            if value is not None:
+                self._count += 1
+
+class Sum(Accumulator):
+    def __init__(self) -> None:
+        self._sum = None
+
+    def add(self, values: list) -> None:
+        for value in values:
+            if _is_number(value):
+                self._sum = value if self._sum is None else self._sum + value
+
+    def merge(self, other: "Sum") -> None:
+        if other._sum is not None:
+            self.add([ other._sum ])
+
+    def result(self):
+        return self._sum
+
+class Avg(Accumulator):
+    def __init__(self) -> None:
+        self._sum = 0
+        self._count = 0
+
+    def add(self, values: list) -> None:
+        for value in values:
+            if _is_number(value):
+                self._sum += value
+                self._count += 1
+
+    def merge(self, other: "Avg") -> None:
+        self._sum += other._sum
+        self._count += other._count
+
+    def result(self):
+        if self._count == 0:
+            return None
+        return self._sum / self._count
+
+class Min(Accumulator):
+    """Obtains the lowest value, in the same order than ORDER BY (i.e. values of different types can be compared)"""
+    def __init__(self) -> None:
+        self._key = None
+        self._value = None
+
+    def _better(self, key) -> bool:
+        return key < self._key
+
+    def add(self, values: list) -> None:
+        for value in values:
+            if value is None:
+                continue
+            key = _sort_value([ value ])
+            if self._key is None or self._better(key):
+                self._key = key
+                self._value = value
+
+    def merge(self, other: "Min") -> None:
+        if other._key is not None:
+            self.add([ other._value ])
+
+    def result(self):
+        return self._value
+
+class Max(Min):
+    def _better(self, key) -> bool:
+        return self._key < key
+
+class CountDistinct(Accumulator):
+    def __init__(self) -> None:
+        self._values = set()
+
+    def add(self, values: list) -> None:
+        for value in values:
+            if value is not None:
+                self._values.add(_distinct_key(value))
+
+    def merge(self, other: "CountDistinct") -> None:
+        self._values |= other._values
+
+    def result(self):
+        return len(self._values)
+
+class ApproxCountDistinct(Accumulator):
+    """Estimates the amount of distinct values using a HyperLogLog sketch, whose size does not depend on the amount of
+        values (2^PRECISION registers of one byte; the standard error is about 1.04 / sqrt(2^PRECISION), i.e. 1.6%)
+
+       (*) the values are hashed using their JSON representation, so the sketches obtained in different processes can
+           be merged
+    """
+    PRECISION = 12
+
+    def __init__(self) -> None:
+        self._registers = bytearray(1 << self.PRECISION)
+
+    def add(self, values: list) -> None:
+        p = self.PRECISION
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, float) and value.is_integer():
+                # 1 and 1.0 are the same value for COUNT(DISTINCT ...) (see _distinct_key), but not in JSON
+                value = int(value)
+            h = int.from_bytes(blake2b(json.dumps(value, sort_keys=True).encode(), digest_size=8).digest(), "big")
+            index = h >> (64 - p)
+            # The position of the leftmost 1 in the rest of the bits
+            rank = (64 - p) - (h & ((1 << (64 - p)) - 1)).bit_length() + 1
+            if rank > self._registers[index]:
+                self._registers[index] = rank
+
+    def merge(self, other: "ApproxCountDistinct") -> None:
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def result(self):
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum([ 2.0 ** -r for r in self._registers ])
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+class Aggregate:
+    """Aggregate is an aggregate function in the SELECT clause of a query (e.g. count(*), sum(price) or
+        count(distinct user.id)), that is evaluated over the values obtained by a selector from the rows of each group
+    """
+    FUNCTIONS = {
+        "count": Count,
+        "sum": Sum,
+        "avg": Avg,
+        "min": Min,
+        "max": Max,
+        "approx_count_distinct": ApproxCountDistinct
+    }
+
+    def __init__(self, function: str, selector: "Selector", distinct: bool = False) -> None:
+        """Creates the aggregate
+
+        Args:
+            function (str): the name of the function (one of FUNCTIONS)
+            selector (Selector): the selector that obtains the values from each row (Empty for *)
+            distinct (bool, optional): only the distinct values are taken into account (only for count). Defaults to
+                False.
+        """
+        function = function.lower()
+        if function not in self.FUNCTIONS:
+            raise ValueError(f"Invalid aggregate function: {function}")
+        if distinct and function != "count":
+            raise ValueError(f"DISTINCT is only supported for count: {function}")
+        self._function = function
+        self._selector = selector
+        self._distinct = distinct
+
+    def __str__(self) -> str:
+        return self.label()
+
+    def label(self) -> str:
+        """The name of the value of the aggregate in the output rows (e.g. count(*) or sum(price))"""
+        selector = "*" if self._is_all() else self._selector.label()
+        if self._distinct:
+            selector = f"distinct {selector}"
+        return f"{self._function}({selector})"
+
+    @property
+    def selector(self) -> "Selector":
+        return self._selector
+
+    def _is_all(self) -> bool:
+        return type(self._selector) is Empty and self._selector._next is None
+
+    def accumulator(self) -> "Accumulator":
+        """Creates a new accumulator for the aggregate"""
+        if self._function == "count":
+            if self._distinct:
+                return CountDistinct()
+            if self._is_all():
+                return CountRows()
+        return self.FUNCTIONS[self._function]()
+
+def _value(values: list):
+    """Obtains the value of a column of an output row from the values obtained by its selector"""
+    if len(values) == 0:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return values
+
+class Grouping:
+    """Grouping evaluates the aggregates of a query in one pass: the rows are added one at a time, and only the
+        accumulators for each group are kept (i.e. the rows are not stored). The columns of the SELECT clause that are
+        not aggregates obtain their value from the first row of each group.
+
+       (*) if there is no GROUP BY clause, there is a single group, that exists even if no row was added
+    """
+    def __init__(self, items: list, group_by: list = None) -> None:
+        """Creates the grouping
+
+        Args:
+            items (list): the items of the SELECT clause (Selector or Aggregate objects)
+            group_by (list, optional): the selectors of the GROUP BY clause. Defaults to None.
+        """
+        self._items = items
+        self._group_by = group_by or []
+        self._groups = {}
+        self._compiled = None
+
+    @property
+    def labels(self) -> list:
+        """The labels of the columns of the output rows"""
+        return [ item.label() for item in self._items ]
+
+    @property
+    def groups(self) -> dict:
+        """The state of the groups (i.e. the key of each group, along with the values of the columns that are not
+            aggregates and the accumulators of the aggregates); it can be merged in other grouping (see merge)"""
+        return self._groups
+
+    def _compile(self):
+        if self._compiled is None:
+            self._compiled = (
+                [ s.compile() for s in self._group_by ],
+                [ item.selector.compile() if isinstance(item, Aggregate) else item.compile() for item in self._items ]
+            )
+        return self._compiled
+
+    def _new_group(self, row, selects: list) -> list:
+        return [ item.accumulator() if isinstance(item, Aggregate) else _value(select(row)) for item, select in zip(self._items, selects) ]
+
+    def add(self, rows) -> "Grouping":
+        """Adds rows to the groups
+
+        Args:
+            rows (Iterable): the rows
+
+        Returns:
+            Grouping: this grouping (to enable chaining)
+        """
+        group_selects, selects = self._compile()
+        accumulated = [ (i, select) for i, (item, select) in enumerate(zip(self._items, selects)) if isinstance(item, Aggregate) ]
+        groups = self._groups
+        for row in rows:
+            key = tuple([ _distinct_key(_value(select(row))) for select in group_selects ])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = self._new_group(row, selects)
+            for i, select in accumulated:
+                group[i].add(select(row))
+        return self
+
+    def merge(self, groups: dict) -> "Grouping":
+        """Merges the state of the groups of other grouping (for the same query), whose rows come after the rows added
+            to this one
+
+        Args:
+            groups (dict): the groups (see Grouping.groups)
+
+        Returns:
+            Grouping: this grouping (to enable chaining)
+        """
+        for key, other in groups.items():
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = other
+                continue
+            for value, other_value in zip(group, other):
+                if isinstance(value, Accumulator):
+                    value.merge(other_value)
+        return self
+
+    def rows(self):
+        """Generates the output rows, one per group, in the order in which the groups were found
+
+        Yields:
+            dict: the next row, with the value of each column of the SELECT clause (see labels)
+        """
+        labels = self.labels
+        groups = self._groups
+        if len(groups) == 0 and len(self._group_by) == 0:
+            groups = { (): [ item.accumulator() if isinstance(item, Aggregate) else None for item in self._items ] }
+        for group in groups.values():
+            yield { label: value.result() if isinstance(value, Accumulator) else value for label, value in zip(labels, group) }
+
+def is_aggregate(items: list) -> bool:
+    """Returns True if any of the items of a SELECT clause is an aggregate"""
+    return any([ isinstance(item, Aggregate) for item in items ])
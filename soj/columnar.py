@@ -0,0 +1,370 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from numbers import Number
+from .result import Result
+from .selector import Empty, Constant
+from .filter import FilterCompare, FilterKeyExists, FilterAnd, FilterOr, FilterNot
+from .aggregate import Aggregate, CountRows, Count, Sum, Avg, Min, Max, CountDistinct, _value
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The integers beyond this limit are not stored in columns, because they could not be compared exactly with floats
+_MAX_EXACT_INT = 1 << 53
+
+# The operators that can be evaluated over a column
+_OPERATORS = {
+    "==": lambda data, value: data == value,
+    "!=": lambda data, value: data != value,
+    "<": lambda data, value: data < value,
+    "<=": lambda data, value: data <= value,
+    ">": lambda data, value: data > value,
+    ">=": lambda data, value: data >= value
+}
+
+def _kind(value) -> str:
+    """Obtains the kind of column in which a value can be stored ("bool", "number" or "str"; None if it cannot)"""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, Number):
+        if isinstance(value, int) and abs(value) >= _MAX_EXACT_INT:
+            return None
+        return "number"
+    if isinstance(value, str):
+        # The strings in numpy arrays drop the trailing NUL characters
+        return "str" if "\0" not in value else None
+    return None
+
+def _compatible(kind: str, value) -> bool:
+    """Returns True if a value can be compared with the values in a column of the given kind, as Python would do"""
+    value_kind = _kind(value)
+    if value_kind is None:
+        return False
+    return value_kind == kind or (value_kind != "str" and kind != "str")
+
+class Column:
+    """Column holds the values of a key for all the rows of a table, along with the masks of the rows in which the key
+        is present and the rows in which its value is not null
+
+       (*) the data is only available (i.e. the column can be used in vectorized operations) if all the values are
+           scalars of the same kind
+    """
+    __slots__ = ( "name", "kind", "data", "present", "valid", "floats" )
+
+    def __init__(self, name: str, count: int, positions: list, values: list) -> None:
+        """Creates the column
+
+        Args:
+            name (str): the key
+            count (int): the amount of rows in the table
+            positions (list): the positions of the rows in which the key is present
+            values (list): the values of the key in those rows
+        """
+        self.name = name
+        self.present = np.zeros(count, dtype=bool)
+        self.present[positions] = True
+        valid = [ (p, v) for p, v in zip(positions, values) if v is not None ]
+        self.valid = np.zeros(count, dtype=bool)
+        self.valid[[ p for p, _ in valid ]] = True
+
+        kinds = set([ _kind(v) for _, v in valid ])
+        self.kind = kinds.pop() if len(kinds) == 1 else None
+        self.data = None
+        # The mask of the values that are floats, in a column that mixes integers and floats (None otherwise)
+        self.floats = None
+        if self.kind == "number":
+            floats = [ p for p, v in valid if not isinstance(v, int) ]
+            self.data = np.zeros(count, dtype=np.int64 if len(floats) == 0 else np.float64)
+            if 0 < len(floats) < len(valid):
+                self.floats = np.zeros(count, dtype=bool)
+                self.floats[floats] = True
+        elif self.kind == "bool":
+            self.data = np.zeros(count, dtype=bool)
+        elif self.kind == "str":
+            self.data = np.full(count, "", dtype=f"<U{max([ len(v) for _, v in valid ] + [ 1 ])}")
+        if self.data is not None and len(valid) > 0:
+            self.data[[ p for p, _ in valid ]] = [ v for _, v in valid ]
+
+class ColumnarTable:
+    """ColumnarTable holds the rows obtained by a FROM selector (when they are flat records, i.e. dicts) as one NumPy
+        array per key. The comparisons of a key with a constant, the IN lists and the aggregates are evaluated over the
+        whole columns at once, instead of row by row.
+
+       (*) if NumPy is not available, or the rows are not dicts, the table only keeps the rows and every operation is
+           evaluated row by row; the same happens for the conditions on columns with values of different kinds (or
+           nested values), that are evaluated on the rows that match the rest of the conditions
+    """
+    def __init__(self, from_selector: "Selector") -> None:
+        """Creates the table (it is not built until it is needed)
+
+        Args:
+            from_selector (Selector): the selector that obtains the rows
+        """
+        self._from = from_selector
+        self._rows = []
+        self._columns = None
+        # The generation of the document for which the table was built (see JSONDB.changed)
+        self._generation = None
+
+    def __str__(self) -> str:
+        columns = "row-based" if self._columns is None else f"{len(self._columns)} columns"
+        return f"{type(self).__name__}({self._from}, {len(self._rows)} rows, {columns})"
+
+    @property
+    def from_selector(self) -> "Selector":
+        return self._from
+
+    @property
+    def rows(self) -> list:
+        return self._rows
+
+    @property
+    def is_columnar(self) -> bool:
+        """Returns True if the rows are stored in columns (i.e. the vectorized operations are available)"""
+        return self._columns is not None
+
+    def is_valid(self, generation: int) -> bool:
+        """Returns True if the table was built for the given generation of the document"""
+        return self._generation is not None and self._generation == generation
+
+    def build(self, jsondoc, generation: int = None) -> "ColumnarTable":
+        """Builds the table from a document
+
+        Args:
+            jsondoc (Any): the document
+            generation (int, optional): the generation of the document. Defaults to None.
+
+        Returns:
+            ColumnarTable: this table (to enable chaining)
+        """
+        self._rows = list(self._from.iterate(jsondoc))
+        self._columns = self._build_columns(self._rows)
+        self._generation = generation
+        return self
+
+    @staticmethod
+    def _build_columns(rows: list) -> dict:
+        if np is None:
+            return None
+        keys = {}
+        for pos, row in enumerate(rows):
+            if not isinstance(row, dict):
+                return None
+            for k, v in row.items():
+                column = keys.get(k)
+                if column is None:
+                    column = keys[k] = ([], [])
+                column[0].append(pos)
+                column[1].append(v)
+        return { k: Column(k, len(rows), positions, values) for k, (positions, values) in keys.items() }
+
+    @staticmethod
+    def _column_name(selector: "Selector") -> str:
+        """Obtains the key of the column that contains the values obtained by a selector (i.e. if the selector is a
+            single fixed key, such as .price)
+
+        Returns:
+            str: the key, or None if the selector does not obtain a column
+        """
+        while type(selector) is Empty and selector._next is not None:
+            selector = selector._next
+        key = selector._path_key()
+        if key is None or key[0] is not dict or selector._next is not None:
+            return None
+        return key[1]
+
+    def mask(self, filter: "Filter") -> tuple:
+        """Evaluates a filter over the columns
+
+        Args:
+            filter (Filter): the filter
+
+        Returns:
+            tuple: the mask of the rows that may pass the filter (None if the filter cannot be evaluated over the
+                columns), and True if the mask is exact (i.e. the filter does not need to be evaluated on the rows)
+        """
+        count = len(self._rows)
+        if isinstance(filter, FilterAnd):
+            mask, exact = None, True
+            for f in filter.conjuncts():
+                m, e = self.mask(f)
+                if m is None:
+                    exact = False
+                    continue
+                mask = m if mask is None else mask & m
+                exact = exact and e
+            return mask, exact and mask is not None
+        if isinstance(filter, FilterOr):
+            mask, exact = np.zeros(count, dtype=bool), True
+            for f in filter._filters:
+                m, e = self.mask(f)
+                if m is None:
+                    return None, False
+                mask |= m
+                exact = exact and e
+            return mask, exact
+        if isinstance(filter, FilterNot):
+            m, e = self.mask(filter._filter)
+            if m is None or not e:
+                return None, False
+            return ~m, True
+        if isinstance(filter, FilterKeyExists):
+            if type(filter._lhs) is Empty and filter._lhs._next is None:
+                return np.ones(count, dtype=bool), True
+            name = self._column_name(filter._lhs)
+            if name is None:
+                return None, False
+            if name not in self._columns:
+                return np.zeros(count, dtype=bool), True
+            return self._columns[name].present, True
+        if isinstance(filter, FilterCompare):
+            return self._mask_compare(filter)
+        return None, False
+
+    def _mask_compare(self, filter: "FilterCompare") -> tuple:
+        count = len(self._rows)
+        name = self._column_name(filter._lhs)
+        op = filter._operator
+        if name is None or not isinstance(filter._rhs, Constant) or (op != "in" and op not in _OPERATORS):
+            return None, False
+        value = filter._rhs._value
+
+        column = self._columns.get(name)
+        if column is None:
+            # No row has the key: the rows obtain no value, so no comparison is true (not even IN)
+            return np.zeros(count, dtype=bool), True
+        if column.data is None:
+            return None, False
+
+        if op == "in":
+            # A single constant is a list with that value (see FilterCompare), and the rows without the key are not in it
+            values = [ v for v in (value if isinstance(value, list) else [ value ]) if _compatible(column.kind, v) ]
+            mask = column.valid & np.isin(column.data, values) if len(values) > 0 else np.zeros(count, dtype=bool)
+            return mask & column.present, True
+
+        if not _compatible(column.kind, value):
+            if op == "==":
+                return np.zeros(count, dtype=bool), True
+            if op == "!=":
+                return column.present, True
+            # The value may still be ordered with the values of the column (e.g. a large integer), so the rows decide
+            return None, False
+        mask = column.valid & _OPERATORS[op](column.data, value)
+        if op == "!=":
+            # The null values are not equal to any constant
+            mask |= column.present & ~column.valid
+        # The null values cannot be ordered, so they do not match the ordering comparisons either
+        return mask, True
+
+    def _positions(self, filter) -> tuple:
+        """Obtains the positions of the rows that may pass a filter
+
+        Returns:
+            tuple: the positions (None for all the rows), and the filter that still has to be evaluated on the rows (None
+                if the positions are exact)
+        """
+        if isinstance(filter, str):
+            from .parser.cache import get_plan_cache
+            filter = get_plan_cache().parse_comparison(filter)
+        if self._columns is None:
+            return None, filter
+        mask, exact = self.mask(filter)
+        if mask is None:
+            return None, filter
+        return np.flatnonzero(mask).tolist(), None if exact else filter
+
+    def filter(self, filter) -> "Result":
+        """Obtains the rows that pass a filter, evaluating it over the columns if possible
+
+        Args:
+            filter (str | Filter): the filter
+
+        Returns:
+            Result: the (lazy) result with the rows
+        """
+        positions, filter = self._positions(filter)
+        rows = Result.lazy(self._rows if positions is None else map(self._rows.__getitem__, positions))
+        if filter is not None:
+            rows = rows.filter(filter)
+        return rows
+
+    def aggregate(self, items: list, filter) -> "Result":
+        """Evaluates the aggregates of a SELECT clause (without GROUP BY) over the rows that pass a filter, using the
+            columns
+
+        Args:
+            items (list): the items of the SELECT clause
+            filter (str | Filter): the filter
+
+        Returns:
+            Result: the result with the output row, or None if any of the aggregates cannot be evaluated over the columns
+        """
+        positions, residual = self._positions(filter)
+        if self._columns is None or positions is None or residual is not None:
+            return None
+        mask = np.zeros(len(self._rows), dtype=bool)
+        mask[positions] = True
+
+        row = {}
+        for item in items:
+            if not isinstance(item, Aggregate):
+                row[item.label()] = None if len(positions) == 0 else _value(item.compile()(self._rows[positions[0]]))
+                continue
+            accumulator = item.accumulator()
+            if type(accumulator) is CountRows:
+                row[item.label()] = len(positions)
+                continue
+            name = self._column_name(item.selector)
+            if name is None:
+                return None
+            column = self._columns.get(name)
+            if column is None:
+                row[item.label()] = accumulator.result()
+                continue
+            selected = mask & column.valid
+            if type(accumulator) is Count:
+                row[item.label()] = int(selected.sum())
+                continue
+            if column.data is None:
+                return None
+            values = column.data[selected]
+            if type(accumulator) is CountDistinct:
+                row[item.label()] = int(np.unique(values).size)
+            elif type(accumulator) in (Sum, Avg):
+                if column.kind != "number" or len(values) == 0:
+                    row[item.label()] = accumulator.result()
+                    continue
+                if values.dtype == np.int64 and int(np.abs(values).max()) * len(values) >= (1 << 63):
+                    # The sum could overflow the integers of the column
+                    total = sum(values.tolist())
+                else:
+                    total = values.sum().item()
+                    if column.floats is not None and type(accumulator) is Sum and not (selected & column.floats).any():
+                        # The sum of integers is an integer
+                        total = int(total)
+                row[item.label()] = total if type(accumulator) is Sum else total / len(values)
+            elif type(accumulator) in (Min, Max):
+                if len(values) == 0:
+                    row[item.label()] = None
+                    continue
+                # The value is taken from the row, to keep its original type (e.g. 1 instead of 1.0)
+                pos = np.flatnonzero(selected)[values.argmin() if type(accumulator) is Min else values.argmax()]
+                row[item.label()] = self._rows[pos][name]
+            else:
+                return None
+        return Result.lazy([ row ])
@@ -13,30 +13,202 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 #
+import operator
 import re
+from functools import lru_cache
 from . import Result 
-from .selector import Selector
+from .selector import Selector, Constant
 
 class Filter:
     def _evaluate(self, obj) -> bool:
         return True
 
-    def filter(self, obj: "Result"):
+    def cost(self) -> float:
+        """Estimates the relative cost of evaluating the filter for an object"""
+        return 0
+
+    def selectivity(self) -> float:
+        """Estimates the fraction of the objects that pass the filter"""
+        return 1.0
+
+    def conjuncts(self) -> list:
+        """Obtains the filters that must be passed in order to pass this filter
+
+        Returns:
+            list: the filters (e.g. the conditions of an AND)
+        """
+        return [ self ]
+
+    def selectors(self) -> list:
+        """Obtains the selectors that the filter evaluates on each object (e.g. to prepare a RowMemo)"""
+        return []
+
+    def compile(self, memo: "RowMemo" = None):
+        """Obtains a function that evaluates the filter for an object (the subclasses build a function specialized for
+            their operands, once)
+
+        Args:
+            memo (RowMemo, optional): the memo in which the selectors share the lookups of their prefixes with the
+                other selectors evaluated on the same object (the function is built for the memo, and it is not kept).
+                Defaults to None.
+
+        Returns:
+            function: a function that receives an object and returns True if it passes the filter
+        """
+        return self._evaluate
+
+    def filter(self, obj: "Result", memo: "RowMemo" = None):
+        evaluate = self.compile(memo)
         for o in obj:
-            if self._evaluate(o):
+            if evaluate(o):
                 yield o
 
+@lru_cache(maxsize=1024)
+def like_matcher(pattern: str, ignore_case: bool = False):
+    """Compiles a SQL LIKE pattern (% matches any sequence of characters, and _ matches any single character) into a
+        function that checks whether a string matches the pattern. The simple patterns (e.g. abc%, %abc, %abc% or
+        patterns without wildcards) do not use regular expressions.
+
+    Args:
+        pattern (str): the pattern
+        ignore_case (bool, optional): whether the match is case insensitive (i.e. ILIKE). Defaults to False.
+
+    Returns:
+        function: a function that receives a string and returns True if it matches the pattern
+    """
+    if "_" not in pattern:
+        body = pattern.strip("%")
+        if "%" not in body:
+            prefix = pattern.startswith("%")
+            suffix = pattern.endswith("%") and len(body) < len(pattern)
+            if ignore_case:
+                body = body.lower()
+                if prefix and suffix:
+                    return lambda s: body in s.lower()
+                if prefix:
+                    return lambda s: s.lower().endswith(body)
+                if suffix:
+                    return lambda s: s.lower().startswith(body)
+                return lambda s: s.lower() == body
+            if prefix and suffix:
+                return lambda s: body in s
+            if prefix:
+                return lambda s: s.endswith(body)
+            if suffix:
+                return lambda s: s.startswith(body)
+            return lambda s: s == body
+
+    regex = "".join([ ".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern ])
+    return re.compile(regex, re.DOTALL | (re.IGNORECASE if ignore_case else 0)).fullmatch
+
+@lru_cache(maxsize=1024)
+def regexp_matcher(pattern: str):
+    """Compiles a regular expression into a function that checks whether it is found in a string (i.e. REGEXP)
+
+    Args:
+        pattern (str): the regular expression
+
+    Returns:
+        function: a function that receives a string and returns True if the regular expression is found in it
+    """
+    return re.compile(pattern).search
+
+# The operators that match a string against a pattern, along with the function that compiles the pattern
+PATTERN_OPERATORS = {
+    "like": lambda pattern: like_matcher(pattern),
+    "ilike": lambda pattern: like_matcher(pattern, True),
+    "regexp": regexp_matcher
+}
+
+def _contains(v0, v1) -> bool:
+    if not isinstance(v1, list):
+        return False
+    if isinstance(v0, list):
+        for v in v0:
+            if v not in v1:
+                return False
+        return True
+    else:
+        return v0 in v1
+
+def _pattern_comparator(op: str):
+    compile_pattern = PATTERN_OPERATORS[op]
+    def compare(v0, v1) -> bool:
+        if not isinstance(v0, str):
+            return False
+        if not isinstance(v1, str):
+            return False
+        return bool(compile_pattern(v1)(v0))
+    return compare
+
+def _ordering_comparator(compare):
+    def ordered(v0, v1) -> bool:
+        # The values that cannot be ordered (e.g. null, or a string and a number) do not match, as in the indexes
+        try:
+            return compare(v0, v1)
+        except TypeError:
+            return False
+    return ordered
+
+# The functions that compare two values for each operator
+COMPARATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": _ordering_comparator(operator.lt),
+    "<=": _ordering_comparator(operator.le),
+    ">": _ordering_comparator(operator.gt),
+    ">=": _ordering_comparator(operator.ge),
+    "in": _contains,
+    "like": _pattern_comparator("like"),
+    "ilike": _pattern_comparator("ilike"),
+    "regexp": _pattern_comparator("regexp")
+}
+
+# The estimated fraction of the comparisons that are true, for each operator
+SELECTIVITY = {
+    "==": 0.1,
+    "!=": 0.9,
+    "<": 0.33,
+    "<=": 0.33,
+    ">": 0.33,
+    ">=": 0.33,
+    "in": 0.2,
+    "like": 0.25,
+    "ilike": 0.25,
+    "regexp": 0.25
+}
+
+# The estimated additional cost of the comparison, for each operator (the rest are considered negligible)
+OPERATOR_COST = {
+    "like": 2,
+    "ilike": 2,
+    "regexp": 5
+}
+
 class FilterCompare(Filter):
     def __init__(self, lhs: "Selector", operator: str, rhs: "Selector") -> None:
-        if operator not in [ "==", "!=", "<", "<=", ">", ">=", "in", "like" ]:
+        if operator not in COMPARATORS:
             raise ValueError(f"Invalid operator: {operator}")
         self._lhs = lhs
         self._operator = operator
         self._rhs = rhs
+        self._compiled = None
 
     def __str__(self):
         return f"{self._lhs} {self._operator} {self._rhs}"
 
+    def cost(self) -> float:
+        cost = self._lhs.cost() + OPERATOR_COST.get(self._operator, 0)
+        if self._rhs is not None:
+            cost += self._rhs.cost()
+        return cost
+
+    def selectivity(self) -> float:
+        return SELECTIVITY[self._operator]
+
+    def selectors(self) -> list:
+        return [ s for s in [ self._lhs, self._rhs ] if s is not None and not isinstance(s, Constant) ]
+
     @staticmethod
     def sql_like_fragment_to_regex_string(fragment):
         # taken from https://codereview.stackexchange.com/a/248421
@@ -52,7 +224,7 @@ class FilterCompare(Filter):
         ]) + '$'
 
     def _evaluate(self, obj) -> bool:
-        """Evaluates the comparison using the given object, the idea is to 
+        """Evaluates the comparison using the given object
 
         Args:
             obj (list | dict): The object to be evaluated
@@ -60,9 +232,25 @@ class FilterCompare(Filter):
         Returns:
             bool: The result of the comparison
         """
+        return self.compile()(obj)
+
+    def compile(self, memo: "RowMemo" = None):
+        """Builds (once) the function that evaluates the comparison: the comparator of the operator is bound, each side
+            is selected exactly once per object, and the constant operands (and patterns) are prepared in advance
 
-        # Get the value of the left hand side, using the selector
+        Args:
+            memo (RowMemo, optional): the memo used to select each side (see Filter.compile). Defaults to None.
 
+        Returns:
+            function: a function that receives an object and returns the result of the comparison
+        """
+        if memo is not None:
+            return self._compile(memo)
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    def _compile(self, memo: "RowMemo" = None):
         # En si, el selector puede tener multiples elementos individuales que pueden producir valores singulares, asi
         #   que esto hay que tenerlo en cuenta: hay que hacer un "select" sobre el _lhs y luego sobre el _rhs; si uno
         #   produce un resultado individual, se compara con los resultados individuales del otro selector... pero en
@@ -71,26 +259,64 @@ class FilterCompare(Filter):
         #   por ejemplo: security_groups[].name producira varias entradas "security_group[i].name" que se pueden comparar
         #       con un selector de tipo "==" con una constante, pero no con otra lista
         #   Si produjésemos un selector de tipo "IN", podriamos comparar con una lista de valores, pero no con una
-        selector_lhs = self._lhs.select(obj)
-        selector_rhs = self._rhs.select(obj)
+        select_lhs = self._lhs.compile() if memo is None else memo.compile(self._lhs)
+        compare = COMPARATORS[self._operator]
+
+        if isinstance(self._rhs, Constant):
+            value_rhs = self._rhs._value
 
+            if self._operator in PATTERN_OPERATORS and isinstance(value_rhs, str):
+                # The pattern is compiled once for all the objects
+                matcher = PATTERN_OPERATORS[self._operator](value_rhs)
+                def evaluate(obj) -> bool:
+                    for value_lhs in select_lhs(obj):
+                        if isinstance(value_lhs, str) and matcher(value_lhs):
+                            return True
+                    return False
+                return evaluate
+
+            if self._operator == "in":
+                # A constant list is the set of values in which the lhs has to be found
+                values_rhs = value_rhs if isinstance(value_rhs, list) else [ value_rhs ]
+                def evaluate(obj) -> bool:
+                    # The objects without values (e.g. without the key) are not in the list
+                    values_lhs = select_lhs(obj)
+                    return len(values_lhs) > 0 and _contains(values_lhs, values_rhs)
+                return evaluate
+
+            # Any of the values of the lhs has to match the constant
+            def evaluate(obj) -> bool:
+                for value_lhs in select_lhs(obj):
+                    if compare(value_lhs, value_rhs):
+                        return True
+                return False
+            return evaluate
+
+        select_rhs = self._rhs.compile() if memo is None else memo.compile(self._rhs)
         if self._operator == "in":
-            return __class__.compare(list(selector_lhs), list(selector_rhs), self._operator)
+            def evaluate(obj) -> bool:
+                values_lhs = select_lhs(obj)
+                return len(values_lhs) > 0 and _contains(values_lhs, select_rhs(obj))
+            return evaluate
 
-        if len(selector_lhs) >= 0 and len(selector_rhs) == 1:
-            value_rhs = list(self._rhs.select(obj))[0]
-            for value_lhs in selector_lhs:
-                if __class__.compare(value_lhs, value_rhs, self._operator):
-                    return True
-            return False
-        elif len(selector_lhs) == 1 and len(selector_rhs) >= 0:
-            value_lhs = list(self._lhs.select(obj))[0]
-            for value_rhs in selector_rhs:
-                if __class__.compare(value_lhs, value_rhs, self._operator):
-                    return True
-            return False
-        else:
-            return __class__.compare(list(selector_lhs), list(selector_rhs), self._operator)
+        def evaluate(obj) -> bool:
+            values_lhs = select_lhs(obj)
+            values_rhs = select_rhs(obj)
+            if len(values_rhs) == 1:
+                value_rhs = values_rhs[0]
+                for value_lhs in values_lhs:
+                    if compare(value_lhs, value_rhs):
+                        return True
+                return False
+            elif len(values_lhs) == 1:
+                value_lhs = values_lhs[0]
+                for value_rhs in values_rhs:
+                    if compare(value_lhs, value_rhs):
+                        return True
+                return False
+            else:
+                return compare(values_lhs, values_rhs)
+        return evaluate
 
     @staticmethod
     def compare(v0, v1, op: str):
@@ -99,7 +325,7 @@ class FilterCompare(Filter):
         Args:
             v0 (Any): the first value
             v1 (Any): the second value
-            op (str): the operator to use to compare the values (==, !=, <, >, <=, >=)
+            op (str): the operator to use to compare the values (==, !=, <, >, <=, >=, in, like, ilike, regexp)
 
         Returns:
             bool: True if the values match using the operator, False otherwise
@@ -108,56 +334,168 @@ class FilterCompare(Filter):
         # Not checking for complex types, as we are confindent that the comparisons will be implemented in the correct way
         #   e.g. if a = [1, 2, 3] and b = [1, 2, 3], a==b will return True (python3.9)
         #   e.g. if a = {"b":1,"c":2} and b = {"b":1,"c":2}, a==b will return True (python3.9)
-        if op == "like":
-            if not isinstance(v0, str):
-                return False
-            if not isinstance(v1, str):
-                return False
-            v1 = __class__.sql_like_fragment_to_regex_string(v1)
-            return re.match(v1, str(v0)) is not None
-        elif op == "in":
-            if not isinstance(v1, list):
-                return False
-            if isinstance(v0, list):
-                for v in v0:
-                    if v not in v1:
-                        return False
-                return True
-            else:
-                return v0 in v1
-        elif op == "==":
-            if v0 is None:
-                return v1 is None
-            if v1 is None:
-                return v0 is None
-            return v0 == v1
-        elif op == ">":
-            return v0 > v1
-        elif op == "<":
-            return v0 < v1
-        elif op == ">=":
-            return v0 >= v1
-        elif op == "<=":
-            return v0 <= v1
-        elif op == "!=":
-            return v0 != v1
-        else:
-            raise ValueError(f"Invalid operator: {op}")     
+        if op not in COMPARATORS:
+            raise ValueError(f"Invalid operator: {op}")
+        return COMPARATORS[op](v0, v1)
 
 class FilterKeyExists(FilterCompare):
     def __init__(self, lhs) -> None:
         super().__init__(lhs, "==", None)
-        
+
+    def __str__(self):
+        return f"{self._lhs}"
+
+    def selectivity(self) -> float:
+        return 0.5
+
+    def _compile(self, memo: "RowMemo" = None):
+        # The comparison is true if the selector of the left hand side obtains any value
+        select_lhs = self._lhs.compile() if memo is None else memo.compile(self._lhs)
+        def evaluate(obj) -> bool:
+            return len(select_lhs(obj)) > 0
+        return evaluate
+
+
+class FilterAnd(Filter):
+    def __init__(self, *filters: "Filter") -> None:
+        """Creates a filter that is passed if all the filters are passed
+
+        Args:
+            *filters (Filter): the filters (the nested FilterAnd are flattened)
+        """
+        self._filters = []
+        for filter in filters:
+            self._filters.extend(filter.conjuncts())
+        self._compiled = None
+
+    def __str__(self):
+        return "(" + " and ".join([ str(f) for f in self._filters ]) + ")"
+
+    def cost(self) -> float:
+        return sum([ f.cost() for f in self._filters ])
+
+    def selectivity(self) -> float:
+        selectivity = 1.0
+        for f in self._filters:
+            selectivity *= f.selectivity()
+        return selectivity
+
+    def conjuncts(self) -> list:
+        return list(self._filters)
+
+    def selectors(self) -> list:
+        return [ s for f in self._filters for s in f.selectors() ]
+
     def _evaluate(self, obj) -> bool:
-        """Evaluates the comparison using the given object, the idea is to 
+        return self.compile()(obj)
+
+    def compile(self, memo: "RowMemo" = None):
+        """Builds (once) the function that evaluates the filters in order of cost and selectivity (i.e. the cheap filters
+            that discard most objects first), stopping at the first filter that is not passed
 
         Args:
-            obj (list | dict): The object to be evaluated
+            memo (RowMemo, optional): the memo used to evaluate the filters (see Filter.compile). Defaults to None.
 
         Returns:
-            bool: The result of the comparison
+            function: a function that receives an object and returns True if it passes all the filters
+        """
+        if memo is not None or self._compiled is None:
+            # Rank of each filter: the cost per discarded object
+            filters = sorted(self._filters, key=lambda f: f.cost() / (1 - f.selectivity()) if f.selectivity() < 1 else float("inf"))
+            evaluators = [ f.compile(memo) for f in filters ]
+            def evaluate(obj) -> bool:
+                for evaluator in evaluators:
+                    if not evaluator(obj):
+                        return False
+                return True
+            if memo is not None:
+                return evaluate
+            self._compiled = evaluate
+        return self._compiled
+
+class FilterOr(Filter):
+    def __init__(self, *filters: "Filter") -> None:
+        """Creates a filter that is passed if any of the filters is passed
+
+        Args:
+            *filters (Filter): the filters (the nested FilterOr are flattened)
         """
+        self._filters = []
+        for filter in filters:
+            if isinstance(filter, FilterOr):
+                self._filters.extend(filter._filters)
+            else:
+                self._filters.append(filter)
+        self._compiled = None
+
+    def __str__(self):
+        return "(" + " or ".join([ str(f) for f in self._filters ]) + ")"
+
+    def cost(self) -> float:
+        return sum([ f.cost() for f in self._filters ])
+
+    def selectivity(self) -> float:
+        rejected = 1.0
+        for f in self._filters:
+            rejected *= 1 - f.selectivity()
+        return 1 - rejected
+
+    def selectors(self) -> list:
+        return [ s for f in self._filters for s in f.selectors() ]
+
+    def _evaluate(self, obj) -> bool:
+        return self.compile()(obj)
+
+    def compile(self, memo: "RowMemo" = None):
+        """Builds (once) the function that evaluates the filters in order of cost and selectivity (i.e. the cheap filters
+            that accept most objects first), stopping at the first filter that is passed
+
+        Args:
+            memo (RowMemo, optional): the memo used to evaluate the filters (see Filter.compile). Defaults to None.
+
+        Returns:
+            function: a function that receives an object and returns True if it passes any of the filters
+        """
+        if memo is not None or self._compiled is None:
+            # Rank of each filter: the cost per accepted object
+            filters = sorted(self._filters, key=lambda f: f.cost() / f.selectivity() if f.selectivity() > 0 else float("inf"))
+            evaluators = [ f.compile(memo) for f in filters ]
+            def evaluate(obj) -> bool:
+                for evaluator in evaluators:
+                    if evaluator(obj):
+                        return True
+                return False
+            if memo is not None:
+                return evaluate
+            self._compiled = evaluate
+        return self._compiled
+
+class FilterNot(Filter):
+    def __init__(self, filter: "Filter") -> None:
+        """Creates a filter that is passed if the filter is not passed
+
+        Args:
+            filter (Filter): the filter
+        """
+        self._filter = filter
+
+    def __str__(self):
+        return f"not {self._filter}"
+
+    def cost(self) -> float:
+        return self._filter.cost()
+
+    def selectivity(self) -> float:
+        return 1 - self._filter.selectivity()
+
+    def selectors(self) -> list:
+        return self._filter.selectors()
+
+    def _evaluate(self, obj) -> bool:
+        return not self._filter.compile()(obj)
 
-        # Get the value of the left hand side, using the selector
-        value_lhs = self._lhs.select(obj)
-        return len(value_lhs) > 0
\ No newline at end of file
+    def compile(self, memo: "RowMemo" = None):
+        evaluator = self._filter.compile(memo)
+        def evaluate(obj) -> bool:
+            return not evaluator(obj)
+        return evaluate
@@ -0,0 +1,369 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from bisect import bisect_left, bisect_right, insort
+from numbers import Number
+from .selector import Selector, Constant
+from .filter import FilterCompare
+
+class Index:
+    """Index is the base class for the secondary indexes: an index is built over the rows obtained by a FROM selector,
+        and maps the values obtained by a key selector (applied to each row) to the positions of the rows. It is used
+        to obtain the candidate rows for a comparison of the key with a constant, instead of scanning every row.
+
+       (*) the candidates are a superset of the rows that match the comparison, so the comparison still has to be
+           evaluated on them (but only on them)
+       (*) the rows modified through the mutations of the database are updated in the index (see JSONDB.update); the
+           deleted rows are kept as holes in the list of rows, so that the positions of the rest do not change
+    """
+    OPERATORS = []
+
+    def __init__(self, from_selector: "Selector", key_selector: "Selector") -> None:
+        """Creates the index (it is not built until it is needed)
+
+        Args:
+            from_selector (Selector): the selector that obtains the rows
+            key_selector (Selector): the selector that obtains the key of each row
+        """
+        self._from = from_selector
+        self._key = key_selector
+        self._rows = []
+        # The positions of the rows, by id (built the first time that a row is searched, see position)
+        self._by_id = None
+        self._deleted = 0
+        # The generation of the document for which the index was built (see JSONDB.changed)
+        self._generation = None
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({self._from}, {self._key})"
+
+    @property
+    def from_selector(self) -> "Selector":
+        return self._from
+
+    @property
+    def key_selector(self) -> "Selector":
+        return self._key
+
+    @property
+    def rows(self) -> list:
+        """The rows obtained by the FROM selector, in order (the positions are the indexes in this list)"""
+        return self._rows
+
+    def build(self, jsondoc, generation: int = None) -> "Index":
+        """Builds the index from a document
+
+        Args:
+            jsondoc (Any): the document
+            generation (int, optional): the generation of the document. Defaults to None.
+
+        Returns:
+            Index: this index (to enable chaining)
+        """
+        self._rows = list(self._from.iterate(jsondoc))
+        self._by_id = None
+        self._deleted = 0
+        self._clear()
+        key = self._key.compile()
+        for pos, row in enumerate(self._rows):
+            self._add(pos, key(row))
+        self._complete()
+        # The index is valid once it is complete, as the threads check it before waiting for the build (see JSONDB)
+        self._generation = generation
+        return self
+
+    def is_valid(self, generation: int) -> bool:
+        """Returns True if the index was built for the given generation of the document"""
+        return self._generation is not None and self._generation == generation
+
+    def keep(self, generation: int) -> bool:
+        """Marks the index as valid for a new generation of the document, once the changes have been applied to it (see
+            remove_row, add_row, delete_row and append_row)
+
+        Returns:
+            bool: True if the index is kept; False if it has to be rebuilt because most of its rows are deleted
+        """
+        if self._deleted * 2 > len(self._rows):
+            return False
+        self._generation = generation
+        return True
+
+    def position(self, row) -> int:
+        """Obtains the position of a row (i.e. the same object) in the index
+
+        Returns:
+            int: the position, or None if the row is not in the index (or if several rows are the same object, e.g. the
+                same small integer, as their positions cannot be told apart)
+        """
+        if self._by_id is None:
+            self._by_id = { id(r): pos for pos, r in enumerate(self._rows) if r is not _DELETED }
+        if len(self._by_id) != len(self._rows) - self._deleted:
+            return None
+        return self._by_id.get(id(row))
+
+    def remove_row(self, pos: int) -> None:
+        """Removes the key values of a row from the index (i.e. before modifying the row)"""
+        self._remove(pos, self._key.compile()(self._rows[pos]))
+
+    def add_row(self, pos: int) -> None:
+        """Adds the key values of a row to the index (i.e. after modifying the row)"""
+        self._insert(pos, self._key.compile()(self._rows[pos]))
+
+    def delete_row(self, pos: int) -> None:
+        """Removes a row from the index (i.e. before deleting it from the document)"""
+        self.remove_row(pos)
+        if self._by_id is not None:
+            self._by_id.pop(id(self._rows[pos]), None)
+        self._rows[pos] = _DELETED
+        self._deleted += 1
+
+    def append_row(self, row) -> None:
+        """Adds a row after the last one (i.e. after appending it to the list from which the rows are obtained)"""
+        pos = len(self._rows)
+        self._rows.append(row)
+        if self._by_id is not None:
+            self._by_id[id(row)] = pos
+        self.add_row(pos)
+
+    def supports(self, filter: "Filter") -> bool:
+        """Returns True if the index can obtain the candidates for a filter: a comparison between the key of the index
+            and a constant, using one of the operators supported by the index
+
+        Args:
+            filter (Filter): the filter
+
+        Returns:
+            bool: True if the index can be used for the filter
+        """
+        if not isinstance(filter, FilterCompare) or filter._operator not in self.OPERATORS:
+            return False
+        return isinstance(filter._rhs, Constant) and str(filter._lhs) == str(self._key)
+
+    def candidates(self, filter: "FilterCompare") -> list:
+        """Obtains the positions of the rows that may match a filter (see supports)
+
+        Args:
+            filter (FilterCompare): the filter
+
+        Returns:
+            list: the sorted positions of the candidate rows, or None if the index cannot obtain them for the filter
+        """
+        value = filter._rhs._value
+        if filter._operator == "in":
+            values = value if isinstance(value, list) else [ value ]
+            positions = set()
+            for value in values:
+                found = self._lookup("==", value)
+                if found is None:
+                    return None
+                positions.update(found)
+            # Rows with keys that cannot be indexed could match, so they are candidates too
+            positions.update(self._residual)
+            return sorted(positions)
+        return self._lookup(filter._operator, value)
+
+    def _clear(self) -> None:
+        # The positions of the rows whose key cannot be indexed (e.g. lists or dicts)
+        self._residual = []
+
+    def _add(self, pos: int, values: list) -> None:
+        """Adds the key values of a row to the index
+
+        Args:
+            pos (int): the position of the row
+            values (list): the values of the key for the row
+        """
+        raise NotImplementedError()
+
+    def _complete(self) -> None:
+        """Prepares the index for the lookups, once the key values of every row have been added"""
+        pass
+
+    def _insert(self, pos: int, values: list) -> None:
+        """Adds the key values of a row to the index, keeping the positions sorted (i.e. the row may not be the last
+            one, unlike in _add)
+        """
+        raise NotImplementedError()
+
+    def _remove(self, pos: int, values: list) -> None:
+        """Removes the key values of a row from the index (i.e. the values that were added for the row)"""
+        raise NotImplementedError()
+
+    def _lookup(self, operator: str, value) -> list:
+        """Obtains the sorted positions of the rows with a key value that matches the operator and the value
+
+        Returns:
+            list: the positions, or None if the index cannot obtain them
+        """
+        raise NotImplementedError()
+
+class HashIndex(Index):
+    """HashIndex keeps a bucket of rows for each value of the key, and is suitable for equality comparisons"""
+    OPERATORS = [ "==", "in" ]
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._buckets = {}
+
+    def _add(self, pos: int, values: list) -> None:
+        added = set()
+        for value in values:
+            try:
+                if value in added:
+                    continue
+                added.add(value)
+            except TypeError:
+                self._residual.append(pos)
+                continue
+            self._buckets.setdefault(value, []).append(pos)
+
+    def _insert(self, pos: int, values: list) -> None:
+        added = set()
+        for value in values:
+            try:
+                if value in added:
+                    continue
+                added.add(value)
+            except TypeError:
+                insort(self._residual, pos)
+                continue
+            insort(self._buckets.setdefault(value, []), pos)
+
+    def _remove(self, pos: int, values: list) -> None:
+        for value in values:
+            try:
+                bucket = self._buckets.get(value)
+            except TypeError:
+                _remove_position(self._residual, pos)
+                continue
+            if bucket is not None:
+                _remove_position(bucket, pos)
+                if len(bucket) == 0:
+                    del self._buckets[value]
+
+    def _lookup(self, operator: str, value) -> list:
+        if operator != "==":
+            return None
+        try:
+            return self._buckets.get(value, [])
+        except TypeError:
+            return None
+
+class SortedIndex(Index):
+    """SortedIndex keeps the values of the key sorted, so that it is suitable for equality and range comparisons. The
+        numbers and the strings are kept in separate arrays, because they cannot be compared between them.
+    """
+    OPERATORS = [ "==", "in", "<", "<=", ">", ">=" ]
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._keys = { Number: [], str: [] }
+        self._positions = { Number: [], str: [] }
+        self._sorted = True
+
+    def _add(self, pos: int, values: list) -> None:
+        for value in values:
+            kind = _kind(value)
+            if kind is None:
+                self._residual.append(pos)
+                continue
+            self._keys[kind].append(value)
+            self._positions[kind].append(pos)
+            self._sorted = False
+
+    def _sort(self) -> None:
+        """Sorts the arrays of keys (along with the positions of the rows)"""
+        for kind in self._keys:
+            entries = sorted(zip(self._keys[kind], self._positions[kind]))
+            self._keys[kind] = [ key for key, _ in entries ]
+            self._positions[kind] = [ pos for _, pos in entries ]
+        self._sorted = True
+
+    def _insert(self, pos: int, values: list) -> None:
+        for value in values:
+            kind = _kind(value)
+            if kind is None:
+                insort(self._residual, pos)
+                continue
+            keys, positions = self._keys[kind], self._positions[kind]
+            # The entries with the same key are sorted by position
+            start, end = bisect_left(keys, value), bisect_right(keys, value)
+            i = bisect_left(positions, pos, start, end)
+            keys.insert(i, value)
+            positions.insert(i, pos)
+
+    def _remove(self, pos: int, values: list) -> None:
+        for value in values:
+            kind = _kind(value)
+            if kind is None:
+                _remove_position(self._residual, pos)
+                continue
+            keys, positions = self._keys[kind], self._positions[kind]
+            start, end = bisect_left(keys, value), bisect_right(keys, value)
+            i = bisect_left(positions, pos, start, end)
+            if i < end and positions[i] == pos:
+                del keys[i]
+                del positions[i]
+
+    def _complete(self) -> None:
+        # The keys are sorted while building the index, so that the lookups do not modify it (i.e. they can be made
+        #   from several threads at the same time)
+        self._sort()
+
+    def _lookup(self, operator: str, value) -> list:
+        kind = _kind(value)
+        if kind is None:
+            return None
+        if not self._sorted:
+            self._sort()
+        keys = self._keys[kind]
+        if operator == "==":
+            start, end = bisect_left(keys, value), bisect_right(keys, value)
+        elif operator == "<":
+            start, end = 0, bisect_left(keys, value)
+        elif operator == "<=":
+            start, end = 0, bisect_right(keys, value)
+        elif operator == ">":
+            start, end = bisect_right(keys, value), len(keys)
+        elif operator == ">=":
+            start, end = bisect_left(keys, value), len(keys)
+        else:
+            return None
+        return sorted(set(self._positions[kind][start:end]))
+
+def _remove_position(positions: list, pos: int) -> None:
+    """Removes every occurrence of a position from a sorted list of positions"""
+    start = bisect_left(positions, pos)
+    del positions[start:bisect_right(positions, pos, start)]
+
+# The placeholder of the deleted rows in the list of rows of an index
+_DELETED = object()
+
+def _kind(value):
+    """Obtains the kind of array of a SortedIndex in which a value is kept
+
+    Returns:
+        type: Number or str (None if the value cannot be kept in a SortedIndex)
+    """
+    if isinstance(value, str):
+        return str
+    if isinstance(value, Number) and value == value:
+        return Number
+    return None
+
+INDEX_KINDS = {
+    "hash": HashIndex,
+    "sorted": SortedIndex
+}
@@ -0,0 +1,208 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import json
+import re
+
+class JSONBackend:
+    """JSONBackend is the base class for the libraries used to decode and encode JSON documents. The backends other than
+        the standard library are optional: they can only be created if their library is installed.
+    """
+    name = None
+
+    def loads(self, s):
+        """Decodes a JSON document
+
+        Args:
+            s (str | bytes): the document
+
+        Returns:
+            Any: the value
+        """
+        raise NotImplementedError()
+
+    def dumps(self, obj, indent: int = None) -> str:
+        """Encodes a value as a JSON document
+
+        Args:
+            obj (Any): the value
+            indent (int, optional): the indentation (None for a compact document). Defaults to None.
+
+        Returns:
+            str: the document
+        """
+        raise NotImplementedError()
+
+    def __str__(self) -> str:
+        return self.name
+
+class StdlibBackend(JSONBackend):
+    name = "json"
+
+    def __init__(self) -> None:
+        # The encoders are reused, as creating one for each value is noticeable when encoding many small values
+        self._encoders = {}
+
+    def loads(self, s):
+        return json.loads(s)
+
+    def dumps(self, obj, indent: int = None) -> str:
+        encoder = self._encoders.get(indent)
+        if encoder is None:
+            encoder = self._encoders[indent] = json.JSONEncoder(indent=indent)
+        return encoder.encode(obj)
+
+# Translates the digits to b"0" and any other byte to b" ", to find long runs of digits using a plain substring search
+_DIGITS = bytes([ 0x30 if 0x30 <= c <= 0x39 else 0x20 for c in range(256) ])
+_LONG_NUMBER = b"0" * 19
+
+# The indentation of each line of a document encoded by orjson (the strings cannot contain line breaks, so every line
+#   starts with the indentation)
+_INDENTATION = re.compile(r"^(?:  )+", re.MULTILINE)
+
+class OrjsonBackend(JSONBackend):
+    """Uses orjson, falling back to the standard library for the values that orjson does not support (i.e. NaN, the
+        infinities and the integers that do not fit in 64 bits)
+
+       (*) orjson silently decodes the integers that do not fit in 64 bits as floats, so the documents that contain a
+           run of 19 or more digits are decoded using the standard library
+       (*) the documents are encoded as orjson does whatever the indentation (i.e. the non-ASCII characters are not
+           escaped, and the floats are written in the shortest form, e.g. 1e16 instead of 1e+16): orjson only indents
+           with 2 spaces, so its output is indented again for any other indentation
+    """
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, s):
+        data = s.encode("utf-8") if isinstance(s, str) else s
+        if _LONG_NUMBER in data.translate(_DIGITS):
+            return json.loads(s)
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            # Either the document is not valid (and the standard library will also raise an error) or it contains
+            #   values that orjson does not support
+            return json.loads(s)
+
+    def dumps(self, obj, indent: int = None) -> str:
+        try:
+            s = self._orjson.dumps(obj, option=0 if indent is None else self._orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            # The values that orjson does not support are encoded by the standard library, with the same layout
+            return json.dumps(obj, indent=indent, ensure_ascii=False, separators=(",", ":") if indent is None else None)
+        if indent is not None and indent != 2:
+            s = _INDENTATION.sub(lambda m: " " * (len(m.group()) // 2 * indent), s)
+        return s
+
+class SimdjsonBackend(JSONBackend):
+    """Uses pysimdjson to decode the documents (it does not encode them, so the standard library is used for that)"""
+    name = "simdjson"
+
+    def __init__(self) -> None:
+        import simdjson
+        self._simdjson = simdjson
+
+    def loads(self, s):
+        return self._simdjson.loads(s)
+
+    def dumps(self, obj, indent: int = None) -> str:
+        return json.dumps(obj, indent=indent)
+
+class UjsonBackend(JSONBackend):
+    """Uses ujson, escaping the strings as the standard library does (i.e. the non-ASCII characters are escaped, but the
+        slashes are not)
+
+       (*) the floats are written in the shortest form, but with the sign of the exponent (e.g. 1e+16 and 1.5e-7,
+           while the standard library writes 1.5e-07), and the compact documents have no spaces after the separators
+    """
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson
+        self._ujson = ujson
+
+    def loads(self, s):
+        return self._ujson.loads(s)
+
+    def dumps(self, obj, indent: int = None) -> str:
+        return self._ujson.dumps(obj, indent=indent or 0, ensure_ascii=True, escape_forward_slashes=False)
+
+# The available backends, in order of preference
+BACKENDS = {
+    "orjson": OrjsonBackend,
+    "simdjson": SimdjsonBackend,
+    "ujson": UjsonBackend,
+    "json": StdlibBackend
+}
+
+_backends = {}
+_default_backend = None
+
+def get_backend(name: str = None) -> "JSONBackend":
+    """Obtains a backend
+
+    Args:
+        name (str, optional): the name of the backend (one of BACKENDS, or "auto" for the first one that is available).
+            Defaults to None (i.e. the default backend, see set_backend).
+
+    Raises:
+        ValueError: if the name is not valid
+        ImportError: if the library of the backend is not installed
+
+    Returns:
+        JSONBackend: the backend
+    """
+    if name is None:
+        if _default_backend is None:
+            set_backend("auto")
+        return _default_backend
+    if name == "auto":
+        for name in BACKENDS:
+            try:
+                return get_backend(name)
+            except ImportError:
+                pass
+    if name not in BACKENDS:
+        raise ValueError(f"Invalid JSON backend: {name}")
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+def available_backends() -> list:
+    """Obtains the names of the backends whose library is installed, in order of preference"""
+    available = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            available.append(name)
+        except ImportError:
+            pass
+    return available
+
+def set_backend(name: str = "auto") -> "JSONBackend":
+    """Sets the default backend (the one used when no backend is specified)
+
+    Args:
+        name (str, optional): the name of the backend (see get_backend). Defaults to "auto".
+
+    Returns:
+        JSONBackend: the backend
+    """
+    global _default_backend
+    _default_backend = get_backend(name)
+    return _default_backend
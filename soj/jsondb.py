@@ -16,40 +16,529 @@
 import argparse
 import os
 import sys
-import json
 import logging
-from .parser.parser import Parser
+from threading import Lock
+from .parser.cache import PlanCache, get_plan_cache
 from .result import Result
-from .utils import debug_function
-from .selector import Selector
+from .selector import Selector, Field
+from .aggregate import is_aggregate
+from .index import INDEX_KINDS
+from .jsonbackend import BACKENDS, get_backend, set_backend
+from .memo import RowMemo
+from .output import WRITERS, write_rows
 from .version import VERSION
 
 class JSONDB:
-    def __init__(self, jsondoc: str) -> None:
-        try:
-            self._jsondoc = json.loads(jsondoc)
-        except Exception as e:
-            logging.error(f"Error parsing JSON: {e}")
-            raise e
-    def FROM(self, query: str) -> "Result":
+    def __init__(self, jsondoc: str, plan_cache: PlanCache = None, json_backend: str = None) -> None:
+        """Creates the database from a JSON document
+
+        Args:
+            jsondoc (str): the JSON document (None if the document is obtained in other way, e.g. by a subclass)
+            plan_cache (PlanCache, optional): the cache for the parsed queries. Defaults to the global plan cache.
+            json_backend (str, optional): the library used to decode the JSON documents (see get_backend). Defaults to
+                None (i.e. the default backend).
+        """
+        self._json_backend = get_backend(json_backend)
+        self._jsondoc = None
+        if jsondoc is not None:
+            try:
+                self._jsondoc = self._json_backend.loads(jsondoc)
+            except Exception as e:
+                logging.error(f"Error parsing JSON: {e}")
+                raise e
+        self._plan_cache = plan_cache if plan_cache is not None else get_plan_cache()
+        self._indexes = {}
+        self._columnar = {}
+        self._key_index = None
+        # The generation is increased each time that the document changes, to know when the indexes are outdated
+        self._generation = 0
+        # The indexes and the columnar tables are built when a query needs them, so the queries made from several
+        #   threads at the same time must not build them at once
+        self._build_lock = Lock()
+    @property
+    def plan_cache(self) -> PlanCache:
+        return self._plan_cache
+    @property
+    def json_backend(self) -> "JSONBackend":
+        return self._json_backend
+    @property
+    def document(self):
+        return self._jsondoc
+    @document.setter
+    def document(self, jsondoc) -> None:
+        self._jsondoc = jsondoc
+        self.changed()
+    def save_snapshot(self, path: str) -> None:
+        """Saves the document in the binary snapshot format, so that it can be opened later without parsing it (see
+            open_snapshot)
+
+        Args:
+            path (str): the path of the snapshot file
+        """
+        from .snapshot import write_snapshot
+        document = self.document
+        with open(path, "wb") as f:
+            write_snapshot(document, f)
+    @staticmethod
+    def open_snapshot(path: str, plan_cache: PlanCache = None) -> "JSONDB":
+        """Opens a database from a snapshot file (see save_snapshot); the document is accessed through a memory map, and
+            each query only decodes the parts of the document that it visits
+
+        Args:
+            path (str): the path of the snapshot file
+            plan_cache (PlanCache, optional): the cache for the parsed queries. Defaults to the global plan cache.
+
+        Returns:
+            JSONDB: the database (a SnapshotDB)
+        """
+        from .snapshot import SnapshotDB
+        return SnapshotDB(path, plan_cache)
+    def changed(self) -> None:
+        """Notifies that the document has been modified, so that the indexes are rebuilt the next time they are needed"""
+        self._generation += 1
+    def create_index(self, from_path: str, key_path: str, kind: str = "hash") -> "Index":
+        """Creates a secondary index over the rows obtained by a FROM selector, on the key obtained by another selector
+            applied to each row. The queries with the same FROM selector and a WHERE clause that compares the key with
+            a constant will evaluate the comparison only on the rows obtained from the index.
+
+            (*) the index is built the first time it is needed, and rebuilt if the document changes
+
+        Args:
+            from_path (str): the selector of the rows (e.g. items[])
+            key_path (str): the selector of the key in each row (e.g. id)
+            kind (str, optional): "hash" (for == and in) or "sorted" (also for <, <=, > and >=). Defaults to "hash".
+
+        Raises:
+            ValueError: if the kind of index is not valid
+
+        Returns:
+            Index: the index
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Invalid index kind: {kind}")
+        if self._jsondoc is None:
+            raise Exception("Indexes need the document to be loaded in memory")
+        from_selector = self._selector(from_path)
+        key_selector = self._selector(key_path)
+        index = INDEX_KINDS[kind](from_selector, key_selector)
+        self._indexes[(str(from_selector), str(key_selector), kind)] = index
+        return index
+    def drop_index(self, from_path: str, key_path: str, kind: str = "hash") -> None:
+        """Removes an index (see create_index)"""
+        self._indexes.pop((str(self._selector(from_path)), str(self._selector(key_path)), kind), None)
+    @property
+    def indexes(self) -> list:
+        return list(self._indexes.values())
+    def create_columnar(self, from_path: str) -> "ColumnarTable":
+        """Creates a columnar table with the rows obtained by a FROM selector (see ColumnarTable). The queries with the
+            same FROM selector will evaluate the comparisons of keys with constants, and the aggregates without GROUP BY,
+            over whole columns (if NumPy is available and the rows are flat records).
+
+            (*) the table is built the first time it is needed, and rebuilt if the document changes
+
+        Args:
+            from_path (str): the selector of the rows (e.g. items[])
+
+        Returns:
+            ColumnarTable: the table
+        """
+        from .columnar import ColumnarTable
+        if self._jsondoc is None:
+            raise Exception("Columnar tables need the document to be loaded in memory")
+        from_selector = self._selector(from_path)
+        table = ColumnarTable(from_selector)
+        self._columnar[str(from_selector)] = table
+        return table
+    def drop_columnar(self, from_path: str) -> None:
+        """Removes a columnar table (see create_columnar)"""
+        self._columnar.pop(str(self._selector(from_path)), None)
+    def create_key_index(self) -> "KeyIndex":
+        """Creates the inverted index of the keys of the document (see KeyIndex). The recursive descents into keys
+            (e.g. ..name) of the FROM, WHERE and SELECT clauses will obtain their values from the index, instead of
+            visiting every node below the objects from which they are applied.
+
+            (*) the index is built the first time it is needed, and rebuilt if the document changes
+
+        Returns:
+            KeyIndex: the index
+        """
+        from .keyindex import KeyIndex
+        if self._jsondoc is None:
+            raise Exception("Key indexes need the document to be loaded in memory")
+        if self._key_index is None:
+            self._key_index = KeyIndex()
+        return self._key_index
+    def drop_key_index(self) -> None:
+        """Removes the index of the keys of the document (see create_key_index)"""
+        self._key_index = None
+    @property
+    def key_index(self) -> "KeyIndex":
+        return self._key_index
+    def _find_key_index(self) -> "KeyIndex":
+        """Obtains the index of the keys (already built for the current document), or None if there is no index"""
+        index = self._key_index
+        if index is not None and not index.is_valid(self._generation):
+            with self._build_lock:
+                # Other thread may have built it while waiting for the lock
+                if not index.is_valid(self._generation):
+                    index.build(self._jsondoc, self._generation)
+        return index
+    def _find_columnar(self, from_query) -> "ColumnarTable":
+        """Obtains the columnar table for a FROM selector (already built for the current document), or None if there is
+            no table for it"""
+        table = self._columnar.get(str(self._selector(from_query)))
+        if table is not None and not table.is_valid(self._generation):
+            with self._build_lock:
+                # Other thread may have built it while waiting for the lock
+                if not table.is_valid(self._generation):
+                    table.build(self._jsondoc, self._generation)
+        return table
+    def _selector(self, query) -> "Selector":
         if isinstance(query, Selector):
-            selector = query
-        else:
-            selector = Parser().parse_selection(query)
+            return query
+        return self._plan_cache.parse_selection(query)
+    def _find_index(self, from_selector: "Selector", filter: "Filter") -> "Index":
+        """Finds an index that can obtain the candidate rows for a query (i.e. for the filter or any of its conjuncts)
+
+        Args:
+            from_selector (Selector): the selector of the FROM clause
+            filter (Filter): the filter of the WHERE clause
+
+        Returns:
+            tuple: the index (already built for the current document) and the filter that it can evaluate, or (None,
+                None) if there is no suitable index
+        """
+        from_str = str(from_selector)
+        for conjunct in filter.conjuncts():
+            for index in self._indexes.values():
+                if str(index.from_selector) == from_str and index.supports(conjunct):
+                    if not index.is_valid(self._generation):
+                        with self._build_lock:
+                            if not index.is_valid(self._generation):
+                                index.build(self._jsondoc, self._generation)
+                    return index, conjunct
+        return None, None
+    def FROM(self, query: str) -> "Result":
+        selector = self._selector(query)
 
         try:
             pass
         except Exception as e:
             logging.error(f"Error parsing selector: {e}")
             return Result()
-        return selector.select(self._jsondoc)
-    def query(self, query_str: str):
-        query_params = Parser().parse(query_str)
-        r_from = self.FROM(query_params["from"])
-        r_filtered = r_from.filter(query_params["where"])
-        r_select = r_filtered.select(query_params["select"])
+        return Result.lazy(self._iterate_from(selector))
+    def _FROM_index(self, from_query, where_query) -> "Result":
+        """Obtains the rows of the FROM clause that may match the WHERE clause using an index, if possible
+
+        Returns:
+            Result: the candidate rows, or None if no index can be used
+        """
+        from_selector = self._selector(from_query)
+        filter = where_query
+        if isinstance(filter, str):
+            filter = self._plan_cache.parse_comparison(filter)
+        index, filter = self._find_index(from_selector, filter)
+        if index is None:
+            return None
+        positions = index.candidates(filter)
+        if positions is None:
+            return None
+        return Result.lazy(map(index.rows.__getitem__, positions))
+    def _iterate_from(self, selector: "Selector"):
+        """Generates the values of the document that match the selector of the FROM clause
+
+        Args:
+            selector (Selector): the selector
+
+        Returns:
+            Iterable: the values, one at a time
+        """
+        if self._key_index is not None and self._key_index.supports(selector):
+            return iter(self._find_key_index().compile(selector)(self._jsondoc))
+        return selector.iterate(self._jsondoc)
+    @staticmethod
+    def _grouped_order(query_params: dict) -> list:
+        """Obtains the sort keys for the output rows of a grouped query, in which the items of the ORDER BY clause must
+            be items of the SELECT clause (e.g. ORDER BY count(*) DESC)
+
+        Raises:
+            Exception: if any item of the ORDER BY clause is not in the SELECT clause
+
+        Returns:
+            list: the (Selector, descending) tuples
+        """
+        labels = [ item.label() for item in query_params["select"] ]
+        order = []
+        for item, descending in query_params["order_by"]:
+            if item.label() not in labels:
+                raise Exception(f"The ORDER BY items of a grouped query must be in the SELECT clause: {item}")
+            order.append((Field(item.label()), descending))
+        return order
+
+    def query(self, query_str: str, jobs: int = None, memo: RowMemo = None):
+        """Executes a query: SELECT <selectors> FROM <selector> WHERE <comparison> GROUP BY <selectors>
+            ORDER BY <selectors> LIMIT <count> OFFSET <count>
+
+        Args:
+            query_str (str): the query
+            jobs (int, optional): the amount of processes used to evaluate the query (see query_parallel). Defaults to
+                None (i.e. evaluate it in this process).
+            memo (RowMemo, optional): the memo in which the WHERE and SELECT clauses share the lookups of the prefixes
+                of their selectors on each row (e.g. to obtain its stats), and that compiles them using the index of
+                the keys, if any (see create_key_index). Defaults to None (i.e. a new memo for the query).
+
+        Returns:
+            Result: the result of the query
+        """
+        query_params = self._plan_cache.parse(query_str)
+        grouped = is_aggregate(query_params["select"]) or len(query_params["group_by"]) > 0
+        end = None if query_params["limit"] is None else query_params["offset"] + query_params["limit"]
+        if jobs is not None and jobs > 1:
+            from .parallel import query_parallel
+            r_select = query_parallel(self, query_str, jobs)
+        else:
+            table = None
+            if len(self._columnar) > 0:
+                table = self._find_columnar(query_params["from"])
+            if table is not None:
+                r_filtered = table.filter(query_params["where"])
+            else:
+                r_from = None
+                if len(self._indexes) > 0:
+                    r_from = self._FROM_index(query_params["from"], query_params["where"])
+                if r_from is None:
+                    r_from = self.FROM(query_params["from"])
+                where = query_params["where"]
+                if isinstance(where, str):
+                    where = self._plan_cache.parse_comparison(where)
+                if memo is None:
+                    memo = RowMemo()
+                # The conditions of the WHERE clause and the selectors of the SELECT clause are evaluated on the same
+                #   row, one after the other, so they share the lookups of the prefixes of their selectors
+                memo.prepare(where.selectors() + ([] if grouped else query_params["select"]), self._find_key_index())
+                r_filtered = r_from.filter(where, memo)
+            if grouped:
+                r_select = None
+                if table is not None and len(query_params["group_by"]) == 0:
+                    r_select = table.aggregate(query_params["select"], query_params["where"])
+                if r_select is None:
+                    r_select = r_filtered.aggregate(query_params["select"], query_params["group_by"])
+            elif len(query_params["order_by"]) > 0:
+                # The keys are obtained from the rows of the FROM clause (as in SQL), and only the selected objects are
+                #   kept while sorting; if there is a limit, only the objects up to the end of the range are kept
+                r_select = r_filtered.order_by(query_params["order_by"], end, selector=query_params["select"], memo=memo)
+            else:
+                r_select = r_filtered.select(query_params["select"], memo)
+        if grouped and len(query_params["order_by"]) > 0:
+            # The ORDER BY clause of a grouped query refers to the columns of the output rows
+            r_select = r_select.order_by(self._grouped_order(query_params), end)
+        if query_params["limit"] is not None or query_params["offset"] > 0:
+            # The whole pipeline is lazy, so the evaluation stops once the last row in the range is obtained
+            r_select = r_select.limit(query_params["limit"], query_params["offset"])
         return r_select
 
+    def _matching_rows(self, from_selector: "Selector", where) -> list:
+        """Obtains the rows of a FROM selector that match a WHERE clause (using an index, if possible), each row once
+
+        Args:
+            from_selector (Selector): the selector of the rows
+            where (str | Filter): the condition (None for all the rows)
+
+        Returns:
+            list: the rows
+        """
+        if self._jsondoc is None:
+            raise Exception("Mutations need the document to be loaded in memory")
+        if isinstance(where, str):
+            where = self._plan_cache.parse_comparison(where)
+        rows = None
+        if where is not None and len(self._indexes) > 0:
+            rows = self._FROM_index(from_selector, where)
+        if rows is None:
+            rows = self._iterate_from(from_selector)
+        evaluate = None if where is None else where.compile()
+        matched = {}
+        for row in rows:
+            if evaluate is None or evaluate(row):
+                matched.setdefault(id(row), row)
+        return list(matched.values())
+
+    def _indexes_kept(self, from_str: str, kept: bool) -> list:
+        """Obtains the indexes (already built for the current document) on the rows of a FROM selector, that are
+            updated in place by a mutation
+
+        Args:
+            from_str (str): the FROM selector (as a string)
+            kept (bool): whether the other rows of the FROM selector are kept by the mutation (see keeps_rows)
+
+        Returns:
+            list: the indexes (the rest are rebuilt the next time they are needed)
+        """
+        if not kept:
+            return []
+        return [ index for index in self._indexes.values() if str(index.from_selector) == from_str and index.is_valid(self._generation) ]
+
+    def _mutated(self, indexes: list) -> None:
+        """Notifies that the document has been modified by a mutation, whose changes have already been applied to some
+            indexes (the columnar tables, the index of the keys and the rest of the indexes are rebuilt the next time
+            they are needed)"""
+        self.changed()
+        for index in indexes:
+            index.keep(self._generation)
+
+    def update(self, from_path, assignments, where = None) -> int:
+        """Modifies the rows of a FROM selector that match a WHERE clause: UPDATE <from> SET <target> = <value>, ...
+            WHERE <where>
+
+           (*) the targets are paths of fixed keys and indexes relative to each row; the keys that do not exist are
+               created, but the lists are not extended
+           (*) the values that are selectors (e.g. a Constant, or a Field of the row) are evaluated on each row before
+               assigning any of them; the rest of the values are assigned as they are (a copy of them, if they are
+               lists or objects)
+           (*) the indexes on the same rows are updated in place, instead of being rebuilt
+
+        Args:
+            from_path (str | Selector): the selector of the rows (e.g. items[])
+            assignments (dict | list): the values for each target (or the list of (target, value) tuples)
+            where (str | Filter, optional): the condition that the rows must match. Defaults to None (i.e. all the rows).
+
+        Raises:
+            ValueError: if any target is not a path of fixed keys and indexes
+            Exception: if any target cannot be assigned in a row (nothing is modified, in that case)
+
+        Returns:
+            int: the amount of rows modified
+        """
+        from .aggregate import _value
+        from .mutation import assignment_path, can_assign, assign, detached, keeps_rows
+        from_selector = self._selector(from_path)
+        if isinstance(assignments, dict):
+            assignments = assignments.items()
+        assignments = [ (self._selector(target), value) for target, value in assignments ]
+        paths = [ assignment_path(target) for target, _ in assignments ]
+        rows = self._matching_rows(from_selector, where)
+        for row in rows:
+            for (target, _), path in zip(assignments, paths):
+                if not can_assign(row, path):
+                    raise Exception(f"Cannot assign {target} in a row of {from_selector}")
+
+        compiled = [ (value.compile(), None) if isinstance(value, Selector) else (None, value) for _, value in assignments ]
+        with self._build_lock:
+            indexes = self._indexes_kept(str(from_selector), keeps_rows(from_selector))
+            # The positions of the rows in each index (the indexes in which they are not found are rebuilt)
+            positions = [ (index, [ index.position(row) for row in rows ]) for index in indexes ]
+            positions = [ (index, p) for index, p in positions if None not in p ]
+            for i, row in enumerate(rows):
+                for index, p in positions:
+                    index.remove_row(p[i])
+                values = [ constant if select is None else _value(select(row)) for select, constant in compiled ]
+                for path, value in zip(paths, values):
+                    assign(row, path, detached(value))
+                for index, p in positions:
+                    index.add_row(p[i])
+            self._mutated([ index for index, _ in positions ])
+        return len(rows)
+
+    def delete(self, from_path, where = None) -> int:
+        """Removes the values of a FROM selector that match a WHERE clause from the document: DELETE FROM <from>
+            WHERE <where>
+
+           (*) the last step of the FROM selector must move into a key, an index or a slice (e.g. items[] or
+               items[].tags), which is where the values are removed from
+           (*) the indexes on the same rows are updated in place, instead of being rebuilt (the removed rows are left
+               as holes in them)
+
+        Args:
+            from_path (str | Selector): the selector of the values (e.g. items[])
+            where (str | Filter, optional): the condition that the values must match. Defaults to None (i.e. all the
+                values).
+
+        Returns:
+            int: the amount of values removed
+        """
+        from .mutation import locations, keeps_rows
+        from_selector = self._selector(from_path)
+        rows = set([ id(row) for row in self._matching_rows(from_selector, where) ])
+        targets = {}
+        for container, key in locations(from_selector, self._jsondoc, rows):
+            targets.setdefault((id(container), key), (container, key))
+        targets = list(targets.values())
+
+        with self._build_lock:
+            indexes = self._indexes_kept(str(from_selector), keeps_rows(from_selector))
+            positions = [ (index, [ index.position(container[key]) for container, key in targets ]) for index in indexes ]
+            positions = [ (index, p) for index, p in positions if None not in p ]
+            for index, p in positions:
+                for pos in p:
+                    index.delete_row(pos)
+            # The indexes of a list are removed from the last one, so that the rest do not move
+            for container, key in sorted(targets, key=lambda target: target[1] if isinstance(target[0], list) else 0, reverse=True):
+                del container[key]
+            self._mutated([ index for index, _ in positions ])
+        return len(targets)
+
+    def insert(self, into_path, *values) -> int:
+        """Appends values to the lists selected by a selector: INSERT INTO <into> VALUES <value>, ...
+
+           (*) the values are copied (if they are lists or objects), so they are not shared with the caller
+           (*) if the selector is a path of fixed keys and indexes, the indexes on the elements of the list (e.g. on
+               items[] for INSERT INTO items) are updated in place, instead of being rebuilt
+
+        Args:
+            into_path (str | Selector): the selector of the lists (e.g. items)
+            values (Any): the values
+
+        Raises:
+            Exception: if any of the selected values is not a list
+
+        Returns:
+            int: the amount of values inserted
+        """
+        from .mutation import detached, is_path
+        if self._jsondoc is None:
+            raise Exception("Mutations need the document to be loaded in memory")
+        into = self._selector(into_path)
+        targets = list(self._iterate_from(into))
+        for target in targets:
+            if not isinstance(target, list):
+                raise Exception(f"Cannot insert into {into}: it is not a list")
+
+        with self._build_lock:
+            indexes = self._indexes_kept(f"{into}[]" if str(into) != "$" else "[]", is_path(into))
+            for target in targets:
+                for value in values:
+                    value = detached(value)
+                    target.append(value)
+                    for index in indexes:
+                        index.append_row(value)
+            self._mutated(indexes)
+        return len(targets) * len(values)
+
+    def execute(self, statement: str) -> int:
+        """Executes a statement that modifies the document (see Parser.parse_mutation): UPDATE <from> SET
+            <target> = <value>, ... WHERE <where>, DELETE FROM <from> WHERE <where> or INSERT INTO <into> VALUES
+            <json>, ...
+
+           (*) the statements must not be executed while other threads query the database
+
+        Args:
+            statement (str): the statement
+
+        Returns:
+            int: the amount of rows (or values) modified, removed or inserted
+        """
+        from .parser.parser import get_parser
+        plan = get_parser().parse_mutation(statement)
+        if plan["statement"] == "update":
+            return self.update(plan["from"], plan["set"], plan["where"])
+        if plan["statement"] == "delete":
+            return self.delete(plan["from"], plan["where"])
+        try:
+            values = self._json_backend.loads(f"[{plan['values']}]")
+        except Exception as e:
+            raise Exception(f"Invalid values: {e}")
+        return self.insert(plan["into"], *values)
+
 def main():
     """This is a demo application to test the JSONDB class. It accepts a JSON document as input and enables to query it using a SQL-like query language.
 
@@ -63,9 +552,29 @@ def main():
     parser.add_argument("-w", "--where", help="The where clause where execute the query", dest="q_where", default="$")
     parser.add_argument("-s", "--select", help="The select clause where execute the query", dest="q_select", default="$")
     parser.add_argument("-v", "--version", help="Show the version of the program", action="version", version=VERSION)
+    parser.add_argument("-O", "--order-by", help="The order by clause of the query (e.g. \"price desc, name\"); not valid with -q, whose query\ncontains its own order by clause", dest="q_order_by", default=None)
+    parser.add_argument("-l", "--limit", help="The maximum amount of results (not valid with -q)", type=int, dest="q_limit", default=None)
+    parser.add_argument("-o", "--offset", help="The amount of results to skip (not valid with -q)", type=int, dest="q_offset", default=0)
     parser.add_argument("-q", "--query", help="The query to execute", dest="query", default=None)
+    parser.add_argument("--stream", help="Read the document incrementally, evaluating the from clause while reading it, instead of\nloading the whole document in memory", action="store_true", dest="stream", default=False)
+    parser.add_argument("-j", "--jobs", help="The amount of processes used to evaluate the query", type=int, dest="jobs", default=None)
+    parser.add_argument("--snapshot", help="The document is a binary snapshot (see --save-snapshot)", action="store_true", dest="snapshot", default=False)
+    parser.add_argument("--save-snapshot", help="Save the document as a binary snapshot in the given path (and exit); the snapshot can be\nopened afterwards without parsing the document (using --snapshot)", dest="save_snapshot", default=None)
+    parser.add_argument("--json-backend", help="The library used to decode and encode JSON (default: the fastest one installed); the output depends on the library, but not on the indentation (e.g. orjson writes 1e16 and non-ASCII characters as they are, while json writes 1e+16 and escapes them; ujson escapes the\nstrings as json does, but writes 1.5e-7 instead of 1.5e-07)", choices=[ "auto" ] + list(BACKENDS), dest="json_backend", default="auto")
+    parser.add_argument("--output-format", help="The format of the output: a JSON array (default), NDJSON or, for flat rows, CSV or TSV", choices=list(WRITERS), dest="output_format", default="json")
+    parser.add_argument("--indent", help="The indentation of the JSON output (0 for a compact output)", type=int, dest="indent", default=4)
+    parser.add_argument("--ndjson", help="The document is newline-delimited JSON (NDJSON / JSON Lines), and each line is a row", action="store_true", dest="ndjson", default=False)
 
     args = parser.parse_args()
+    if args.query is not None and (args.q_order_by is not None or args.q_limit is not None or args.q_offset > 0):
+        # The clauses would not be applied as in the query (e.g. ORDER BY sorts the rows of the FROM clause)
+        print("The order by, limit and offset options cannot be used with -q (they must be part of the query)")
+        return 1
+    try:
+        backend = set_backend(args.json_backend)
+    except ImportError:
+        print(f"JSON backend not installed: {args.json_backend}")
+        return 1
     if args.jsonfile == "-":
         jsonfile = sys.stdin
     else:
@@ -74,12 +583,36 @@ def main():
             return 1
         jsonfile = open(args.jsonfile)
 
-    jsondb = JSONDB(jsonfile.read())
+    if args.snapshot:
+        if jsonfile is sys.stdin:
+            print("A snapshot must be a file")
+            return 1
+        jsonfile.close()
+        jsondb = JSONDB.open_snapshot(args.jsonfile)
+    elif args.ndjson:
+        from .stream import NDJSONDB
+        jsondb = NDJSONDB(jsonfile)
+    elif args.stream:
+        from .stream import JSONStreamDB
+        jsondb = JSONStreamDB(jsonfile)
+    else:
+        jsondb = JSONDB(jsonfile.read())
+    if args.save_snapshot is not None:
+        jsondb.save_snapshot(args.save_snapshot)
+        return 0
     if args.query is not None:
-        r = jsondb.query(args.query)
+        r = jsondb.query(args.query, jobs=args.jobs)
     else:
-        r = jsondb.query(f"select {args.q_select} from {args.q_from} where {args.q_where}")
-    print(json.dumps(list(r), indent=4))
+        query = f"select {args.q_select} from {args.q_from} where {args.q_where}"
+        if args.q_order_by is not None:
+            query += f" order by {args.q_order_by}"
+        if args.q_limit is not None:
+            query += f" limit {args.q_limit}"
+        if args.q_offset > 0:
+            query += f" offset {args.q_offset}"
+        r = jsondb.query(query, jobs=args.jobs)
+    # The rows are written as they are produced, instead of building the whole output
+    write_rows(r, sys.stdout, args.output_format, args.indent, backend)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
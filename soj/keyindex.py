@@ -0,0 +1,211 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import sys
+from array import array
+from bisect import bisect_left
+from .selector import Explorer, Field
+
+class KeyIndex:
+    """KeyIndex is an inverted index of the keys of a document: it maps each key to the objects that contain it, so
+        that a recursive descent into a key (e.g. ..name or ..['name']) obtains the values from the index instead of
+        visiting every node below the object from which it is applied.
+
+       The lists and objects of the document are numbered in pre-order (i.e. the order in which the recursive descent
+         visits them), and the index keeps the numbers of the objects that contain each key, along with the range of
+         numbers of the nodes below each list or object. So the objects below a node that contain a key are a
+         contiguous range of the entries of the key, in the same order than the recursive descent.
+
+       (*) the nodes that appear more than once in the document (i.e. the same python object in several places) and the
+           objects that are not in the document are explored as usual, without the index
+       (*) the index refers to the nodes of the document, so it must be rebuilt if the document changes (see
+           JSONDB.changed)
+    """
+    def __init__(self) -> None:
+        """Creates the index (it is not built until it is needed)"""
+        # The numbers of the objects that contain each key, and the objects themselves (in pre-order)
+        self._positions = {}
+        self._parents = {}
+        # The number of each list or object, by id (-1 if the node appears more than once), and the number that
+        #   follows the last node below each of them (i.e. the nodes below the node numbered n are in [n, ends[n]))
+        self._numbers = {}
+        self._ends = array("q")
+        self._bytes = 0
+        # The generation of the document for which the index was built (see JSONDB.changed)
+        self._generation = None
+
+    def __str__(self) -> str:
+        stats = self.stats
+        return f"KeyIndex({stats['keys']} keys, {stats['entries']} entries, {stats['nodes']} nodes, {stats['bytes']} bytes)"
+
+    @property
+    def stats(self) -> dict:
+        """Obtains the size of the index
+
+        Returns:
+            dict: the amount of keys, of entries (i.e. objects that contain each key) and of nodes of the document, along
+                with the (approximate) memory used by the index, in bytes
+        """
+        return {
+            "keys": len(self._positions),
+            "entries": sum([ len(positions) for positions in self._positions.values() ]),
+            "nodes": len(self._ends),
+            "bytes": self._bytes
+        }
+
+    def is_valid(self, generation: int) -> bool:
+        """Returns True if the index was built for the given generation of the document"""
+        return self._generation is not None and self._generation == generation
+
+    def build(self, jsondoc, generation: int = None) -> "KeyIndex":
+        """Builds the index from a document
+
+        Args:
+            jsondoc (Any): the document
+            generation (int, optional): the generation of the document. Defaults to None.
+
+        Returns:
+            KeyIndex: this index (to enable chaining)
+        """
+        positions = {}
+        parents = {}
+        numbers = {}
+        ends = array("q")
+        count = 0
+        # The nodes to visit, along with their number once they have been entered (i.e. None when they are pushed, and
+        #   the number when they are pushed again to set their end once their descendants are visited)
+        stack = [ (jsondoc, None) ] if isinstance(jsondoc, (dict, list)) else []
+        while stack:
+            obj, number = stack.pop()
+            if number is not None:
+                ends[number] = count
+                continue
+            key = id(obj)
+            numbers[key] = -1 if key in numbers else count
+            ends.append(count)
+            stack.append((obj, count))
+            if isinstance(obj, dict):
+                for key in obj:
+                    if key not in positions:
+                        positions[key] = array("q")
+                        parents[key] = []
+                    positions[key].append(count)
+                    parents[key].append(obj)
+                children = obj.values()
+            else:
+                children = obj
+            count += 1
+            stack.extend([ (child, None) for child in reversed(children) if isinstance(child, (dict, list)) ])
+
+        self._positions = positions
+        self._parents = parents
+        self._numbers = numbers
+        self._ends = ends
+        # The numbers kept in the dict are objects of their own (unlike those in the arrays), so their size is added
+        self._bytes = sys.getsizeof(positions) + sys.getsizeof(parents) + sys.getsizeof(numbers) + sys.getsizeof(ends) + \
+            sum([ sys.getsizeof(entries) for entries in positions.values() ]) + \
+            sum([ sys.getsizeof(entries) for entries in parents.values() ]) + \
+            sum([ sys.getsizeof(number) for number in numbers.values() ])
+        self._generation = generation
+        return self
+
+    @staticmethod
+    def _explores_key(selector: "Selector") -> bool:
+        """Returns True if the selector is a recursive descent into a key (i.e. an Explorer followed by a Field)"""
+        return isinstance(selector, Explorer) and isinstance(selector._next, Field)
+
+    def supports(self, selector: "Selector") -> bool:
+        """Returns True if the chain of selectors contains a recursive descent into a key (e.g. items[]..name)"""
+        while selector is not None:
+            if self._explores_key(selector):
+                return True
+            selector = selector._next
+        return False
+
+    def compile(self, selector: "Selector"):
+        """Compiles a selector into a function that obtains the same values than the function obtained by
+            Selector.compile, but that obtains the values of the recursive descents into keys from the index
+
+        Args:
+            selector (Selector): the selector
+
+        Returns:
+            function: a function that receives an object and returns the list of values that match the selector
+        """
+        if not self.supports(selector):
+            return selector.compile()
+        step = self.compile_chain(selector)
+        def compiled(obj) -> list:
+            values = []
+            step(obj, values.append)
+            return values
+        return compiled
+
+    def compile_chain(self, selector: "Selector"):
+        """Compiles a selector and its chain of next selectors into a step function (see Selector._compile_chain), in
+            which the recursive descents into keys are obtained from the index
+
+        Args:
+            selector (Selector): the selector
+
+        Returns:
+            function: a function step(obj, emit) that calls emit for each value that matches the chain
+        """
+        chain = []
+        while selector is not None and not self._explores_key(selector):
+            chain.append(selector)
+            selector = selector._next
+        if selector is None:
+            return chain[0]._compile_chain()
+
+        field = selector._next
+        tail = None if field._next is None else self.compile_chain(field._next)
+        step = self._compile_descent(field._field, tail, selector._compile_step(field._compile_step(tail)))
+        # The selectors before the recursive descent are compiled one by one, as they are usually few (e.g. items[])
+        for previous in reversed(chain):
+            step = previous._compile_step(step)
+        return step
+
+    def _compile_descent(self, key: str, tail, explore):
+        """Compiles a recursive descent into a key
+
+        Args:
+            key (str): the key
+            tail (function): the step function of the rest of the chain (None to emit the values of the key)
+            explore (function): the step function that visits the nodes below an object (i.e. the compiled Explorer),
+                for the objects that are not in the index
+
+        Returns:
+            function: a function step(obj, emit) that calls emit (or tail) for each value of the key below obj
+        """
+        numbers = self._numbers
+        ends = self._ends
+        positions = self._positions.get(key, array("q"))
+        parents = self._parents.get(key, [])
+        def step(obj, emit):
+            number = numbers.get(id(obj), -1)
+            if number < 0:
+                if isinstance(obj, (dict, list)):
+                    explore(obj, emit)
+                return
+            start = bisect_left(positions, number)
+            end = bisect_left(positions, ends[number], start)
+            if tail is None:
+                for parent in parents[start:end]:
+                    emit(parent[key])
+            else:
+                for parent in parents[start:end]:
+                    tail(parent[key], emit)
+        return step
@@ -0,0 +1,201 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from .selector.selector import _walk_path, _NOT_FOUND
+
+class RowMemo:
+    """RowMemo shares the lookups of the path prefixes between the selectors that are evaluated on the same row (e.g.
+        the WHERE clause filters on .user.id and the SELECT clause obtains .user.id and .user.name, so .user and
+        .user.id are looked up once per row). The memo is prepared with the selectors of a query, and each prefix of
+        fixed keys and indexes that is used by several of them gets a slot, in which the node at the end of the prefix
+        is kept along with the row from which it was obtained.
+
+       (*) the amount of slots is bounded, and they are allocated once per query: a slot is valid while the selectors
+           are evaluated on the row from which it was filled, so moving to the next row does not need to clear them
+       (*) the rows must not be modified while they are evaluated, and a memo must not be shared by queries that are
+           evaluated from several threads at the same time
+    """
+    def __init__(self, max_slots: int = 64) -> None:
+        """Creates the memo
+
+        Args:
+            max_slots (int, optional): the maximum amount of prefixes that are memoized (0 disables the memo). Defaults
+                to 64.
+        """
+        if max_slots < 0:
+            raise ValueError(f"Invalid amount of slots: {max_slots}")
+        self._max_slots = max_slots
+        self._slots = {}
+        # The row from which each slot was filled (any object, even None, may be a row), and the node that it obtained
+        self._rows = [ _NOT_FOUND ] * max_slots
+        self._nodes = [ None ] * max_slots
+        # The (hits, lengths) of the memoized segments of each compiled selector
+        self._hits = []
+        self._key_index = None
+
+    def __str__(self) -> str:
+        stats = self.stats
+        return f"{stats['slots']}/{self._max_slots} slots ({stats['hits']} hits, {stats['steps_saved']} steps saved)"
+
+    @property
+    def stats(self) -> dict:
+        """Obtains the counters of the memo
+
+        Returns:
+            dict: the hits of the memoized prefixes and the path steps that they saved since the memo was prepared
+                for the last query, along with the amount of slots in use
+        """
+        hits = 0
+        steps_saved = 0
+        for counts, lengths in self._hits:
+            hits += sum(counts)
+            steps_saved += sum([ count * length for count, length in zip(counts, lengths) ])
+        return {
+            "hits": hits,
+            "steps_saved": steps_saved,
+            "slots": len(self._slots),
+            "max_slots": self._max_slots
+        }
+
+    @staticmethod
+    def _path(selector: "Selector") -> tuple:
+        """Splits a selector into its leading path of fixed keys and indexes and the rest of the chain
+
+        Returns:
+            tuple: the list of (type, key) tuples (see Selector._path_key) and the selector after the path (or None)
+        """
+        path = []
+        while selector is not None and selector._path_key() is not None:
+            path.append(selector._path_key())
+            selector = selector._next
+        return path, selector
+
+    def prepare(self, selectors: list, key_index: "KeyIndex" = None) -> None:
+        """Prepares the memo for the selectors of a query: the prefixes that are used by several selectors get a slot
+            (while there are free slots), and the slots and the stats of the previous query are released
+
+           (*) the slots are kept in new arrays, so the functions compiled for the previous queries keep their own slots
+               (i.e. their results can still be consumed, but they are no longer counted in the stats)
+
+        Args:
+            selectors (list): the selectors that are evaluated on each row (e.g. those of the WHERE and SELECT clauses)
+            key_index (KeyIndex, optional): the index of the keys of the document, used to compile the recursive
+                descents into keys (see KeyIndex). Defaults to None.
+        """
+        counts = {}
+        for selector in selectors:
+            path, _ = self._path(selector)
+            for i in range(1, len(path) + 1):
+                prefix = tuple(path[:i])
+                counts[prefix] = counts.get(prefix, 0) + 1
+        # A prefix followed by the same selectors than one of its extensions (e.g. .order in .order.lines[0].price and
+        #   .order.lines[0].sku) is not memoized, as the extension saves more steps to the same selectors
+        redundant = set([ prefix[:-1] for prefix, count in counts.items() if len(prefix) > 1 and count == counts[prefix[:-1]] ])
+        self._slots = {}
+        for prefix, count in counts.items():
+            if count > 1 and prefix not in redundant and len(self._slots) < self._max_slots:
+                self._slots[prefix] = len(self._slots)
+        self._rows = [ _NOT_FOUND ] * self._max_slots
+        self._nodes = [ None ] * self._max_slots
+        self._hits = []
+        self._key_index = key_index
+
+    def compile_chain(self, selector: "Selector"):
+        """Compiles a selector and its chain of next selectors into a step function (see Selector._compile_chain),
+            using the index of the keys, if any"""
+        if self._key_index is None:
+            return selector._compile_chain()
+        return self._key_index.compile_chain(selector)
+
+    def compile(self, selector: "Selector"):
+        """Compiles a selector into a function that obtains the same values than the function obtained by
+            Selector.compile, but that gets the nodes at the end of its memoized prefixes from the slots, if they were
+            already looked up in the same row (and keeps them otherwise)
+
+        Args:
+            selector (Selector): the selector
+
+        Returns:
+            function: a function that receives an object and returns the list of values that match the selector
+        """
+        path, rest = self._path(selector)
+        # The path is split into segments that end in each memoized prefix, so that each segment is walked in a loop
+        #   and the node at its end is kept in its slot (the last segment, if any, is not memoized)
+        segments = []
+        start = 0
+        for i in range(1, len(path) + 1):
+            slot = self._slots.get(tuple(path[:i]))
+            if slot is not None:
+                segments.append((i, tuple(path[start:i]), slot))
+                start = i
+        if len(segments) == 0:
+            return selector.compile() if self._key_index is None else self._key_index.compile(selector)
+        if start < len(path):
+            segments.append((len(path), tuple(path[start:]), None))
+        tail = None if rest is None else self.compile_chain(rest)
+        # The memoized segments, from the longest prefix to the shortest (i.e. the order in which they are looked up),
+        #   along with the segments that have to be walked from their node
+        memoized = [ (k, segments[k][2], segments[k + 1:]) for k in reversed(range(len(segments))) if segments[k][2] is not None ]
+        # The amount of hits of each memoized segment (see stats)
+        hits = [ 0 ] * len(segments)
+        self._hits.append((hits, [ length for length, _, _ in segments ]))
+        rows = self._rows
+        nodes = self._nodes
+
+        if len(memoized) == 1 and memoized[0][0] == 0:
+            # The most common case: a single memoized prefix, that may be followed by the rest of the path
+            _, prefix, slot = segments[0]
+            suffix = None if len(segments) == 1 else tuple([ key for _, segment, _ in segments[1:] for key in segment ])
+            def select(obj) -> list:
+                if rows[slot] is obj:
+                    node = nodes[slot]
+                    hits[0] += 1
+                else:
+                    node = _walk_path(obj, prefix)
+                    rows[slot] = obj
+                    nodes[slot] = node
+                if suffix is not None:
+                    node = _walk_path(node, suffix)
+                values = []
+                if node is not _NOT_FOUND:
+                    if tail is None:
+                        values.append(node)
+                    else:
+                        tail(node, values.append)
+                return values
+            return select
+
+        def select(obj) -> list:
+            node = obj
+            remaining = segments
+            for k, slot, following in memoized:
+                if rows[slot] is obj:
+                    node = nodes[slot]
+                    remaining = following
+                    hits[k] += 1
+                    break
+            for _, segment, slot in remaining:
+                node = _walk_path(node, segment)
+                if slot is not None:
+                    rows[slot] = obj
+                    nodes[slot] = node
+            values = []
+            if node is not _NOT_FOUND:
+                if tail is None:
+                    values.append(node)
+                else:
+                    tail(node, values.append)
+            return values
+        return select
@@ -0,0 +1,137 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import copy
+from .selector import Empty, Explorer, Field, List, ListElement
+
+def chain(selector: "Selector") -> list:
+    """Obtains the selectors of a chain, one by one (without the leading $, that does not move into the object)"""
+    selectors = []
+    while selector is not None:
+        if not isinstance(selector, Empty):
+            selectors.append(selector)
+        selector = selector._next
+    return selectors
+
+def is_path(selector: "Selector") -> bool:
+    """Returns True if the selector just moves into fixed keys and indexes (i.e. it selects a single value at most)"""
+    return all([ s._path_key() is not None for s in chain(selector) ])
+
+def keeps_rows(selector: "Selector") -> bool:
+    """Returns True if the rows obtained by a FROM selector are not altered by modifying their contents or by removing
+        some of them (i.e. the rest of the rows are still the same objects, and in the same order), so that the indexes
+        on them can be updated in place
+
+       (*) the recursive descents may find new rows in the modified values, and a fixed index or a slice with an end
+           would obtain the values that follow the removed ones
+    """
+    selectors = chain(selector)
+    if len(selectors) == 0 or any([ isinstance(s, Explorer) for s in selectors ]):
+        return False
+    last = selectors[-1]
+    return type(last) is Field or (type(last) is List and last._end is None)
+
+def assignment_path(selector: "Selector") -> list:
+    """Obtains the path of the target of an assignment (e.g. .a.b[0] in SET a.b[0] = 1)
+
+    Raises:
+        ValueError: if the target is not a path of fixed keys and indexes
+
+    Returns:
+        list: the (type, key) tuples (see Selector._path_key)
+    """
+    selectors = chain(selector)
+    if len(selectors) == 0 or not is_path(selector):
+        raise ValueError(f"Invalid target: {selector}")
+    return [ s._path_key() for s in selectors ]
+
+def can_assign(row, path: list) -> bool:
+    """Returns True if a value can be assigned to a path of a row: the keys that do not exist are created (as objects),
+        but the lists are not extended (i.e. the indexes must exist)"""
+    obj = row
+    for i, (container, key) in enumerate(path):
+        if not isinstance(obj, container):
+            return False
+        if container is list:
+            if key >= len(obj):
+                return False
+        elif key not in obj:
+            return all([ c is dict for c, _ in path[i + 1:] ])
+        obj = obj[key]
+    return True
+
+def assign(row, path: list, value) -> None:
+    """Assigns a value to a path of a row (see can_assign)"""
+    obj = row
+    for container, key in path[:-1]:
+        if container is dict and key not in obj:
+            obj[key] = {}
+        obj = obj[key]
+    obj[path[-1][1]] = value
+
+def detached(value):
+    """Obtains a copy of the lists and objects that are stored in the document, so that they are not shared with other
+        parts of the document (or with the caller)"""
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+def locations(selector: "Selector", jsondoc, ids: set = None) -> list:
+    """Obtains the location of each value that matches a selector: the list or object that contains it and its index or
+        key, in the same order than the values are selected
+
+    Args:
+        selector (Selector): the selector
+        jsondoc (Any): the document
+        ids (set, optional): the ids of the values to locate. Defaults to None (i.e. every value).
+
+    Raises:
+        Exception: if the last step of the selector does not move into a key, an index or a slice (e.g. $)
+
+    Returns:
+        list: the (container, key) tuples
+    """
+    selectors = chain(selector)
+    if len(selectors) == 0 or type(selectors[-1]) not in [ Field, ListElement, List ]:
+        raise Exception(f"Cannot locate the values of {selector}")
+    *prefix, last = selectors
+    # The containers are the values of the chain without its last step
+    step = None
+    for previous in reversed(prefix):
+        step = previous._compile_step(step)
+    containers = []
+    if step is None:
+        containers.append(jsondoc)
+    else:
+        step(jsondoc, containers.append)
+
+    result = []
+    for container in containers:
+        if type(last) is Field:
+            if isinstance(container, dict) and last._field in container:
+                result.append((container, last._field))
+        elif isinstance(container, list):
+            if type(last) is ListElement:
+                if last._index < len(container):
+                    result.append((container, last._index))
+            elif ids is None:
+                result.extend([ (container, i) for i in range(len(container))[last._start:last._end] ])
+            else:
+                # The values of the slice are checked as they are walked, without building a location for each of them
+                indexes = range(len(container))[last._start:last._end]
+                result.extend([ (container, i) for i, value in zip(indexes, container[last._start:last._end]) if id(value) in ids ])
+    if ids is not None:
+        result = [ (container, key) for container, key in result if id(container[key]) in ids ]
+    return result
@@ -0,0 +1,206 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import csv
+from .jsonbackend import get_backend
+
+class _Buffer:
+    """Accumulates the text written to a file, and writes it in chunks of (at least) a given size"""
+    def __init__(self, fp, size: int) -> None:
+        self._fp = fp
+        self._size = size
+        self._parts = []
+        self._length = 0
+
+    def write(self, s: str) -> None:
+        self._parts.append(s)
+        self._length += len(s)
+        if self._length >= self._size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._length > 0:
+            self._fp.write("".join(self._parts))
+            self._parts = []
+            self._length = 0
+        self._fp.flush()
+
+class Writer:
+    """Writer is the base class for the writers that output the rows of a result as they are produced, so that neither
+        the rows nor the whole output are kept in memory (the rows are encoded in batches of BATCH_SIZE rows, and the
+        output is written in chunks of buffer_size characters).
+
+       (*) the first row is written as soon as it is obtained, to start the output early when it is piped into other
+           tools
+    """
+    BATCH_SIZE = 256
+
+    def __init__(self, fp, indent: int = None, backend: "JSONBackend" = None, buffer_size: int = 1 << 16) -> None:
+        """Creates the writer
+
+        Args:
+            fp (file): the file-like object in which to write the output (in text mode)
+            indent (int, optional): the indentation of the JSON values (None or 0 for a compact output). Defaults to
+                None.
+            backend (JSONBackend, optional): the backend used to encode the JSON values. Defaults to None (i.e. the
+                default backend).
+            buffer_size (int, optional): the minimum amount of characters written at once. Defaults to 64k.
+        """
+        self._fp = fp
+        self._indent = indent or None
+        self._backend = backend if backend is not None else get_backend()
+        self._buffer_size = buffer_size
+
+    def write(self, rows) -> int:
+        """Writes the rows
+
+        Args:
+            rows (Iterable): the rows (e.g. a Result)
+
+        Returns:
+            int: the amount of rows written
+        """
+        buffer = _Buffer(self._fp, self._buffer_size)
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if count == 0 or len(batch) == self.BATCH_SIZE:
+                self._rows(buffer, batch, count)
+                count += len(batch)
+                batch = []
+                if count == 1:
+                    buffer.flush()
+        if len(batch) > 0:
+            self._rows(buffer, batch, count)
+            count += len(batch)
+        self._end(buffer, count)
+        buffer.flush()
+        return count
+
+    def _rows(self, buffer: "_Buffer", rows: list, n: int) -> None:
+        """Writes a batch of rows
+
+        Args:
+            buffer (_Buffer): the buffer of the output
+            rows (list): the rows
+            n (int): the amount of rows written before this batch
+        """
+        raise NotImplementedError()
+
+    def _end(self, buffer: "_Buffer", count: int) -> None:
+        pass
+
+class JSONWriter(Writer):
+    """Writes the rows as a JSON array (the same output than encoding the list of rows). Each batch of rows is encoded
+        as a list, and the contents of the lists are joined, so the output does not depend on the size of the batches.
+    """
+    def __init__(self, fp, indent: int = None, backend: "JSONBackend" = None, buffer_size: int = 1 << 16) -> None:
+        super().__init__(fp, indent, backend, buffer_size)
+        # The opening, the separator and the closing of the lists, as encoded by the backend
+        self._open, self._separator, self._close = self._backend.dumps([ 0, 0 ], indent=self._indent).split("0")
+
+    def _rows(self, buffer: "_Buffer", rows: list, n: int) -> None:
+        value = self._backend.dumps(rows, indent=self._indent)
+        buffer.write((self._open if n == 0 else self._separator) + value[len(self._open):len(value) - len(self._close)])
+
+    def _end(self, buffer: "_Buffer", count: int) -> None:
+        buffer.write((self._backend.dumps([]) if count == 0 else self._close) + "\n")
+
+class NDJSONWriter(Writer):
+    """Writes each row as a compact JSON value in a line (NDJSON / JSON Lines)
+
+       (*) the indentation is ignored, as each row must be in a single line
+    """
+    def _rows(self, buffer: "_Buffer", rows: list, n: int) -> None:
+        dumps = self._backend.dumps
+        buffer.write("".join([ dumps(row) + "\n" for row in rows ]))
+
+class CSVWriter(Writer):
+    """Writes flat rows as comma-separated values. If the rows are objects, the header contains the keys of the first
+        row, and the values of the rest of the rows are written in the same order (missing keys are written as empty
+        values); otherwise each row is written as a single value, without header.
+
+       (*) nulls are written as empty values, booleans as true and false, and objects and lists as compact JSON
+    """
+    DELIMITER = ","
+
+    def __init__(self, fp, indent: int = None, backend: "JSONBackend" = None, buffer_size: int = 1 << 16) -> None:
+        super().__init__(fp, indent, backend, buffer_size)
+        self._columns = None
+        self._writer = None
+
+    def _value(self, value) -> str:
+        if value is None:
+            return ""
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        if isinstance(value, (dict, list)):
+            return self._backend.dumps(value)
+        return value
+
+    def _rows(self, buffer: "_Buffer", rows: list, n: int) -> None:
+        if n == 0:
+            self._writer = csv.writer(buffer, delimiter=self.DELIMITER, lineterminator="\n")
+            self._columns = list(rows[0].keys()) if isinstance(rows[0], dict) else None
+            if self._columns is not None:
+                self._writer.writerow(self._columns)
+        for row in rows:
+            if self._columns is None:
+                if isinstance(row, dict):
+                    raise Exception("Cannot mix objects and values in a CSV output")
+                self._writer.writerow([ self._value(row) ])
+            else:
+                if not isinstance(row, dict):
+                    raise Exception("Cannot mix objects and values in a CSV output")
+                extra = [ key for key in row if key not in self._columns ]
+                if len(extra) > 0:
+                    raise Exception(f"The row contains columns that are not in the header: {', '.join(extra)}")
+                self._writer.writerow([ self._value(row.get(column)) for column in self._columns ])
+
+class TSVWriter(CSVWriter):
+    """Writes flat rows as tab-separated values (see CSVWriter)"""
+    DELIMITER = "\t"
+
+WRITERS = {
+    "json": JSONWriter,
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "tsv": TSVWriter
+}
+
+def write_rows(rows, fp, format: str = "json", indent: int = None, backend: "JSONBackend" = None, buffer_size: int = 1 << 16) -> int:
+    """Writes the rows of a result in a file, as they are produced
+
+    Args:
+        rows (Iterable): the rows (e.g. a Result)
+        fp (file): the file-like object in which to write the output (in text mode)
+        format (str, optional): the format of the output (one of WRITERS). Defaults to "json".
+        indent (int, optional): the indentation of the JSON values (None or 0 for a compact output). Defaults to None.
+        backend (JSONBackend, optional): the backend used to encode the JSON values. Defaults to None (i.e. the default
+            backend).
+        buffer_size (int, optional): the minimum amount of characters written at once. Defaults to 64k.
+
+    Raises:
+        ValueError: if the format is not valid
+
+    Returns:
+        int: the amount of rows written
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Invalid output format: {format}")
+    return WRITERS[format](fp, indent, backend, buffer_size).write(rows)
@@ -0,0 +1,231 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import heapq
+import multiprocessing
+import os
+from operator import itemgetter
+from threading import Lock
+from .result import Result
+from .parser.cache import get_plan_cache
+from .sort import entries, sort_entries
+from .aggregate import Grouping, is_aggregate
+from .projection import Projection
+from .jsonbackend import get_backend
+
+# The rows shared with the worker processes when they are forked (see query_parallel)
+_shared_rows = None
+_shared_rows_lock = Lock()
+
+# The amount of tasks per process in which the rows (or the lines) are partitioned, to balance the load
+TASKS_PER_JOB = 4
+
+def query_parallel(jsondb: "JSONDB", query_str: str, jobs: int) -> "Result":
+    """Executes a query using a pool of processes: the rows of the FROM clause (or the lines of the file, for NDJSON
+        files) are partitioned in chunks, the filter and the selection are evaluated for each chunk in the workers, and
+        the outputs are merged in the same order than if the query was executed in a single process (if the query has
+        an ORDER BY clause, each worker sorts its chunk, and the sorted chunks are merged; if it has aggregates, each
+        worker obtains the partial aggregates of its chunk, and they are merged).
+
+    Args:
+        jsondb (JSONDB): the database
+        query_str (str): the query
+        jobs (int): the amount of processes
+
+    Returns:
+        Result: a lazy result with the output of the query
+    """
+    query_params = jsondb.plan_cache.parse(query_str)
+    grouped = is_aggregate(query_params["select"]) or len(query_params["group_by"]) > 0
+    ordered = len(query_params["order_by"]) > 0 and not grouped
+    if grouped:
+        # Each worker obtains the partial aggregates for its rows, and they are merged in order
+        return Result.lazy(_grouped(query_params, _query_parallel(jsondb, query_str, query_params, jobs, False)))
+    return Result.lazy(_query_parallel(jsondb, query_str, query_params, jobs, ordered))
+
+def _grouped(query_params: dict, partials):
+    """Merges the partial aggregates obtained by the workers
+
+    Args:
+        query_params (dict): the parsed query
+        partials (Iterable): the state of the groups obtained by each worker, in order (see Grouping.groups)
+
+    Yields:
+        dict: the next output row
+    """
+    grouping = Grouping(query_params["select"], query_params["group_by"])
+    for groups in partials:
+        grouping.merge(groups)
+    yield from grouping.rows()
+
+def _query_parallel(jsondb: "JSONDB", query_str: str, query_params: dict, jobs: int, ordered: bool):
+    """Partitions the rows of the query in tasks, and runs them in a pool (see query_parallel)
+
+       (*) the pool is created when the first output is needed, and it is shut down once the outputs are consumed or
+           the generator is closed (e.g. the result is discarded before reaching its end)
+
+    Yields:
+        Any: the merged outputs of the tasks
+    """
+    from .stream import FileDB, NDJSONDB
+
+    fp = getattr(jsondb, "_fp", None)
+    path = getattr(fp, "name", None)
+    if isinstance(jsondb, NDJSONDB) and isinstance(path, str) and os.path.isfile(path) and jsondb._start == 0:
+        # The workers read their own part of the file, so nothing but the output is transferred between processes
+        tasks = [ (query_str, path, start, end) for start, end in _byte_ranges(path, jobs * TASKS_PER_JOB) ]
+        with multiprocessing.Pool(jobs) as pool:
+            yield from _merge(pool, _run_lines, tasks, ordered)
+        return
+
+    rows = jsondb.FROM(query_params["from"])
+    if not isinstance(jsondb, FileDB) and "fork" in multiprocessing.get_all_start_methods():
+        # The rows are already in memory, so they are shared with the workers when forking them, and the tasks only
+        #   contain the range of rows to process
+        global _shared_rows
+        rows = list(rows)
+        with _shared_rows_lock:
+            _shared_rows = rows
+            try:
+                pool = multiprocessing.get_context("fork").Pool(jobs)
+            finally:
+                _shared_rows = None
+        with pool:
+            size = _chunk_size(len(rows), jobs)
+            tasks = [ (query_str, start, start + size) for start in range(0, len(rows), size) ]
+            yield from _merge(pool, _run_shared_rows, tasks, ordered)
+        return
+
+    # Otherwise, the rows are sent to the workers in batches, as they are obtained
+    with multiprocessing.Pool(jobs) as pool:
+        yield from _merge(pool, _run_rows, _batches(query_str, rows, 1024), ordered)
+
+def _merge(pool, func, tasks, sorted: bool = False):
+    """Runs the tasks in a pool and generates their outputs in order
+
+    Args:
+        pool (multiprocessing.Pool): the pool
+        func (function): the function that runs a task and returns the list of output rows
+        tasks (Iterable): the tasks
+        sorted (bool, optional): the outputs of the tasks are sorted (key, values) entries, that must be merged by
+            their key (the ties are resolved in the order of the tasks). Defaults to False.
+
+    Yields:
+        Any: the next output row
+    """
+    if sorted:
+        for _, values in heapq.merge(*pool.map(func, tasks), key=itemgetter(0)):
+            yield from values
+    else:
+        for output in pool.imap(func, tasks):
+            yield from output
+
+def _chunk_size(count: int, jobs: int) -> int:
+    return max(1, -(-count // (jobs * TASKS_PER_JOB)))
+
+def _batches(query_str: str, rows, size: int):
+    """Groups the rows in batches to be sent to the workers
+
+    Yields:
+        tuple: the query and the next batch of rows
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield (query_str, batch)
+            batch = []
+    if len(batch) > 0:
+        yield (query_str, batch)
+
+def _byte_ranges(path: str, count: int) -> list:
+    """Splits a file in (approximately) equal ranges of bytes
+
+    Args:
+        path (str): the path of the file
+        count (int): the amount of ranges
+
+    Returns:
+        list: the (start, end) tuples; the lines that start in a range belong to that range
+    """
+    size = os.path.getsize(path)
+    step = max(1, -(-size // count))
+    return [ (start, min(start + step, size)) for start in range(0, size, step) ]
+
+def _execute(query_str: str, rows) -> list:
+    """Evaluates the filter and the selection of a query over a set of rows
+
+    Args:
+        query_str (str): the query
+        rows (Iterable): the rows obtained from the FROM clause
+
+    Returns:
+        list: the output rows or, if the query has an ORDER BY clause, the sorted (key, values) entries (see
+            sort_entries) or, if the query has aggregates, the state of the groups (see Grouping.groups)
+    """
+    query_params = get_plan_cache().parse(query_str)
+    result = Result.lazy(rows).filter(query_params["where"])
+    if is_aggregate(query_params["select"]) or len(query_params["group_by"]) > 0:
+        return [ Grouping(query_params["select"], query_params["group_by"]).add(result).groups ]
+    # No task needs to produce more rows than the end of the range (the range is obtained from the merged output)
+    end = None if query_params["limit"] is None else query_params["offset"] + query_params["limit"]
+    if len(query_params["order_by"]) > 0:
+        select = Projection(Result._selectors(query_params["select"])).rows
+        return list(sort_entries(entries(result, query_params["order_by"], select), end))
+    result = result.select(query_params["select"])
+    if end is not None:
+        result = result.limit(end)
+    return list(result)
+
+def _run_rows(task) -> list:
+    query_str, rows = task
+    return _execute(query_str, rows)
+
+def _run_shared_rows(task) -> list:
+    query_str, start, end = task
+    return _execute(query_str, _shared_rows[start:end])
+
+def _run_lines(task) -> list:
+    query_str, path, start, end = task
+    selector = get_plan_cache().parse(query_str)["from"]
+    if isinstance(selector, str):
+        selector = get_plan_cache().parse_selection(selector)
+    return _execute(query_str, _iterate_lines(path, start, end, selector))
+
+def _iterate_lines(path: str, start: int, end: int, selector: "Selector"):
+    """Generates the values that match the selector in the lines that start in a range of bytes of a NDJSON file
+
+    Args:
+        path (str): the path of the file
+        start (int): the first byte of the range
+        end (int): the end of the range (not included)
+        selector (Selector): the selector of the FROM clause
+
+    Yields:
+        Any: the next value
+    """
+    loads = get_backend().loads
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the line that started in the previous range
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if len(line) == 0:
+                break
+            if line.isspace():
+                continue
+            yield from selector.iterate(loads(line))
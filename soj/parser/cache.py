@@ -0,0 +1,137 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from collections import OrderedDict
+from threading import Lock
+from .parser import Parser
+
+class PlanCache:
+    """PlanCache is a bounded LRU cache of parsed query plans (i.e. the Selector and Filter trees obtained from the
+        Parser), keyed by the text of the query. It offers the same parse_* methods than the Parser, so that it can be
+        used as a drop-in replacement whenever the same query texts are parsed over and over again.
+
+       (*) the plans are shared between the callers, so they must not be modified once obtained from the cache
+    """
+    def __init__(self, maxsize: int = 256) -> None:
+        """Creates the cache
+
+        Args:
+            maxsize (int, optional): the maximum amount of plans kept in the cache. Defaults to 256.
+        """
+        if maxsize < 1:
+            raise ValueError(f"Invalid cache size: {maxsize}")
+        self._maxsize = maxsize
+        self._plans = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __str__(self) -> str:
+        return f"{len(self)}/{self._maxsize} plans ({self._hits} hits, {self._misses} misses, {self._evictions} evictions)"
+
+    @property
+    def stats(self) -> dict:
+        """Obtains the counters of the cache
+
+        Returns:
+            dict: the hits, misses and evictions since the cache was created (or cleared), along with its size
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "size": len(self._plans),
+            "maxsize": self._maxsize
+        }
+
+    def clear(self) -> None:
+        """Removes every plan from the cache and resets the counters"""
+        with self._lock:
+            self._plans.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def _get(self, method: str, s: str):
+        """Gets the plan for a string, using the method of the parser, either from the cache or by parsing it
+
+        Args:
+            method (str): the name of the method of the Parser used to parse the string (e.g. "parse_selection")
+            s (str): the string to parse
+
+        Raises:
+            Exception: if the string is malformed (the errors are not cached)
+
+        Returns:
+            Any: the plan returned by the method of the parser
+        """
+        key = (method, s)
+        with self._lock:
+            if key in self._plans:
+                self._hits += 1
+                self._plans.move_to_end(key)
+                return self._plans[key]
+            self._misses += 1
+
+        # The parsing happens out of the lock, to avoid blocking the other callers; if two of them parse the same
+        #   string at the same time, the last one wins (both plans are equivalent)
+        plan = getattr(Parser(), method)(s)
+
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self._maxsize:
+                self._plans.popitem(last=False)
+                self._evictions += 1
+        return plan
+
+    def parse(self, s: str) -> dict:
+        """Obtains the plan of a full query: SELECT * FROM <selector> WHERE <selector> = <value>
+            (*) see Parser.parse for more information
+        """
+        return self._get("parse", s)
+
+    def parse_selectors(self, s: str) -> list:
+        """Obtains the list of selectors in a string: .field1, .field2[]
+            (*) see Parser.parse_selectors for more information
+        """
+        return self._get("parse_selectors", s)
+
+    def parse_selection(self, s: str) -> "Selector":
+        """Obtains the selector chain in a string: .field1.field2[].field3[1:2]...
+            (*) see Parser.parse_selection for more information
+        """
+        return self._get("parse_selection", s)
+
+    def parse_order_by(self, s: str) -> list:
+        """Obtains the sort keys of an ORDER BY clause: .field1 DESC, .field2
+            (*) see Parser.parse_order_by for more information
+        """
+        return self._get("parse_order_by", s)
+
+    def parse_comparison(self, s: str) -> "Filter":
+        """Obtains the comparison in a string: .field1.field2[].field3[1:2] == 5
+            (*) see Parser.parse_comparison for more information
+        """
+        return self._get("parse_comparison", s)
+
+_global_plan_cache = PlanCache()
+
+def get_plan_cache() -> PlanCache:
+    return _global_plan_cache
@@ -13,15 +13,18 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 #
+import re
+import threading
 from uuid import uuid4
 from .token import Token
 from ..selector import Empty, Constant, Field, List, ListElement, Explorer
-from ..filter import Filter, FilterCompare, FilterKeyExists
+from ..aggregate import Aggregate
+from ..filter import Filter, FilterCompare, FilterKeyExists, FilterAnd, FilterOr, FilterNot
 
 class Parser:
     def __init__(self) -> None:
+        # The character right after the current token (None at the end of the buffer), and its position
         self._c = None
-        self._n = None
         self._pos = None
         self._buffer = None
         self._token = Token()
@@ -70,7 +73,12 @@ class Parser:
         return self._eat_spaces[-1]
         
     def parse(self, s: str) -> None:
-        """Parses a full string: SELECT * FROM <selector> WHERE <selector> = <value>
+        """Parses a full string: SELECT * FROM <selector> WHERE <selector> = <value> GROUP BY <selector>, ...
+            ORDER BY <selector> [ASC|DESC], ... LIMIT <count> OFFSET <count>
+
+           The items of the SELECT clause can also be aggregate functions: count(*), count(<selector>),
+             count(distinct <selector>), approx_count_distinct(<selector>), sum(<selector>), avg(<selector>),
+             min(<selector>) and max(<selector>)
 
         Args:
             s (str): the string to parse
@@ -78,7 +86,11 @@ class Parser:
         retval = {
             "select": "$",
             "from": "$",
-            "where": "$"
+            "where": "$",
+            "group_by": [],
+            "order_by": [],
+            "limit": None,
+            "offset": 0
         }
         self._prepare_parsing(s)
         if self.token == Token.T_IDENTIFIER and self.token.data.lower() == "select":
@@ -89,7 +101,25 @@ class Parser:
                 retval["from"] = self._parse_selector()
             if self.token == Token.T_IDENTIFIER and self.token.data.lower() == "where":
                 self.next_token()
-                retval["where"] = self._parse_comparison()
+                retval["where"] = self._parse_condition()
+            if self._is_identifier("group"):
+                self.next_token()
+                if not self._is_identifier("by"):
+                    raise Exception(f"BY expected: {self.token}")
+                self.next_token()
+                retval["group_by"] = self._parse_selectors(False)
+            if self._is_identifier("order"):
+                self.next_token()
+                if not self._is_identifier("by"):
+                    raise Exception(f"BY expected: {self.token}")
+                self.next_token()
+                retval["order_by"] = self._parse_order_by()
+            if self._is_identifier("limit"):
+                self.next_token()
+                retval["limit"] = self._parse_count()
+            if self._is_identifier("offset"):
+                self.next_token()
+                retval["offset"] = self._parse_count()
         if self.token != Token.T_EOF:
             raise Exception(f"Unexpected token: {self.token}")
         return retval
@@ -119,8 +149,27 @@ class Parser:
             raise Exception(f"Unexpected token: {self.token}")
         return s
 
+    def parse_order_by(self, s:str) -> list:
+        """Parses the list of sort keys of an ORDER BY clause: .field1 DESC, .field2[0] ASC, .field3
+
+        Args:
+            s (str): the string to parse
+
+        Raises:
+            Exception: if the string is malformed
+
+        Returns:
+            list: the (Selector, descending) tuples
+        """
+        self._prepare_parsing(s)
+        s = self._parse_order_by()
+        if self._token != Token.T_EOF:
+            raise Exception(f"Unexpected token: {self.token}")
+        return s
+
     def parse_comparison(self, s:str) -> "Token":
-        """Parses a "comparison" string: .field1.field2[].field3[1:2] == 5
+        """Parses a "comparison" string: .field1.field2[].field3[1:2] == 5 (or a boolean condition made of comparisons,
+            e.g. (a == 1 or b > 2) and not c like 'x%')
 
         Args:
             s (str): the string to parse
@@ -132,11 +181,74 @@ class Parser:
             Token: the comparison object
         """
         self._prepare_parsing(s)
-        s = self._parse_comparison()
+        s = self._parse_condition()
         if self._token != Token.T_EOF:
             raise Exception(f"Unexpected token: {self.token}")
         return s
 
+    def parse_mutation(self, s: str) -> dict:
+        """Parses a statement that modifies the document:
+            - UPDATE <selector> SET <selector> = <value>, ... WHERE <comparison>
+            - DELETE FROM <selector> WHERE <comparison>
+            - INSERT INTO <selector> VALUES <json>, ...
+
+           The WHERE clause is optional. The values of the SET clause are constants (including true, false, null and
+             lists of constants) or selectors evaluated on each row. The values of the INSERT statement are JSON
+             documents, that are kept as text (to be decoded by the JSON backend of the database).
+
+        Args:
+            s (str): the string to parse
+
+        Raises:
+            Exception: if the string is malformed
+
+        Returns:
+            dict: the kind of statement ("update", "delete" or "insert") and its clauses
+        """
+        self._prepare_parsing(s)
+        if self._is_identifier("update"):
+            self.next_token()
+            retval = { "statement": "update", "from": self._parse_selector(), "set": [], "where": None }
+            if not self._is_identifier("set"):
+                raise Exception(f"SET expected: {self.token}")
+            self.next_token()
+            while True:
+                target = self._parse_selector()
+                if self.token != Token.T_OPERATOR or self.token.data != "=":
+                    raise Exception(f"= expected: {self.token}")
+                self.next_token()
+                retval["set"].append((target, self._parse_value()))
+                if self.token != Token.T_COMMA:
+                    break
+                self.next_token()
+        elif self._is_identifier("delete"):
+            self.next_token()
+            if not self._is_identifier("from"):
+                raise Exception(f"FROM expected: {self.token}")
+            self.next_token()
+            retval = { "statement": "delete", "from": self._parse_selector(), "where": None }
+        elif self._is_identifier("insert"):
+            self.next_token()
+            if not self._is_identifier("into"):
+                raise Exception(f"INTO expected: {self.token}")
+            self.next_token()
+            retval = { "statement": "insert", "into": self._parse_selector() }
+            if not self._is_identifier("values"):
+                raise Exception(f"VALUES expected: {self.token}")
+            # The rest of the buffer (after VALUES) is made of JSON documents, which are not tokens of the language
+            retval["values"] = self._buffer[self._pos:].strip()
+            if retval["values"] == "":
+                raise Exception("Values expected")
+            return retval
+        else:
+            raise Exception(f"UPDATE, DELETE or INSERT expected: {self.token}")
+        if self._is_identifier("where"):
+            self.next_token()
+            retval["where"] = self._parse_condition()
+        if self.token != Token.T_EOF:
+            raise Exception(f"Unexpected token: {self.token}")
+        return retval
+
     def _prepare_parsing(self, s:str) -> None:
         """Prepares the parser for parsing a string
 
@@ -145,9 +257,9 @@ class Parser:
         """
         self._buffer = s
         self._pos = 0
-        self._n = self._buffer[0]
         self._c = None
-        self._next_c()
+        # A previous parsing may have failed before recovering the state of eating spaces
+        self._eat_spaces = []
         self.next_token()
 
     def _is_keyword(self, token: "Token") -> bool:
@@ -160,33 +272,163 @@ class Parser:
             bool: True if the token is a keyword
         """
         if token == Token.T_IDENTIFIER:
-            if token.data in ["true", "false", "null"]:
+            if token.data.lower() in ["true", "false", "null", "and", "or", "not"]:
                 return True
         return False
 
+    def _is_identifier(self, *names) -> bool:
+        """Returns true if the current token is an identifier with any of the names (case insensitive)"""
+        return self.token == Token.T_IDENTIFIER and self.token.data.lower() in names
+
+    def _parse_condition(self):
+        """Parses a boolean condition: <comparison> [AND|OR <comparison>]..., where each comparison may be negated
+            (NOT <comparison>) or be a condition in parentheses. AND has precedence over OR.
+
+        Returns:
+            Filter: the filter that evaluates the condition
+        """
+        filters = [ self._parse_conjunction() ]
+        while self._is_identifier("or"):
+            self.next_token()
+            filters.append(self._parse_conjunction())
+        if len(filters) == 1:
+            return filters[0]
+        return FilterOr(*filters)
+
+    def _parse_conjunction(self):
+        filters = [ self._parse_negation() ]
+        while self._is_identifier("and"):
+            self.next_token()
+            filters.append(self._parse_negation())
+        if len(filters) == 1:
+            return filters[0]
+        return FilterAnd(*filters)
+
+    def _parse_negation(self):
+        if self._is_identifier("not"):
+            self.next_token()
+            return FilterNot(self._parse_negation())
+        if self.token == Token.T_PAR_OPEN:
+            self.next_token()
+            filter = self._parse_condition()
+            if self.token != Token.T_PAR_CLOSE:
+                raise Exception(f"Closing parenthesis expected: {self.token}")
+            self.next_token()
+            return filter
+        return self._parse_comparison()
+
     def _parse_comparison(self):
         selector = self._parse_selector()
         if self.token == Token.T_OPERATOR:
             op = self.token.data
             self.next_token()
+            if op == "=":
+                raise Exception(f"Invalid operator: {op}")
             selector2 = self._parse_selector()
             return FilterCompare(selector, op, selector2)
-        elif self.token == Token.T_IDENTIFIER and self.token.data.lower() in ["in", "like"]:
+        elif self._is_identifier("in", "like", "ilike", "regexp"):
             op = self.token.data.lower()
             self.next_token()
-            selector2 = self._parse_selector()
+            if op == "in" and self.token == Token.T_PAR_OPEN:
+                selector2 = self._parse_constant_list()
+            else:
+                selector2 = self._parse_selector()
             return FilterCompare(selector, op, selector2)
         else:
             return FilterKeyExists(selector)
 
-    def _parse_selectors(self):
-        s = self._parse_selector()
+    def _parse_order_by(self) -> list:
+        order = []
+        while True:
+            selector = self._parse_select_item()
+            descending = False
+            if self._is_identifier("asc", "desc"):
+                descending = self.token.data.lower() == "desc"
+                self.next_token()
+            order.append((selector, descending))
+            if self.token != Token.T_COMMA:
+                return order
+            self.next_token()
+
+    def _parse_count(self) -> int:
+        """Parses a non-negative integer (e.g. the count of a LIMIT clause)
+
+        Returns:
+            int: the value
+        """
+        if self.token != Token.T_INTEGER or self.token.data < 0:
+            raise Exception(f"Non-negative integer expected: {self.token}")
+        value = self.token.data
+        self.next_token()
+        return value
+
+    def _parse_constant_list(self):
+        """Parses a list of constants: (<constant>, <constant>, ...)
+
+        Returns:
+            Constant: the constant that holds the list of values
+        """
+        if self.token != Token.T_PAR_OPEN:
+            raise Exception("Opening parenthesis expected")
+        self.next_token()
+        values = []
+        while self.token != Token.T_PAR_CLOSE:
+            if self.token not in [ Token.T_STRING, Token.T_INTEGER, Token.T_FLOAT ]:
+                raise Exception(f"Constant expected: {self.token}")
+            values.append(self.token.data)
+            self.next_token()
+            if self.token == Token.T_COMMA:
+                self.next_token()
+            elif self.token != Token.T_PAR_CLOSE:
+                raise Exception(f"Comma or closing parenthesis expected: {self.token}")
+        self.next_token()
+        return Constant(values)
+
+    def _parse_value(self):
+        """Parses the value of an assignment: a constant (true, false, null, a string, a number or a list of constants)
+            or a selector
+
+        Returns:
+            Selector: the selector (a Constant for the constants)
+        """
+        if self._is_identifier("true", "false", "null"):
+            value = { "true": True, "false": False, "null": None }[self.token.data.lower()]
+            self.next_token()
+            return Constant(value)
+        if self.token == Token.T_PAR_OPEN:
+            return self._parse_constant_list()
+        return self._parse_selector()
+
+    def _parse_selectors(self, aggregates: bool = True):
+        s = self._parse_select_item() if aggregates else self._parse_selector()
         selectors = [ s ]
         if self.token == Token.T_COMMA:
             self.next_token()
-            selectors = selectors + self._parse_selectors()
+            selectors = selectors + self._parse_selectors(aggregates)
         return selectors
 
+    def _parse_select_item(self):
+        """Parses an item of the SELECT clause: either a selector or an aggregate function (e.g. count(distinct a.b))
+
+        Returns:
+            Selector | Aggregate: the item
+        """
+        # The name of the function must be immediately followed by the parenthesis (otherwise it is a field)
+        if not (self._is_identifier(*Aggregate.FUNCTIONS) and self._c == "("):
+            return self._parse_selector()
+        function = self.token.data
+        self.next_token()
+        self.next_token()
+        distinct = False
+        if self._is_identifier("distinct"):
+            distinct = True
+            self.next_token()
+        selector = self._parse_selector()
+        if self.token != Token.T_PAR_CLOSE:
+            raise Exception(f"Closing parenthesis expected: {self.token}")
+        self.next_token()
+        return Aggregate(function, selector, distinct)
+
     def _parse_selector(self):
         # We won't let the parser eat spaces, because we do not want to allow spaces in the selector (i.e. "field1.field2[]" is
         # valid, but "field1 . field2[]" is not)
@@ -287,6 +529,7 @@ class Parser:
         self.next_token()
         if self.token == Token.T_STRING:
             s = Field(self.token.data) # s = f"[{self.token.data}]"
+            self.next_token()
         elif self.token in [Token.T_INTEGER, Token.T_RANGE_SEPARATOR, Token.T_SQ_CLOSE]:
             s = self._parse_range_slice()
         else:
@@ -301,18 +544,9 @@ class Parser:
         self.pop_eat_spaces()
         return s
 
-    def _next_c(self) -> None:
-        """Gets the next character from the buffer"""
-        self._pos += 1
-        self._c = self._n
-        if self._pos < len(self._buffer):
-            self._n = self._buffer[self._pos]
-        else:
-            self._n = None
-
     def __str__(self):
         """Returns a string representation of the parser"""
-        return f"at pos {self._pos} (\"{self._c}\")"
+        return f"at pos {self._pos + 1} (\"{self._c}\")"
 
     @property
     def token(self) -> "Token":
@@ -323,232 +557,148 @@ class Parser:
         """
         return self._token
 
+    def tokenize(self, s: str) -> list:
+        """Obtains the tokens of a string (skipping the spaces), without parsing it
+
+        Args:
+            s (str): the string
+
+        Returns:
+            list: the tokens, up to (and including) the T_EOF token
+        """
+        self._prepare_parsing(s)
+        tokens = [ self._token ]
+        while self._token != Token.T_EOF:
+            tokens.append(self.next_token())
+        return tokens
+
     def next_token(self) -> "Token":
-        """Gets to the next token in the buffer.
+        """Gets to the next token in the buffer. The token is the longest match of _TOKENS at the current position (the
+            alternatives do not overlap, so there is a single match).
+
+        Raises:
+            Exception: if there is no valid token at the current position
 
         Returns:
             Token: The next token to parse (it is the same than self.token)
         """
+        buffer = self._buffer
+        pos = self._pos
+
+        # Skip spaces (if enabled, see eat_spaces)
+        if len(self._eat_spaces) == 0 or self._eat_spaces[-1]:
+            pos = _SPACES.match(buffer, pos).end()
 
         # If no character is available, we are at the end of the buffer
-        if self._c is None:
+        if pos >= len(buffer):
+            self._pos = pos
+            self._c = None
             self._token = Token(Token.T_EOF)
             return self._token
 
-        # Skip spaces (if enabled)
-        self._skip_whitespaces()
-
-        token = Token()
-        beginning = self._pos
-
-        # First we check the "single char tokens"
-        if self._c == "$":
-            token = Token(Token.T_ROOT)
-        if self._c == "*":
-            token = Token(Token.T_ROOT)
-        elif self._c == "[":
-            token = Token(Token.T_SQ_OPEN)
-        elif self._c == "]":
-            token = Token(Token.T_SQ_CLOSE)
-        elif self._c == ",":
-            token = Token(Token.T_COMMA)
-        elif self._c == ".":
-            if self._n == ".":
-                self._next_c()
-                token = Token(Token.T_DOT_DOT)
-            else:
-                token = Token(Token.T_DOT)
-        elif self._c == ":":
-            token = Token(Token.T_RANGE_SEPARATOR)
-
-        if token != Token.T_NOTOKEN:
-            # Skip the character of the single-char token
-            self._next_c()
+        match = _TOKENS.match(buffer, pos)
+        if match is None:
+            self._invalid_token(pos)
+        kind = match.lastgroup
+        end = match.end()
+        if kind == "symbol":
+            token = Token(_SYMBOLS[match.group()])
+        elif kind == "identifier":
+            token = Token(Token.T_IDENTIFIER, match.group())
+        elif kind == "space":
+            token = Token(Token.T_SEPARATOR, match.group())
+        elif kind == "number":
+            token = self._token_number(match.group(), buffer[end:end + 1])
+        elif kind == "string":
+            # The escaped characters are kept as they are (i.e. along with the backslash)
+            token = Token(Token.T_STRING, buffer[pos + 1:end - 1])
         else:
-            # Now we check the "multi char tokens", starting from the space (that will appear as a token if eating spaces
-            #   is not enabled)
-            if self._c in [ ">", "<", "=", "!" ]:
-                token = self._token_operator()
-
-            if token == Token.T_NOTOKEN:
-                if self._c.isspace():
-                    s = ""
-                    while self._c is not None and self._c.isspace():
-                        s += self._c
-                        self._next_c()
-                    token = Token(Token.T_SEPARATOR, s)
-                elif self._c == "'":
-                    token = self._token_quoted_string()
-                elif self._c.isdigit():
-                    token = self._token_number()
-                elif self._c.isalpha() or self._c == "_":
-                    token = self._token_identifier()
-
-        # If we have not recognized the token, we will raise an exception
-        if token == Token.T_NOTOKEN:
-            raise Exception(f"Invalid character: {self._c}")
-
-        # Store the token and return
-        token.position = beginning
+            token = Token(Token.T_OPERATOR, match.group())
+
+        # Store the token (the position is 1-based) and move after it
+        token.position = pos + 1
         self._token = token
+        self._pos = end
+        self._c = buffer[end] if end < len(buffer) else None
         return token
 
-    def _skip_whitespaces(self):
-        """Skips the whitespaces in the buffer, if enabled
-            (*) see self.eat_spaces for more information
-        """
-        if self.eat_spaces:
-            while self._c is not None and self._c.isspace():
-                self._next_c()
-
-    def _token_operator(self) -> "Token":
-        if not self._c in [ ">", "<", "=", "!" ]:
-            raise Exception(f"Invalid operator: {self._c}")
-
-        s = self._c
-        self._next_c()
-
-        if s == "!":
-            if self._c == "=":
-                s += self._c
-                self._next_c()
-            else:
-                raise Exception(f"Invalid operator: {s}")
-        elif s == "=":
-            if self._c == "=":
-                s += self._c
-                self._next_c()
-            else:
-                raise Exception(f"Invalid operator: {s}")
-        elif s in [ "<", ">" ]:
-            if self._c == "=":
-                s += self._c
-                self._next_c()
-
-        return Token(Token.T_OPERATOR, s)
-
-    def _token_identifier(self) -> "Token":
-        """Parses the identifier token
+    def _invalid_token(self, pos: int) -> None:
+        """Raises the exception for a position of the buffer in which there is no valid token
 
         Raises:
-            Exception: If the identifier is not valid 
-                (*) this should not happen because it is a private method, and we'll call the function if appropriate
-                
-        Returns:
-            Token: the token that was parsed
+            Exception: the reason why the token is not valid
         """
-
-        # Make sure that the first character is a letter
-        if not self._c.isalpha():
+        c = self._buffer[pos]
+        if c == "'":
+            raise Exception("Closing quote expected")
+        if c == "!":
+            raise Exception(f"Invalid operator: {c}")
+        if c == "_":
             raise Exception("Invalid identifier")
+        raise Exception(f"Invalid character: {c}")
 
-        # Store the identifier
-        s = ""
-        while self._c is not None and (self._c.isalpha() or self._c.isdigit() or self._c == '_'):
-            s += self._c
-            self._next_c()
-
-        # Return the identifier
-        return Token(Token.T_IDENTIFIER, s)
-
-    def _token_quoted_string(self) -> "Token":
-        """Parses the quoted string token. If the string starts with ", it is expected to end with ". If it starts with
-            ' it is expected to end with '. The string accepts escaped characters.
-
-        Raises:
-            Exception: If there was no string to parse
-
-        Returns:
-            Token: the token that was parsed
-        """
-
-        # Make sure that the first character is a quote
-        if self._c not in [ "'", '"']:
-            raise Exception("Quote expected")
+    def _token_number(self, s: str, following: str) -> "Token":
+        """Obtains the number token. It can be an integer or a float point number in the format 1.1e+5
 
-        # Get the quote, but do not store it
-        quote = self._c
-        self._next_c()
-
-        # Get the content of the string
-        s = ""
-        while self._c is not None and self._c != quote:
-            s += self._c
-
-            # Skip escaped chars
-            if self._c == "\\":
-                self._next_c()
-                s += self._c
-            self._next_c()
-        
-        # Make sure that the string ends with the same quote
-        if self._c != quote:
-            raise Exception("Closing quote expected")
-        
-        # Skip the closing quote and return
-        self._next_c()
-        return Token(Token.T_STRING, s)
-
-    def _token_number(self) -> "Token":
-        """Parses the number token. It can be an integer or a float point number in the format 1.1e+5
+        Args:
+            s (str): the number
+            following (str): the character after the number ("" at the end of the buffer)
 
         Raises:
-            Exception: If some of the mandatory parts of the number are missing
+            Exception: If some of the mandatory parts of the number are missing (i.e. the digits after the dot, e.g. 1.e+5,
+                or after the exponent, e.g. 1.1e+)
 
         Returns:
-            Token: the token that was parsed (either T_INTEGER or T_FLOAT)
+            Token: the token (either T_INTEGER or T_FLOAT)
         """
-
-        # Make sure that the first character is a digit
-        if not self._c.isdigit():
-            raise Exception("Number expected")
-
-        # Store the number while it is a number
-        s = ""
-        while self._c is not None and self._c.isdigit():
-            s += self._c
-            self._next_c()
-        
-        # If there is no dot, we have an integer
-        if self._c != ".":
+        if "." not in s:
+            if following == ".":
+                raise Exception("Number expected")
             return Token(Token.T_INTEGER, int(s))
-
-        # Otherwise, we have a float point number... so continue parsing
-        s += self._c
-        self._next_c()
-
-        # Make sure that the next character is a digit to avoid accepting numbers like 1.e+5
-        if not self._c.isdigit():
+        # An exponent without digits is not matched (e.g. 1.5e+), but a letter after a whole exponent is a new token
+        if following != "" and following in "eE" and "e" not in s.lower():
             raise Exception("Number expected")
-
-        # Store the right part of the number, while it is a digit
-        while self._c is not None and self._c.isdigit():
-            s += self._c
-            self._next_c()
-        
-        # If we have an exponent, store it
-        if self._c in ["e", "E"]:
-            s += self._c
-            self._next_c()
-
-            # Store the sign of the exponent (if provided)
-            if self._c in ["+", "-"]:
-                s += self._c
-                self._next_c()
-
-            # Make sure that there is a digit after the exponent, to avoid accepting numbers like 1e+
-            if not self._c.isdigit():
-                raise Exception("Number expected")
-
-            # Store the exponent, while it is a digit
-            while self._c is not None and self._c.isdigit():
-                s += self._c
-                self._next_c()
-            
-        # Return the floating number token
         return Token(Token.T_FLOAT, float(s))
 
-_global_parser = Parser()
+# The tokens that are made of a fixed string
+_SYMBOLS = {
+    "$": Token.T_ROOT,
+    "*": Token.T_ROOT,
+    "[": Token.T_SQ_OPEN,
+    "]": Token.T_SQ_CLOSE,
+    ",": Token.T_COMMA,
+    "(": Token.T_PAR_OPEN,
+    ")": Token.T_PAR_CLOSE,
+    "..": Token.T_DOT_DOT,
+    ".": Token.T_DOT,
+    ":": Token.T_RANGE_SEPARATOR
+}
+
+_SPACES = re.compile(r"\s*")
+
+# The tokens of the language: the spaces (that appear as a token if eating spaces is not enabled), the fixed strings, the
+#   identifiers (starting with a letter), the numbers (the exponent is only accepted after the decimal part), the strings
+#   enclosed in single quotes (that may contain escaped characters) and the operators (the comparison operators, and the
+#   assignment of the SET clause)
+_TOKENS = re.compile(r"""
+      (?P<space>\s+)
+    | (?P<symbol>\.\.|[$*\[\],().:])
+    | (?P<identifier>[^\W\d_]\w*)
+    | (?P<number>\d+(?:\.\d+(?:[eE][+-]?\d+)?)?)
+    | (?P<string>'(?:[^'\\]|\\.)*')
+    | (?P<operator>[<>]=?|==|!=|=)
+""", re.VERBOSE | re.DOTALL)
+
+# The parsers keep the state of the parsing, so each thread has its own parser
+_local = threading.local()
 
 def get_parser() -> Parser:
-    return _global_parser
\ No newline at end of file
+    """Obtains the parser of the current thread
+
+    Returns:
+        Parser: the parser
+    """
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = Parser()
+    return parser
\ No newline at end of file
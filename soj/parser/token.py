@@ -14,6 +14,9 @@
 #    limitations under the License.
 #
 class Token:
+    # The parser creates a token for each piece of the query, so they are kept small
+    __slots__ = ("_token", "_data", "position")
+
     T_NOTOKEN = "No token"
     T_IDENTIFIER = "Identifier"
     T_IDENTIFIER_SPECIAL = "Special identifier"
@@ -30,6 +33,8 @@ class Token:
     T_EOF = "EOF"
     T_OPERATOR = "Operator"
     T_COMMA = ","
+    T_PAR_OPEN = "("
+    T_PAR_CLOSE = ")"
 
     def __init__(self, token: str = T_NOTOKEN, data = None):
         """Creates the object
@@ -80,6 +85,8 @@ class Token:
         Returns:
             bool: True if the objects are not equal
         """
+        if other.__class__ is str:
+            return self._token != other
         return not self.__eq__(other)
     def __eq__(self, other):
         """Returns true if the objects are equal.
@@ -92,6 +99,8 @@ class Token:
         Returns:
             bool: True if the objects are equal
         """
+        if other.__class__ is str:
+            return self._token == other
         if isinstance(other, Token):
             return self._token == other.token and self._data == other.data
         return self._token == other
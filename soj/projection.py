@@ -0,0 +1,161 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from .aggregate import _value
+from .selector import List
+
+class Projection:
+    """Projection builds the output rows of the SELECT clause from the elements of a result, without copying the values
+        obtained by the selectors (i.e. the output rows share them with the document, so they must not be modified):
+
+       - with a single selector, each value that it obtains from an element is an output row.
+       - with several selectors, each element produces a single row: an object with the value of each selector, keyed
+         by its label (the same rows than the ones produced by a GROUP BY); the elements from which no selector obtains
+         anything are skipped.
+
+       (*) if the selectors share prefixes (e.g. a.b in a.b.c, a.b.d and a.b[0].e), they are evaluated together,
+           walking each element once (see _Trie), so that the shared prefixes are only walked once; the trie is only
+           used if it saves (at least) one step per selector, as walking it is more expensive than the compiled
+           selectors; otherwise, the selectors are compiled using the memo, if any
+    """
+    def __init__(self, selectors: list, memo: "RowMemo" = None) -> None:
+        """Creates the projection
+
+        Args:
+            selectors (list): the selectors of the SELECT clause
+            memo (RowMemo, optional): the memo shared with the other clauses evaluated on the same elements (e.g. the
+                WHERE clause). Defaults to None.
+        """
+        self._compiled = [ s.compile() for s in selectors ]
+        self._labels = [ s.label() for s in selectors ]
+        self._walk = None
+        if len(selectors) > 1:
+            trie = _Trie()
+            steps = sum([ trie.add(i, selector) for i, selector in enumerate(selectors) ])
+            if steps - trie.size() >= len(selectors):
+                self._walk = trie.compile(None if memo is None else memo.compile_chain)
+        if self._walk is None and memo is not None:
+            self._compiled = [ memo.compile(s) for s in selectors ]
+
+    @property
+    def labels(self) -> list:
+        """The labels of the values of the output rows (if there are several selectors)"""
+        return self._labels
+
+    def rows(self, element) -> list:
+        """Obtains the output rows for an element
+
+        Args:
+            element (Any): the element
+
+        Returns:
+            list: the output rows (empty if nothing was selected)
+        """
+        if len(self._compiled) == 1:
+            return self._compiled[0](element)
+        if self._walk is None:
+            values = [ select(element) for select in self._compiled ]
+        else:
+            values = [ [] for _ in self._labels ]
+            self._walk(element, values)
+        if not any(values):
+            return []
+        return [ { label: _value(v) for label, v in zip(self._labels, values) } ]
+
+class _Trie:
+    """_Trie is a prefix tree of the steps of a set of selectors that move into fixed keys, fixed indexes or slices of
+        lists (e.g. .a.b[0] or .a[1:]); the rest of each selector (from the first step of any other kind, e.g. a
+        recursive descent) is evaluated from the node in which its prefix ends.
+
+       The trie is compiled into a function that walks an object once, and appends the values obtained by each selector
+         to its own list. The subtrees that only contain one selector are evaluated using the compiled chain of the
+         selector (see Selector.compile), that walks the fixed keys and indexes in a single loop.
+    """
+    def __init__(self) -> None:
+        # The children for each (dict, key), (list, index) or (slice, start, end) step
+        self._children = {}
+        # The (position, rest of the selector) of the selectors whose prefix ends in this node (the rest is None if the
+        #   selector ends here)
+        self._leaves = []
+        # The amount of selectors in the subtree, and the (position, selector) of the first one that entered the node
+        #   (i.e. the part of the selector that starts with the step into the node)
+        self._count = 0
+        self._entry = None
+
+    def add(self, position: int, selector: "Selector") -> int:
+        """Adds a selector to the trie
+
+        Args:
+            position (int): the position of the selector (i.e. of the list of values in which its values are appended)
+            selector (Selector): the selector
+
+        Returns:
+            int: the amount of steps of the selector that were added to the trie
+        """
+        node = self
+        steps = 0
+        while selector is not None:
+            key = selector._path_key()
+            if key is None and type(selector) is List:
+                key = (slice, selector._start, selector._end)
+            if key is None:
+                break
+            node = node._children.setdefault(key, _Trie())
+            node._count += 1
+            if node._entry is None:
+                node._entry = (position, selector)
+            selector = selector._next
+            steps += 1
+        node._leaves.append((position, selector))
+        return steps
+
+    def size(self) -> int:
+        """The amount of nodes of the trie (without the root)"""
+        return sum([ 1 + child.size() for child in self._children.values() ])
+
+    def compile(self, compile_chain = None):
+        """Compiles the trie into a function walk(obj, values) that appends the values obtained by each selector from
+            obj to values[position]
+
+        Args:
+            compile_chain (function, optional): the function that compiles the rest of the selectors into step
+                functions (e.g. RowMemo.compile_chain). Defaults to None (i.e. Selector._compile_chain).
+        """
+        if compile_chain is None:
+            compile_chain = lambda selector: selector._compile_chain()
+        leaves = [ (position, compile_chain(rest)) for position, rest in self._leaves if rest is not None ]
+        ends = [ position for position, rest in self._leaves if rest is None ]
+        leaves += [ (child._entry[0], compile_chain(child._entry[1])) for child in self._children.values() if child._count == 1 ]
+        shared = [ (key, child) for key, child in self._children.items() if child._count > 1 ]
+        keys = [ (key[1], child.compile(compile_chain)) for key, child in shared if key[0] is dict ]
+        indexes = [ (key[1], child.compile(compile_chain)) for key, child in shared if key[0] is list ]
+        slices = [ (key[1], key[2], child.compile(compile_chain)) for key, child in shared if key[0] is slice ]
+        def walk(obj, values):
+            for position in ends:
+                values[position].append(obj)
+            for position, step in leaves:
+                step(obj, values[position].append)
+            if isinstance(obj, dict):
+                for key, child in keys:
+                    if key in obj:
+                        child(obj[key], values)
+            elif isinstance(obj, list):
+                for index, child in indexes:
+                    if index < len(obj):
+                        child(obj[index], values)
+                for start, end, child in slices:
+                    for item in obj[start:end]:
+                        child(item, values)
+        return walk
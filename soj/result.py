@@ -14,6 +14,7 @@
 #    limitations under the License.
 #
 import logging
+from itertools import chain, islice
 
 def merge_objects(obj1 = None, *objs):
     """Merges multiple dictionaries or lists into one, recursively
@@ -57,11 +58,76 @@ def merge_objects(obj1 = None, *objs):
             raise TypeError("Cannot merge simple objects")
     return obj1
 
+def _flatten(element):
+    """Generates the values contained in an element of a result
+
+    Args:
+        element (Any): the element
+
+    Yields:
+        Any: the element itself or, if it is a result (or other iterable that is not a list, dict or str), its elements
+    """
+    if isinstance(element, ( list, dict, str )):
+        yield element
+    else:
+        try:
+            for j in element:
+                yield j
+        except TypeError:
+            yield element
+
+def _failed(error: Exception):
+    """Generates an iterator that raises an error when it is consumed"""
+    raise error
+    yield
+
 class Result:
     def __init__(self, *values) -> None:
         self._elements = []
+        # The source is an iterator that produces the elements that have not been obtained yet (see Result.lazy)
+        self._source = None
         for value in values:
             self.append(value)
+    @classmethod
+    def lazy(cls, elements) -> "Result":
+        """Creates a result whose elements are obtained from an iterable as they are consumed, instead of storing them
+            in advance. This enables to chain the stages of a query (e.g. FROM -> filter -> select) so that the
+            elements flow one at a time through the whole pipeline.
+
+           (*) the elements that are consumed by iterating the result are not kept, so a lazy result can only be
+               iterated once; call materialize() before, if the elements are needed more than once.
+
+        Args:
+            elements (Iterable): the iterable that produces the elements
+
+        Returns:
+            Result: the lazy result
+        """
+        result = cls()
+        result._source = iter(elements)
+        return result
+    @property
+    def is_lazy(self) -> bool:
+        """Returns True if the result still has elements that have not been obtained from its source"""
+        return self._source is not None
+    def materialize(self) -> "Result":
+        """Obtains all the pending elements from the source of the result and stores them, so that the result can be
+            iterated (and measured) as many times as needed
+
+        Returns:
+            Result: this element (to enable chaining)
+        """
+        if self._source is not None:
+            source = self._source
+            self._source = None
+            try:
+                self._elements.extend(source)
+            except Exception as e:
+                # Keep the error, so that it is raised again when iterating the rest of the result (e.g. list() calls
+                #   len() but ignores its TypeErrors, and then iterates the result)
+                self._source = _failed(e)
+                raise
+        return self
     def __str__(self) -> str:
         return f"{len(self)} results"
     def append(self, *element) -> "Result":
@@ -73,6 +139,17 @@ class Result:
         for e in element:
             self._elements.append(e)
         return self
+    def extend(self, elements) -> "Result":
+        """Appends the elements of an iterable to the result
+
+        Args:
+            elements (Iterable): the elements to append
+
+        Returns:
+            Result: this element (to enable chaining)
+        """
+        self._elements.extend(elements)
+        return self
     def __iter__(self):
         """Generates an iterator that yields the elements of the result
 
@@ -81,88 +158,173 @@ class Result:
         """
         pos = 0
         while pos < len(self._elements):
-            if isinstance(self._elements[pos], ( list, dict, str )):
-                yield self._elements[pos]
-            else:
-                try:
-                    for j in self._elements[pos]:
-                        # print(f"yield from {self}")
-                        yield j
-                except TypeError:
-                    yield self._elements[pos]
+            yield from _flatten(self._elements[pos])
             pos += 1
+        if self._source is not None:
+            # The elements obtained from the source are not stored, so that they can be discarded once consumed
+            for element in self._source:
+                yield from _flatten(element)
+            self._source = None
     def __len__(self) -> int:
         """Calculates the amount of elements in the result (taking into account that if an element is a result, it will add the amount of elements in that result)
 
+            (*) if the result is lazy, it is materialized to be able to count the elements
+
         Returns:
             int: the amount of elements that contains this result
         """
+        self.materialize()
         return sum([ len(x) if isinstance(x, Result) else 1 for x in self._elements ])
     def __add__(self, other: "Result") -> "Result":
         """Generates a new result with the elements of both results
 
+            (*) if any of the results is lazy, the new result is also lazy and consumes both of them
+
         Args:
             other (Result): the other result to add
 
         Returns:
             Result: The result with the elements of both results
         """
+        if self.is_lazy or other.is_lazy:
+            return Result.lazy(chain(self, other))
         retval = Result()
         for i in self._elements:
             retval.append(i)
         for i in other._elements:
             retval.append(i)
         return retval
-    def filter(self, filter: str) -> "Result":
+    def limit(self, count: int = None, offset: int = 0) -> "Result":
+        """Obtains a range of the elements of the result (i.e. LIMIT <count> OFFSET <offset>)
+
+            (*) the new result is lazy, and it stops consuming this result as soon as it has obtained the last element
+                of the range, so the stages that produce the elements (e.g. exploring the document or reading a file)
+                are not evaluated any further
+
+        Args:
+            count (int, optional): the maximum amount of elements. Defaults to None (i.e. no limit).
+            offset (int, optional): the amount of elements to skip. Defaults to 0.
+
+        Returns:
+            Result: the result with the elements in the range
+        """
+        if (count is not None and count < 0) or offset < 0:
+            raise ValueError(f"Invalid limit: {count} offset {offset}")
+        return Result.lazy(islice(self, offset, None if count is None else offset + count))
+    def aggregate(self, selector, group_by = None) -> "Result":
+        """Evaluates the aggregate functions of a SELECT clause (e.g. "country, count(*), avg(price)") over the elements
+            of the result, in one pass and without storing the elements (see Grouping)
+
+        Args:
+            selector (str | list): the items of the SELECT clause
+            group_by (str | list, optional): the selectors of the GROUP BY clause. Defaults to None (i.e. a single group
+                with all the elements).
+
+        Returns:
+            Result: the (lazy) result with one row per group; each row is a dict with the value of each item of the
+                SELECT clause (e.g. {"country": "es", "count(*)": 10, "avg(price)": 2.5})
+        """
+        from .aggregate import Grouping
+        items = self._selectors(selector)
+        if group_by is not None:
+            group_by = self._selectors(group_by)
+        grouping = Grouping(items, group_by)
+        def rows():
+            yield from grouping.add(self).rows()
+        return Result.lazy(rows())
+    def order_by(self, order, limit: int = None, run_size: int = None, selector = None, memo: "RowMemo" = None) -> "Result":
+        """Sorts the elements of the result (i.e. ORDER BY <selector> [ASC|DESC], ...), evaluating the selectors on each
+            element. If only the first elements are needed, they are obtained using a bounded heap; otherwise, the
+            elements are sorted using an external merge sort when they do not fit in the memory budget (see order_rows).
+
+            (*) the elements for which a selector obtains nothing go first (last, if descending)
+
+        Args:
+            order (str | list): the sort keys (e.g. "price desc, name"), or the (Selector, descending) tuples
+            limit (int, optional): the amount of elements that will be needed. Defaults to None (i.e. all of them).
+            run_size (int, optional): the maximum amount of elements kept in memory when sorting all of them. Defaults
+                to None (i.e. RUN_SIZE).
+            selector (str | list, optional): the selectors to apply to the sorted elements (i.e. the result is the same
+                than calling select afterwards, but the sort keys are obtained from the elements before selecting, and
+                only the selected objects are kept while sorting). Defaults to None.
+            memo (RowMemo, optional): the memo used to apply the selectors (see select). Defaults to None.
+
+        Returns:
+            Result: the (lazy) result with the sorted elements
+        """
+        from .parser.cache import get_plan_cache
+        from .sort import order_rows, RUN_SIZE
+        from .projection import Projection
+        if isinstance(order, str):
+            order = get_plan_cache().parse_order_by(order)
+        select = None
+        if selector is not None:
+            select = Projection(self._selectors(selector), memo).rows
+        return Result.lazy(order_rows(self, order, limit, RUN_SIZE if run_size is None else run_size, select))
+    def filter(self, filter: str, memo: "RowMemo" = None) -> "Result":
         """Filters the result with the given filter
         
         Args:
             filter (str): the filter to apply to the result
+            memo (RowMemo, optional): the memo shared with the other clauses evaluated on the same elements (see
+                RowMemo). Defaults to None.
         
         Returns:
             Result: the result with the filtered elements
             
         """
-        from .parser.parser import get_parser
+        from .parser.cache import get_plan_cache
         from .filter import Filter
-        parser = get_parser()
         if not issubclass(type(filter), Filter):
             try:
-                filter = parser.parse_comparison(filter)
+                filter = get_plan_cache().parse_comparison(filter)
             except Exception as e:
                 logging.error(f"Error parsing filter: {e}")
                 return Result()
-        return Result(filter.filter(self))
+        return Result.lazy(filter.filter(self, memo))
 
-    def select(self, selector: str) -> "Result":
+    def select(self, selector: str, memo: "RowMemo" = None) -> "Result":
         """Selects the result with the given selector
         
         Args:
             selector (str): the selector to apply to the result
+            memo (RowMemo, optional): the memo shared with the other clauses evaluated on the same elements (see
+                RowMemo). Defaults to None.
         
         Returns:
             Result: the result with the selected elements
             
         """
-        from .parser.parser import get_parser
-        parser = get_parser()
+        from .aggregate import is_aggregate
+        from .projection import Projection
+        try:
+            selectors = self._selectors(selector)
+        except Exception as e:
+            logging.error(f"Error parsing filter: {e}")
+            return Result()
+        if is_aggregate(selectors):
+            return self.aggregate(selectors)
+        return Result.lazy(self._select(Projection(selectors, memo)))
+
+    @staticmethod
+    def _selectors(selector) -> list:
+        """Obtains the list of selectors from a string or from one or more selectors"""
+        from .parser.cache import get_plan_cache
         if isinstance(selector, str):
-            try:
-                selectors = parser.parse_selectors(selector)
-            except Exception as e:
-                logging.error(f"Error parsing filter: {e}")
-                return Result()
-        else:
-            if not isinstance(selector, list):
-                selector = [selector]
-            selectors = selector
-        result = Result()
+            return get_plan_cache().parse_selectors(selector)
+        if not isinstance(selector, list):
+            return [ selector ]
+        return selector
+
+    def _select(self, projection: "Projection"):
+        """Generates the output rows for each of the elements of the result
+
+        Args:
+            projection (Projection): the projection of the selectors to apply
 
+        Yields:
+            Any: the next output row
+        """
+        rows = projection.rows
         for element in self:
-            obj = None
-            for selector in selectors:
-                # TODO: initially it was using selector.get, but using .select seems to obtain the expected resuls
-                obj = merge_objects(obj, selector.select(element))
-            if obj is not None:
-                result.append(obj)
-        return result
+            yield from rows(element)
@@ -14,54 +14,65 @@
 #    limitations under the License.
 #
 from .selector import Selector
-from ..result import Result, merge_objects
+from ..result import Result
 
 class Explorer(Selector):
     def select(self, obj) -> "Result":
-        # First we get the results of directly applying the next selector to this object
-        results_self = Result()
-        if self._next is not None:
-            results_self = self._next.select(obj)
-
-        # Then we get the results of applying the next selector to each element of the list
-        result_k = Result()
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                result_k += self.select(v)
-        elif isinstance(obj, list):
-            for v in obj:
-                result_k += self.select(v)
-        return results_self + result_k
+        # The next selector is applied to the object and then to each of its descendants (in pre-order); the results
+        #   are accumulated in a single result, in one pass
+        result = Result()
+        for node in self._iterate_step(obj):
+            result.append(self._next.select(node))
+        return result
     def get(self, obj):
-        results_self = []
-        results_k = []
-        if self._next is not None:
-            v = self._next.get(obj)
+        result = []
+        for node in self._iterate_step(obj):
+            v = self._next.get(node)
             if v is not None:
                 if isinstance(v, list):
-                    results_self.extend(v)
+                    result.extend(v)
                 else:
-                    results_self.append(v)
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                v = self.get(v)
-                if v is not None:
-                    if isinstance(v, list):
-                        results_self.extend(v)
-                    else:
-                        results_self.append(v)
-        elif isinstance(obj, list):
-            for v in obj:
-                v = self.get(v)
-                if v is not None:
-                    if isinstance(v, list):
-                        results_self.extend(v)
-                    else:
-                        results_self.append(v)
-        result = results_self + results_k
+                    result.append(v)
         if len(result) == 0:
             return None
         return result
+
+    _fans_out = True
+    _fan_out = 100
+
+    def _iterate_step(self, obj):
+        # The explorer only produces values through the next selector, that is applied to the object and all its
+        #   descendants, in pre-order
+        if self._next is None:
+            return
+        stack = [ obj ]
+        while stack:
+            obj = stack.pop()
+            yield obj
+            if isinstance(obj, dict):
+                stack.extend(reversed(obj.values()))
+            elif isinstance(obj, list):
+                stack.extend(reversed(obj))
+
+    def _compile_step(self, next_step):
+        if next_step is None:
+            # The explorer only produces values through the next selector
+            def step(obj, emit):
+                pass
+            return step
+
+        def step(obj, emit):
+            # Visit the object and all its descendants in pre-order (i.e. the same order than method select), using
+            #   an explicit stack instead of recursion
+            stack = [ obj ]
+            while stack:
+                obj = stack.pop()
+                next_step(obj, emit)
+                if isinstance(obj, dict):
+                    stack.extend(reversed(obj.values()))
+                elif isinstance(obj, list):
+                    stack.extend(reversed(obj))
+        return step
     def alt_get(self, obj):
         results_self = []
         results_k = []
@@ -42,6 +42,21 @@ class Field(Selector):
             results = self._next.select(obj[self._field])
             return results
 
+    def _path_key(self):
+        return (dict, self._field)
+
+    def _compile_step(self, next_step):
+        field = self._field
+        if next_step is None:
+            def step(obj, emit):
+                if isinstance(obj, dict) and field in obj:
+                    emit(obj[field])
+        else:
+            def step(obj, emit):
+                if isinstance(obj, dict) and field in obj:
+                    next_step(obj[field], emit)
+        return step
+
     def get(self, obj):
         if not isinstance(obj, dict):
             return None
@@ -13,6 +13,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 #
+from itertools import islice
 from .selector import Selector
 from .. import Result
 from ..utils import debug_function
@@ -29,7 +30,7 @@ class ListElement(Selector):
         self._index = index
 
     def _to_str(self) -> str:
-        return f"[{self._field}]"
+        return f"[{self._index}]"
 
     def select(self, obj) -> "Result":
         if not isinstance(obj, list):
@@ -42,6 +43,21 @@ class ListElement(Selector):
         else:
             return self._next.select(obj)
 
+    def _path_key(self):
+        return (list, self._index)
+
+    def _compile_step(self, next_step):
+        index = self._index
+        if next_step is None:
+            def step(obj, emit):
+                if isinstance(obj, list) and index < len(obj):
+                    emit(obj[index])
+        else:
+            def step(obj, emit):
+                if isinstance(obj, list) and index < len(obj):
+                    next_step(obj[index], emit)
+        return step
+
     def get(self, obj: list):
         if not isinstance(obj, list):
             return None
@@ -93,6 +109,28 @@ class List(Selector):
                 result.append(self._next.select(item))
             return result
 
+    _fans_out = True
+    _fan_out = 10
+
+    def _iterate_step(self, obj):
+        if isinstance(obj, list):
+            yield from islice(obj, *slice(self._start, self._end).indices(len(obj)))
+
+    def _compile_step(self, next_step):
+        start = self._start
+        end = self._end
+        if next_step is None:
+            def step(obj, emit):
+                if isinstance(obj, list):
+                    for item in obj[start:end]:
+                        emit(item)
+        else:
+            def step(obj, emit):
+                if isinstance(obj, list):
+                    for item in obj[start:end]:
+                        next_step(item, emit)
+        return step
+
     def get(self, obj: list):
         if not isinstance(obj, list):
             return None
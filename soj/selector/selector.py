@@ -26,6 +26,7 @@ class Selector:
             next (Selector, optional): Is the next selector that has to be applied to the results of this one. Defaults to None.
         """
         self._next = next
+        self._compiled = None
 
     def select(self, obj) -> "Result":
         """Obtains the list of objects that match the selector (and the chain of next selectors)
@@ -67,7 +68,140 @@ class Selector:
             self._next = next
         else:
             self._next += next
+        # The chain has changed, so the compiled function is no longer valid
+        self._compiled = None
         return self
+
+    def compile(self):
+        """Compiles the chain of selectors into a single function that obtains the same values than method select, but
+            without allocating a Result at each step of the chain and without dispatching to the next selector through
+            method select. The function is built once and then kept in the selector.
+
+        Returns:
+            function: a function that receives an object and returns the list of values that match the selector (and
+                the chain of next selectors)
+        """
+        if self._compiled is None:
+            step = self._compile_chain()
+            def compiled(obj) -> list:
+                values = []
+                step(obj, values.append)
+                return values
+            self._compiled = compiled
+        return self._compiled
+
+    def _compile_chain(self):
+        """Compiles this selector and the chain of next selectors into a step function
+
+        Returns:
+            function: a function step(obj, emit) that calls emit for each value that matches the chain
+        """
+        # The consecutive selectors that just move into a fixed key or index (e.g. .a.b[0].c) are fused into a single
+        #   loop, instead of chaining one function for each of them
+        path = []
+        selector = self
+        while selector is not None and selector._path_key() is not None:
+            path.append(selector._path_key())
+            selector = selector._next
+
+        next_step = None
+        if len(path) > 1:
+            if selector is not None:
+                next_step = selector._compile_chain()
+            return _compile_path(path, next_step)
+
+        if self._next is not None:
+            next_step = self._next._compile_chain()
+        return self._compile_step(next_step)
+
+    def iterate(self, obj):
+        """Generates the values that match the selector (and the chain of next selectors) one at a time. The first
+            selector of the chain that may produce multiple values (e.g. a slice of a list or a recursive descent) is
+            traversed lazily, and the rest of the chain is applied to each of its values using the compiled function.
+
+        Args:
+            obj (dict): the object from which to apply the selector
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        # Move into the fixed keys and indexes at the beginning of the chain
+        path = []
+        selector = self
+        while selector is not None and selector._path_key() is not None:
+            path.append(selector._path_key())
+            selector = selector._next
+        obj = _walk_path(obj, path)
+        if obj is _NOT_FOUND:
+            return
+        if selector is None:
+            yield obj
+            return
+
+        if not selector._fans_out:
+            yield from selector.compile()(obj)
+        elif selector._next is None:
+            yield from selector._iterate_step(obj)
+        else:
+            tail = selector._next.compile()
+            for value in selector._iterate_step(obj):
+                yield from tail(value)
+
+    # True if the selector may produce multiple values from a single object
+    _fans_out = False
+
+    # The estimated cost of evaluating this selector alone, and the estimated amount of values to which the next
+    #   selector is applied (see cost)
+    _step_cost = 1
+    _fan_out = 1
+
+    def cost(self) -> float:
+        """Estimates the relative cost of evaluating the chain of selectors (e.g. to decide the order in which a set of
+            conditions is evaluated). The selectors that fan out multiply the cost of the rest of the chain.
+
+        Returns:
+            float: the estimated cost
+        """
+        cost = 0
+        factor = 1
+        selector = self
+        while selector is not None:
+            cost += factor * selector._step_cost
+            factor *= selector._fan_out
+            selector = selector._next
+        return cost
+
+    def _iterate_step(self, obj):
+        """Generates the values produced by this selector alone (i.e. the values to which the next selector of the
+            chain has to be applied), for the selectors that fan out
+
+        Args:
+            obj (Any): the object from which to apply the selector
+
+        Yields:
+            Any: the next value
+        """
+        raise NotImplementedError()
+
+    def _path_key(self):
+        """Obtains the key that this selector uses to move into the object, if the selector just moves into a fixed
+            key of a dict or a fixed index of a list
+
+        Returns:
+            tuple: (type, key) being type either dict or list; None if the selector does not move into a fixed key
+        """
+        return None
+
+    def _compile_step(self, next_step):
+        """Compiles this selector into a step function that passes its values to the next step
+
+        Args:
+            next_step (function): the step function of the next selector in the chain (None if this is the last one)
+
+        Returns:
+            function: a function step(obj, emit) that calls emit (or next_step) for each value selected from obj
+        """
+        raise NotImplementedError()
     def _to_str(self):
         """A string representation of the selector
         """
@@ -82,6 +216,16 @@ class Selector:
         if self._next is not None:
             result = f"{result}{self._next}"
         return result
+    def label(self) -> str:
+        """The name of the values obtained by the selector, when they are part of a row (e.g. the output of a GROUP BY)
+
+        Returns:
+            str: the string representation of the selector, without the leading dot (e.g. a.b[1] for .a.b[1])
+        """
+        result = str(self)
+        if result.startswith(".") and not result.startswith(".."):
+            result = result[1:]
+        return result
     def get(self, obj):
         """Gets the objects that matches the selector (and the chain of next selectors)
 
@@ -93,15 +237,67 @@ class Selector:
         """
         raise NotImplementedError()
 
+def _compile_path(path: list, next_step):
+    """Compiles a sequence of fixed keys and indexes into a single step function
+
+    Args:
+        path (list): the list of (type, key) tuples, as returned by Selector._path_key
+        next_step (function): the step function to apply to the value at the end of the path (None to emit it)
+
+    Returns:
+        function: a function step(obj, emit) that walks the path in a loop
+    """
+    path = tuple(path)
+    if next_step is None:
+        def step(obj, emit):
+            obj = _walk_path(obj, path)
+            if obj is not _NOT_FOUND:
+                emit(obj)
+    else:
+        def step(obj, emit):
+            obj = _walk_path(obj, path)
+            if obj is not _NOT_FOUND:
+                next_step(obj, emit)
+    return step
+
+def _walk_path(obj, path):
+    """Moves into an object following a sequence of fixed keys and indexes
+
+    Args:
+        obj (Any): the object
+        path (Iterable): the (type, key) tuples, as returned by Selector._path_key
+
+    Returns:
+        Any: the value at the end of the path, or _NOT_FOUND if the path does not exist in the object
+    """
+    for container, key in path:
+        if not isinstance(obj, container):
+            return _NOT_FOUND
+        if container is dict:
+            if key not in obj:
+                return _NOT_FOUND
+        elif key >= len(obj):
+            return _NOT_FOUND
+        obj = obj[key]
+    return obj
+
+_NOT_FOUND = object()
+
 class Empty(Selector):
+    _step_cost = 0
     def _to_str(self):
         return f"$"
     def get(self, obj: dict):
         return obj
     def select(self, obj) -> "Result":
         return Result(obj)
+    def _compile_step(self, next_step):
+        def step(obj, emit):
+            emit(obj)
+        return step
 
 class Constant(Selector):
+    _step_cost = 0
     def __init__(self, value) -> None:
         super().__init__(None)
         self._value = value
@@ -110,4 +306,9 @@ class Constant(Selector):
     def get(self, obj):
         return self._value
     def select(self, obj) -> "Result":
-        return Result(self._value)
\ No newline at end of file
+        return Result(self._value)
+    def _compile_step(self, next_step):
+        value = self._value
+        def step(obj, emit):
+            emit(value)
+        return step
@@ -0,0 +1,323 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import mmap
+import os
+import struct
+from .jsondb import JSONDB
+from .parser.cache import PlanCache
+from .selector import Selector, Empty, List
+
+# The format of a snapshot is a header (MAGIC and the offset of the root node) followed by the nodes. Each node starts
+#   with a tag byte:
+#   - null, true and false: just the tag
+#   - integers: int64 (or the decimal representation as a string, if they do not fit)
+#   - floats: float64
+#   - strings: uint32 length and UTF-8 bytes
+#   - arrays: uint32 count and the uint64 offsets of the elements
+#   - objects: uint32 count, the uint64 offsets of the key (string) and the value of each entry (in the order of the
+#     document), and the uint32 positions of the entries sorted by key (to find a key using a binary search)
+#
+#   The nodes are written after their children, so the offsets are always known when writing a node.
+MAGIC = b"SOJSNAP1"
+
+_NULL = ord("n")
+_TRUE = ord("t")
+_FALSE = ord("f")
+_INT = ord("i")
+_BIGINT = ord("I")
+_FLOAT = ord("d")
+_STRING = ord("s")
+_ARRAY = ord("a")
+_OBJECT = ord("o")
+
+_HEADER = struct.Struct("<8sQ")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U64 = struct.Struct("<Q")
+
+# The maximum amount of distinct keys that are written only once (i.e. shared by all the objects that contain them)
+_MAX_SHARED_KEYS = 1 << 16
+
+class _Writer:
+    def __init__(self, fp) -> None:
+        self._fp = fp
+        self._offset = 0
+        self._keys = {}
+
+    def _write(self, data: bytes) -> int:
+        offset = self._offset
+        self._fp.write(data)
+        self._offset += len(data)
+        return offset
+
+    def _string(self, s: str) -> int:
+        data = s.encode("utf-8")
+        return self._write(bytes([ _STRING ]) + _U32.pack(len(data)) + data)
+
+    def _key(self, key: str) -> int:
+        offset = self._keys.get(key)
+        if offset is None:
+            offset = self._string(key)
+            if len(self._keys) < _MAX_SHARED_KEYS:
+                self._keys[key] = offset
+        return offset
+
+    def node(self, obj) -> int:
+        """Writes a value (and its children, before it)
+
+        Returns:
+            int: the offset of the node of the value
+        """
+        if obj is None:
+            return self._write(bytes([ _NULL ]))
+        if obj is True:
+            return self._write(bytes([ _TRUE ]))
+        if obj is False:
+            return self._write(bytes([ _FALSE ]))
+        if isinstance(obj, int):
+            if -(1 << 63) <= obj < (1 << 63):
+                return self._write(bytes([ _INT ]) + _I64.pack(obj))
+            data = str(obj).encode("ascii")
+            return self._write(bytes([ _BIGINT ]) + _U32.pack(len(data)) + data)
+        if isinstance(obj, float):
+            return self._write(bytes([ _FLOAT ]) + _F64.pack(obj))
+        if isinstance(obj, str):
+            return self._string(obj)
+        if isinstance(obj, list):
+            offsets = [ self.node(v) for v in obj ]
+            return self._write(bytes([ _ARRAY ]) + _U32.pack(len(offsets)) + struct.pack(f"<{len(offsets)}Q", *offsets))
+        if isinstance(obj, dict):
+            entries = []
+            for k, v in obj.items():
+                if not isinstance(k, str):
+                    raise TypeError(f"Keys must be strings: {k}")
+                entries.append(self._key(k))
+                entries.append(self.node(v))
+            order = sorted(range(len(obj)), key=[ k.encode("utf-8") for k in obj ].__getitem__)
+            return self._write(bytes([ _OBJECT ]) + _U32.pack(len(obj)) + struct.pack(f"<{len(entries)}Q", *entries) + struct.pack(f"<{len(order)}I", *order))
+        raise TypeError(f"Object of type {type(obj).__name__} cannot be stored in a snapshot")
+
+def write_snapshot(obj, fp) -> None:
+    """Writes a document in the binary snapshot format
+
+    Args:
+        obj (Any): the document (the values that can be obtained from a JSON document)
+        fp (file): the file-like object in which to write the snapshot (in binary mode)
+    """
+    writer = _Writer(fp)
+    writer._write(_HEADER.pack(MAGIC, 0))
+    root = writer.node(obj)
+    fp.seek(0)
+    fp.write(_HEADER.pack(MAGIC, root))
+
+class Snapshot:
+    """Snapshot gives access to a document stored in the binary snapshot format (see write_snapshot) through a memory map,
+        so opening it does not read the document. The selectors that move into fixed keys, fixed indexes and slices of
+        lists (e.g. .items[1:].data) are evaluated by seeking to the nodes they visit (the keys are found using a binary
+        search), and only the values that match the selector are decoded.
+
+       If the selector contains a step that needs the whole value (e.g. a recursive descent), the value at that point is
+         decoded and the rest of the selector is evaluated on it.
+    """
+    def __init__(self, path: str) -> None:
+        """Opens a snapshot
+
+        Args:
+            path (str): the path of the snapshot file
+
+        Raises:
+            Exception: if the file is not a snapshot (e.g. it is empty or truncated)
+        """
+        with open(path, "rb") as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise Exception(f"Invalid snapshot: {path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._root = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or not _HEADER.size <= self._root < len(self._mm):
+            self._mm.close()
+            raise Exception(f"Invalid snapshot: {path}")
+
+    def close(self) -> None:
+        """Releases the memory map of the file (the snapshot cannot be used afterwards)"""
+        self._mm.close()
+
+    def iterate(self, selector: "Selector"):
+        """Generates the values of the document that match a selector, decoding only the values that match
+
+        Args:
+            selector (Selector): the selector
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        yield from self._select(self._root, selector)
+
+    def decode(self, offset: int = None):
+        """Decodes a node and all its children
+
+        Args:
+            offset (int, optional): the offset of the node. Defaults to None (i.e. the root of the document).
+
+        Returns:
+            Any: the value
+        """
+        mm = self._mm
+        if offset is None:
+            offset = self._root
+        tag = mm[offset]
+        if tag == _STRING:
+            return self._string(offset)
+        if tag == _INT:
+            return _I64.unpack_from(mm, offset + 1)[0]
+        if tag == _FLOAT:
+            return _F64.unpack_from(mm, offset + 1)[0]
+        if tag == _NULL:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _ARRAY:
+            count = _U32.unpack_from(mm, offset + 1)[0]
+            return [ self.decode(o) for o in struct.unpack_from(f"<{count}Q", mm, offset + 5) ]
+        if tag == _OBJECT:
+            count = _U32.unpack_from(mm, offset + 1)[0]
+            entries = struct.unpack_from(f"<{2 * count}Q", mm, offset + 5)
+            return { self._string(entries[i]): self.decode(entries[i + 1]) for i in range(0, 2 * count, 2) }
+        if tag == _BIGINT:
+            return int(self._bytes(offset).decode("ascii"))
+        raise Exception(f"Invalid node at offset {offset}")
+
+    def _bytes(self, offset: int) -> bytes:
+        size = _U32.unpack_from(self._mm, offset + 1)[0]
+        return self._mm[offset + 5:offset + 5 + size]
+
+    def _string(self, offset: int) -> str:
+        return self._bytes(offset).decode("utf-8")
+
+    def _lookup(self, offset: int, key: str) -> int:
+        """Finds a key in an object
+
+        Args:
+            offset (int): the offset of the object node
+            key (str): the key
+
+        Returns:
+            int: the offset of the value, or None if the object does not contain the key
+        """
+        mm = self._mm
+        count = _U32.unpack_from(mm, offset + 1)[0]
+        entries = offset + 5
+        order = entries + 16 * count
+        target = key.encode("utf-8")
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            i = _U32.unpack_from(mm, order + 4 * middle)[0]
+            k = self._bytes(_U64.unpack_from(mm, entries + 16 * i)[0])
+            if k < target:
+                low = middle + 1
+            elif k > target:
+                high = middle
+            else:
+                return _U64.unpack_from(mm, entries + 16 * i + 8)[0]
+        return None
+
+    def _element(self, offset: int, index: int) -> int:
+        return _U64.unpack_from(self._mm, offset + 5 + 8 * index)[0]
+
+    def _select(self, offset: int, selector: "Selector"):
+        """Generates the values that match a selector in a node
+
+        Args:
+            offset (int): the offset of the node
+            selector (Selector): the selector (None to obtain the value itself)
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        if selector is None:
+            yield self.decode(offset)
+            return
+
+        tag = self._mm[offset]
+        key = selector._path_key()
+        if key is not None and key[0] is dict:
+            if tag == _OBJECT:
+                value = self._lookup(offset, key[1])
+                if value is not None:
+                    yield from self._select(value, selector._next)
+        elif key is not None and key[0] is list:
+            if tag == _ARRAY:
+                count = _U32.unpack_from(self._mm, offset + 1)[0]
+                index = key[1]
+                if index < count:
+                    if index < 0:
+                        # The same than indexing a list
+                        index += count
+                        if index < 0:
+                            raise IndexError("list index out of range")
+                    yield from self._select(self._element(offset, index), selector._next)
+        elif isinstance(selector, List):
+            if tag == _ARRAY:
+                count = _U32.unpack_from(self._mm, offset + 1)[0]
+                for index in range(*slice(selector._start, selector._end).indices(count)):
+                    yield from self._select(self._element(offset, index), selector._next)
+        elif type(selector) is Empty:
+            yield from self._select(offset, selector._next)
+        else:
+            # The rest of the chain needs the whole value, so it is decoded and evaluated in memory
+            yield from selector.iterate(self.decode(offset))
+
+class SnapshotDB(JSONDB):
+    """SnapshotDB is a JSONDB whose document is stored in a snapshot file (see Snapshot): opening it does not depend on
+        the size of the document, and each query only decodes the parts of the document that it visits.
+
+       (*) the document is not loaded in memory, so the indexes and the columnar tables are not available
+    """
+    def __init__(self, path: str, plan_cache: PlanCache = None) -> None:
+        """Opens the database from a snapshot file
+
+        Args:
+            path (str): the path of the snapshot
+            plan_cache (PlanCache, optional): the cache for the parsed queries. Defaults to the global plan cache.
+        """
+        super().__init__(None, plan_cache)
+        self._snapshot = Snapshot(path)
+
+    def __enter__(self) -> "SnapshotDB":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the snapshot file (the database cannot be queried afterwards)"""
+        self._snapshot.close()
+
+    @property
+    def snapshot(self) -> "Snapshot":
+        return self._snapshot
+
+    @property
+    def document(self):
+        """The whole document, decoded from the snapshot (each time it is obtained)"""
+        return self._snapshot.decode()
+
+    def _iterate_from(self, selector: "Selector"):
+        return self._snapshot.iterate(selector)
@@ -0,0 +1,208 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import heapq
+import json
+import pickle
+import tempfile
+from numbers import Number
+from operator import itemgetter
+
+# The default maximum amount of rows that are kept in memory while sorting, before spilling them to a temporary file
+RUN_SIZE = 100000
+
+# The amount of rows pickled at once in the temporary files
+_BATCH_SIZE = 1024
+
+class _Descending:
+    """Wraps a value of a sort key so that it is ordered in descending order"""
+    __slots__ = ( "value", )
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: "_Descending") -> bool:
+        return self.value == other.value
+
+    def __reduce__(self):
+        return (_Descending, (self.value,))
+
+def _sort_value(values: list) -> tuple:
+    """Obtains a value that can be compared with any other, from the values obtained by a selector: the rows in which
+        the selector obtains nothing go first, then booleans, numbers, strings and, at last, lists and objects (that
+        are compared by their JSON representation)
+
+    Args:
+        values (list): the values obtained by the selector (only the first one is used)
+
+    Returns:
+        tuple: the rank of the type of the value, and the comparable value
+    """
+    if len(values) == 0 or values[0] is None:
+        return (0, 0)
+    value = values[0]
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, Number):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, json.dumps(value, sort_keys=True))
+
+def sort_key(order: list):
+    """Builds the function that obtains the sort key of a row
+
+    Args:
+        order (list): the (Selector, descending) tuples of the ORDER BY clause
+
+    Returns:
+        function: a function that receives a row and returns its sort key
+    """
+    selectors = [ (selector.compile(), descending) for selector, descending in order ]
+    def key(row) -> tuple:
+        return tuple([ _Descending(_sort_value(select(row))) if descending else _sort_value(select(row)) for select, descending in selectors ])
+    return key
+
+def order_rows(rows, order: list, limit: int = None, run_size: int = RUN_SIZE, select=None):
+    """Generates the rows sorted by the ORDER BY clause (the sort is stable, so the rows with the same key keep their
+        relative order)
+
+    Args:
+        rows (Iterable): the rows
+        order (list): the (Selector, descending) tuples of the ORDER BY clause
+        limit (int, optional): the maximum amount of output values needed. Defaults to None (i.e. all of them).
+        run_size (int, optional): the maximum amount of rows kept in memory when sorting all of them. Defaults to
+            RUN_SIZE.
+        select (function, optional): a function that obtains the list of output values for a row (e.g. the SELECT
+            clause), so that the rows are sorted by their keys but only their output values are kept. Defaults to None
+            (i.e. the output is the row itself).
+
+    Yields:
+        Any: the next output value
+    """
+    count = 0
+    for _, values in sort_entries(entries(rows, order, select), limit, run_size):
+        for value in values:
+            if limit is not None and count >= limit:
+                return
+            yield value
+            count += 1
+
+def entries(rows, order: list, select=None):
+    """Generates the entries to sort: the sort key of each row along with its output values (see order_rows)
+
+    Yields:
+        tuple: the (key, values) tuple for the next row (the rows without output values are skipped)
+    """
+    key = sort_key(order)
+    if select is None:
+        for row in rows:
+            yield (key(row), [ row ])
+    else:
+        for row in rows:
+            values = select(row)
+            if len(values) > 0:
+                yield (key(row), values)
+
+def sort_entries(entries, limit: int = None, run_size: int = RUN_SIZE):
+    """Sorts the (key, values) entries by their key
+
+       - if there is a limit, only the first entries are kept, in a bounded heap (i.e. the memory is O(limit)).
+       - otherwise, the entries are sorted in runs of at most run_size entries; if there is more than one run, the runs
+         are spilled to temporary files and merged afterwards (i.e. an external merge sort), so the memory is
+         O(run_size) plus a buffer per run.
+
+    Args:
+        entries (Iterable): the (key, values) tuples
+        limit (int, optional): the amount of output values needed. Defaults to None (i.e. all of them).
+        run_size (int, optional): the maximum amount of entries kept in memory. Defaults to RUN_SIZE.
+
+    Yields:
+        tuple: the next (key, values) tuple
+    """
+    if limit is not None:
+        yield from _top(entries, limit)
+        return
+
+    runs = []
+    try:
+        run = []
+        for entry in entries:
+            run.append(entry)
+            if len(run) >= run_size:
+                runs.append(_spill(run))
+                run = []
+        run.sort(key=itemgetter(0))
+        if len(runs) == 0:
+            yield from run
+        else:
+            # The last run is kept in memory, as it is merged along with the runs in the files
+            yield from heapq.merge(*[ _read_run(f) for f in runs ], run, key=itemgetter(0))
+    finally:
+        for f in runs:
+            f.close()
+
+def _top(entries, limit: int) -> list:
+    """Obtains the entries with the lowest keys that are needed for the first output values, keeping only them in a heap
+        (the entry with the highest key is at the top, so that it is the first one to be discarded)
+
+    Args:
+        entries (Iterable): the (key, values) tuples
+        limit (int): the amount of output values needed
+
+    Returns:
+        list: the (key, values) tuples, sorted
+    """
+    heap = []
+    total = 0
+    for seq, (k, values) in enumerate(entries):
+        # The sequence number makes the sort stable, and avoids comparing the values
+        k = (k, seq)
+        if total >= limit and (len(heap) == 0 or heap[0][0].value < k):
+            continue
+        heapq.heappush(heap, (_Descending(k), values))
+        total += len(values)
+        while len(heap) > 0 and total - len(heap[0][1]) >= limit:
+            total -= len(heapq.heappop(heap)[1])
+    heap.sort(key=lambda entry: entry[0].value)
+    return [ (k.value[0], values) for k, values in heap ]
+
+def _spill(run: list):
+    """Sorts a run and writes it to a temporary file
+
+    Args:
+        run (list): the (key, values) tuples
+
+    Returns:
+        file: the temporary file (it is deleted when closed)
+    """
+    run.sort(key=itemgetter(0))
+    f = tempfile.TemporaryFile()
+    for i in range(0, len(run), _BATCH_SIZE):
+        pickle.dump(run[i:i + _BATCH_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+def _read_run(f):
+    """Generates the (key, values) tuples of a run written by _spill, reading one batch at a time"""
+    while True:
+        try:
+            batch = pickle.load(f)
+        except EOFError:
+            return
+        yield from batch
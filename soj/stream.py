@@ -0,0 +1,413 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import json
+import os
+import re
+from .jsondb import JSONDB
+from .parser.cache import PlanCache
+from .selector import Selector, List
+
+_WHITESPACES = re.compile(r'[ \t\n\r]*')
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR_END = re.compile(r'[^ \t\n\r,\]}]*')
+_DECODER = json.JSONDecoder()
+
+class JSONStream:
+    """JSONStream reads a JSON document from a file-like object incrementally, and evaluates a selector while reading it.
+        The parts of the document that are in the path of the selector (i.e. fixed keys, fixed indexes and slices of
+        lists, such as .items[1:].data) are navigated without decoding them, and the rest of the document is skipped
+        without building any object. Only the values that match the path are decoded, one at a time.
+
+       If the selector contains a step that needs the whole value (e.g. a recursive descent), the value at that point is
+         decoded and the rest of the selector is evaluated on it.
+
+       (*) the parts of the document that are skipped are not validated
+    """
+    def __init__(self, fp, chunk_size: int = 1 << 16) -> None:
+        """Creates the stream
+
+        Args:
+            fp (file): the file-like object from which to read the document (in text mode)
+            chunk_size (int, optional): the minimum amount of characters read at once. Defaults to 64k.
+        """
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def __str__(self):
+        """Returns a string representation of the stream"""
+        return f"at pos {self._pos} (\"{self._buffer[self._pos:self._pos + 16]}\")"
+
+    def iterate(self, selector: "Selector"):
+        """Generates the values of the document that match a selector, one at a time, while reading the document
+
+        Args:
+            selector (Selector): the selector
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        yield from self._select(selector)
+
+    def _select(self, selector: "Selector"):
+        """Generates the values that match a selector in the value at the current position of the stream, consuming
+            that value
+
+        Args:
+            selector (Selector): the selector (None to obtain the value itself)
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        if selector is None:
+            yield self._decode_value()
+            return
+
+        c = self._peek()
+        key = selector._path_key()
+        if key is not None and key[0] is dict:
+            if c != "{":
+                self._skip_value()
+                return
+            for k in self._iterate_object():
+                if k == key[1]:
+                    yield from self._select(selector._next)
+                else:
+                    self._skip_value()
+        elif (key is not None and key[0] is list and key[1] >= 0) or (isinstance(selector, List) and _is_forward_slice(selector)):
+            if c != "[":
+                self._skip_value()
+                return
+            if key is not None:
+                start, end = key[1], key[1] + 1
+            else:
+                start, end = selector._start or 0, selector._end
+            for i in self._iterate_array():
+                if i >= start and (end is None or i < end):
+                    yield from self._select(selector._next)
+                else:
+                    self._skip_value()
+        else:
+            # The rest of the chain needs the whole value, so it is decoded and evaluated in memory
+            yield from selector.iterate(self._decode_value())
+
+    def _iterate_object(self):
+        """Generates the keys of the object at the current position of the stream. Each time that a key is generated,
+            the stream is at the beginning of its value, that must be consumed before obtaining the next key.
+
+        Yields:
+            str: the next key
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._advance(self._pos + 1)
+            return
+        while True:
+            if self._peek() != '"':
+                raise Exception(f"Key expected {self}")
+            end = self._string_end(self._pos)
+            key = self._buffer[self._pos + 1:end - 1]
+            if "\\" in key:
+                key = json.loads(self._buffer[self._pos:end])
+            self._advance(end)
+            self._expect(":")
+            yield key
+            c = self._peek()
+            self._advance(self._pos + 1)
+            if c == "}":
+                return
+            if c != ",":
+                raise Exception(f"Expected ',' or '}}' {self}")
+
+    def _iterate_array(self):
+        """Generates the indexes of the array at the current position of the stream. Each time that an index is
+            generated, the stream is at the beginning of the element, that must be consumed before obtaining the next.
+
+        Yields:
+            int: the next index
+        """
+        self._expect("[")
+        if self._peek() == "]":
+            self._advance(self._pos + 1)
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            c = self._peek()
+            self._advance(self._pos + 1)
+            if c == "]":
+                return
+            if c != ",":
+                raise Exception(f"Expected ',' or ']' {self}")
+
+    def _decode_value(self):
+        """Decodes the value at the current position of the stream, and moves after it
+
+        Returns:
+            Any: the value
+        """
+        c = self._peek()
+        if c is None:
+            raise Exception("Unexpected end of the document")
+        if c in '{["':
+            # Objects, arrays and strings are decoded directly from the buffer, because they cannot be decoded unless
+            #   they are complete; if they are not, more of the document is read and the decoding is retried
+            while True:
+                try:
+                    value, end = _DECODER.raw_decode(self._buffer, self._pos)
+                    break
+                except json.JSONDecodeError:
+                    if not self._fill():
+                        raise
+        else:
+            end = self._value_end()
+            value = json.loads(self._buffer[self._pos:end])
+        self._advance(end)
+        return value
+
+    def _skip_value(self) -> None:
+        """Moves after the value at the current position of the stream, without decoding it"""
+        if self._peek() is None:
+            raise Exception("Unexpected end of the document")
+        self._advance(self._value_end())
+
+    def _value_end(self) -> int:
+        """Finds the end of the value that starts at the current position of the stream, reading as much of the
+            document as needed
+
+        Returns:
+            int: the position in the buffer right after the value
+        """
+        i = self._pos
+        c = self._buffer[i]
+        if c == '"':
+            return self._string_end(i)
+        if c in "{[":
+            depth = 0
+            while True:
+                m = _STRUCTURAL.search(self._buffer, i)
+                if m is None:
+                    i = len(self._buffer)
+                    if not self._fill():
+                        raise Exception("Unexpected end of the document")
+                    continue
+                i = m.start()
+                c = self._buffer[i]
+                if c == '"':
+                    i = self._string_end(i)
+                    continue
+                depth += 1 if c in "{[" else -1
+                i += 1
+                if depth == 0:
+                    return i
+        # Numbers, true, false and null end at the next delimiter
+        while True:
+            i = _SCALAR_END.match(self._buffer, i).end()
+            if i < len(self._buffer) or not self._fill():
+                return i
+
+    def _string_end(self, i: int) -> int:
+        """Finds the end of the string that starts at a position of the buffer, reading as much of the document as needed
+
+        Args:
+            i (int): the position of the opening quote
+
+        Returns:
+            int: the position in the buffer right after the closing quote
+        """
+        while True:
+            m = _STRING_END.match(self._buffer, i + 1)
+            if m is not None:
+                return m.end()
+            if not self._fill():
+                raise Exception("Closing quote expected")
+
+    def _peek(self) -> str:
+        """Skips the whitespaces and obtains the character at the current position of the stream
+
+        Returns:
+            str: the character (None at the end of the document)
+        """
+        while True:
+            self._pos = _WHITESPACES.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, c: str) -> None:
+        """Makes sure that the next character is the expected one, and moves after it
+
+        Args:
+            c (str): the expected character
+        """
+        if self._peek() != c:
+            raise Exception(f"Expected '{c}' {self}")
+        self._advance(self._pos + 1)
+
+    def _advance(self, pos: int) -> None:
+        """Moves the current position of the stream, and discards the part of the buffer that has been consumed
+
+        Args:
+            pos (int): the new position in the buffer
+        """
+        self._pos = pos
+        if pos >= self._chunk_size:
+            self._buffer = self._buffer[pos:]
+            self._pos = 0
+
+    def _fill(self) -> bool:
+        """Reads more of the document into the buffer (the positions in the buffer remain valid)
+
+        Returns:
+            bool: False if the end of the document was reached
+        """
+        if self._eof:
+            return False
+        # Read at least as much as is pending in the buffer, so that the values that span many chunks are completed in
+        #   a logarithmic amount of reads
+        chunk = self._fp.read(max(self._chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+def _is_forward_slice(selector: "List") -> bool:
+    """Returns True if the slice of a list selector can be evaluated while reading the list (i.e. no negative limits)"""
+    return (selector._start is None or selector._start >= 0) and (selector._end is None or selector._end >= 0)
+
+class FileDB(JSONDB):
+    """FileDB is the base class for the databases that do not load the document in memory, but read it from a file
+        each time that a query is executed
+
+       (*) the results are lazy, so the file is read while the rows of each result are consumed: if the file has a
+           path, each result opens its own handle, so that the results of several queries can be consumed at the same
+           time; otherwise, the results read the file itself, one after the other
+       (*) if the file is not seekable (e.g. stdin), only one query can be executed
+    """
+    def __init__(self, fp, plan_cache: PlanCache = None, json_backend: str = None) -> None:
+        """Creates the database from a file
+
+        Args:
+            fp (file): the file-like object that contains the document (in text mode)
+            plan_cache (PlanCache, optional): the cache for the parsed queries. Defaults to the global plan cache.
+            json_backend (str, optional): the library used to decode the JSON documents (see get_backend). Defaults to
+                None (i.e. the default backend).
+        """
+        super().__init__(None, plan_cache, json_backend)
+        self._fp = fp
+        self._start = fp.tell() if fp.seekable() else None
+        self._consumed = False
+        # Whether a result is reading the file itself (see _read)
+        self._reading = False
+
+    def _path(self) -> str:
+        """Obtains the path of the file, if it can be opened again (i.e. it is a seekable regular file)
+
+        Returns:
+            str: the path, or None if the file cannot be opened again
+        """
+        path = getattr(self._fp, "name", None)
+        if self._start is None or not isinstance(path, str) or not os.path.isfile(path):
+            return None
+        return path
+
+    def _read(self, iterate):
+        """Generates the values obtained from the document by a function, once the file is ready to be read from the
+            beginning of the document (i.e. when the first value is requested)
+
+        Args:
+            iterate (function): the function that receives the file and returns an iterable of the values
+
+        Raises:
+            Exception: if the file has already been read and it is not seekable, or if it cannot be opened again and
+                another result is reading it
+
+        Yields:
+            Any: the next value
+        """
+        path = self._path()
+        if path is not None:
+            with open(path, encoding=getattr(self._fp, "encoding", None), errors=getattr(self._fp, "errors", None)) as fp:
+                fp.seek(self._start)
+                yield from iterate(fp)
+            return
+
+        if self._reading:
+            raise Exception("The document is being read by another result")
+        if self._consumed:
+            if self._start is None:
+                raise Exception("The document has already been read")
+            self._fp.seek(self._start)
+        self._consumed = True
+        self._reading = True
+        try:
+            yield from iterate(self._fp)
+        finally:
+            self._reading = False
+
+class JSONStreamDB(FileDB):
+    """JSONStreamDB is a JSONDB that does not load the document in memory; instead, it reads the document from a file
+        each time that a query is executed and evaluates the FROM clause while reading it (see JSONStream), so that each
+        element flows through the filter and the selection and is discarded afterwards.
+    """
+    def __init__(self, fp, plan_cache: PlanCache = None, chunk_size: int = 1 << 16) -> None:
+        """Creates the database from a file
+
+        Args:
+            fp (file): the file-like object that contains the JSON document (in text mode)
+            plan_cache (PlanCache, optional): the cache for the parsed queries. Defaults to the global plan cache.
+            chunk_size (int, optional): the minimum amount of characters read at once. Defaults to 64k.
+        """
+        super().__init__(fp, plan_cache)
+        self._chunk_size = chunk_size
+
+    def _iterate_from(self, selector: "Selector"):
+        return self._read(lambda fp: JSONStream(fp, self._chunk_size).iterate(selector))
+
+class NDJSONDB(FileDB):
+    """NDJSONDB is a JSONDB for newline-delimited JSON documents (NDJSON or JSON Lines), in which each line is a row.
+        The file is read line by line each time that a query is executed, and the FROM clause is evaluated on each
+        row, so that only one line (and the output) is kept in memory at a time.
+    """
+    def _iterate_from(self, selector: "Selector"):
+        return self._read(lambda fp: self._iterate_lines(fp, selector, self._json_backend.loads))
+
+    @staticmethod
+    def _iterate_lines(lines, selector: "Selector", loads = json.loads):
+        """Generates the values that match a selector in each of the rows
+
+        Args:
+            lines (Iterable): the lines of the document
+            selector (Selector): the selector
+            loads (function, optional): the function that decodes each line. Defaults to json.loads.
+
+        Yields:
+            Any: the next value that matches the selector
+        """
+        for n, line in enumerate(lines, 1):
+            if line.isspace() or len(line) == 0:
+                continue
+            try:
+                row = loads(line)
+            except Exception as e:
+                raise Exception(f"Error parsing JSON at line {n}: {e}")
+            yield from selector.iterate(row)
@@ -0,0 +1,34 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The approximate count of distinct values must consider the same values distinct than the exact count"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+
+class TestCountDistinct(unittest.TestCase):
+    def test_approx_matches_exact(self) -> None:
+        # The amount of values is small, so the estimate is exact (i.e. the small range correction)
+        values = [ 1, 1.0, 2, 2.0, -0.0, 0, True, "1", [ 1 ], [ 1.0 ], { "x": 1 }, 1.5, None ]
+        db = JSONDB(json.dumps({ "a": values }))
+        row, = db.query("select count(distinct $), approx_count_distinct($) from a[]")
+        self.assertEqual(row["approx_count_distinct(*)"], row["count(distinct *)"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The command line options that build the query (see main in jsondb.py) must obtain the same results than the query
+    written with -q
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sqlonjson.py")
+
+DOCUMENT = { "items": [ { "n": 3, "s": "a" }, { "n": 1, "s": "b" }, { "n": 2, "s": "c" } ] }
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "doc.json")
+        with open(self._path, "w") as f:
+            json.dump(DOCUMENT, f)
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _run(self, *args) -> str:
+        return subprocess.run([ sys.executable, SCRIPT, self._path, "--indent", "0" ] + list(args), capture_output=True,
+            text=True, check=True).stdout
+
+    def test_order_by_options(self) -> None:
+        expected = [ "a", "c", "b" ]
+        self.assertEqual(json.loads(self._run("-q", "select s from items[] order by n desc")), expected)
+        self.assertEqual(json.loads(self._run("-f", "items[]", "-s", "s", "-O", "n desc")), expected)
+        self.assertEqual(json.loads(self._run("-f", "items[]", "-s", "s", "-O", "n desc", "-l", "1", "-o", "1")), [ "c" ])
+
+    def test_order_by_options_with_query(self) -> None:
+        # The options are not merged with the query, which contains its own clauses
+        for option in [ [ "-O", "n desc" ], [ "-l", "1" ], [ "-o", "1" ] ]:
+            with self.subTest(option=option):
+                output = self._run("-q", "select s from items[]", *option)
+                self.assertIn("cannot be used with -q", output)
+                self.assertNotIn("[", output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""A database must obtain the same results when it is queried from several threads at the same time, while its indexes
+    are built lazily by whichever query needs them first, and while the threads share the parser (see get_parser) and
+    the plan cache
+"""
+import json
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+from soj.parser.cache import PlanCache
+from soj.parser.parser import get_parser
+
+DOCUMENT = json.dumps({ "items": [ { "id": i, "price": i * 7919 % 1000, "tag": "abcde"[i % 5], "u": { "n": f"n{i % 37}" } }
+    for i in range(1000) ] })
+
+QUERIES = [
+    "select id from items[] where price > 900",
+    "select id from items[] where tag == 'a' and price < 300",
+    "select u.n from items[] where (tag in ('b', 'c') or price >= 990) and not id < 100",
+    "select tag, count(*), avg(price) from items[] group by tag order by tag",
+    "select id from items[] where price > 100 order by price desc, id limit 7 offset 3",
+    "select max(price), min(id), count(distinct u.n) from items[] where tag != 'e'",
+    "select $ from items[]..n where $ == 'n3'",
+    "select count(*) from ..n",
+]
+
+THREADS = 16
+
+class TestConcurrentQueries(unittest.TestCase):
+    def setUp(self) -> None:
+        # Switching threads as often as possible makes the races more likely
+        self._interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self) -> None:
+        sys.setswitchinterval(self._interval)
+
+    def _database(self) -> JSONDB:
+        # A plan cache of a single plan is shared by every thread, and replaced by each query
+        db = JSONDB(DOCUMENT, PlanCache(1))
+        db.create_index("items[]", "price", "sorted")
+        db.create_index("items[]", "tag", "hash")
+        db.create_key_index()
+        return db
+
+    def test_shared_database(self) -> None:
+        reference = JSONDB(DOCUMENT)
+        expected = { query: list(reference.query(query)) for query in QUERIES }
+        selections = [ query.split(" from ")[1].split(" ")[0] for query in QUERIES ]
+        expected_selections = { s: str(get_parser().parse_selection(s)) for s in selections }
+
+        for _ in range(8):
+            # New databases, so that their indexes are built while the threads query them
+            databases = [ self._database() for _ in range(2) ]
+            start = threading.Barrier(THREADS)
+
+            def run(n: int) -> list:
+                db = databases[n % len(databases)]
+                start.wait()
+                mismatches = []
+                for i in range(len(QUERIES)):
+                    query = QUERIES[(n + i) % len(QUERIES)]
+                    if list(db.query(query)) != expected[query]:
+                        mismatches.append(query)
+                    s = selections[(n + i) % len(selections)]
+                    if str(get_parser().parse_selection(s)) != expected_selections[s]:
+                        mismatches.append(s)
+                return mismatches
+
+            with ThreadPoolExecutor(THREADS) as executor:
+                mismatches = sum(executor.map(run, range(THREADS)), [])
+            self.assertEqual(mismatches, [])
+
+if __name__ == "__main__":
+    unittest.main()
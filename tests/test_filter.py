@@ -0,0 +1,75 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The WHERE clause must obtain the same rows whatever the structure used to evaluate it: the rows themselves, a
+    secondary index (see create_index) or a columnar table (see create_columnar)
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+
+ITEMS = [
+    { "n": "a", "id": 1 },
+    { "n": "b", "id": 2 },
+    { "n": "c" },
+    { "n": "d", "id": None },
+    { "n": "e", "id": "x" },
+    { "n": "f", "id": 3.5 }
+]
+
+def databases(items: list) -> dict:
+    """Obtains databases with the same rows, that evaluate the WHERE clause in each of the possible ways"""
+    document = json.dumps({ "items": items })
+    plain = JSONDB(document)
+    hashed = JSONDB(document)
+    hashed.create_index("items[]", "id", "hash")
+    sorted_ = JSONDB(document)
+    sorted_.create_index("items[]", "id", "sorted")
+    # Without NumPy, the columnar table evaluates the WHERE clause on its rows
+    columnar = JSONDB(document)
+    columnar.create_columnar("items[]")
+    return { "no index": plain, "hash index": hashed, "sorted index": sorted_, "columnar table": columnar }
+
+class TestFilterConsistency(unittest.TestCase):
+    def _check(self, query: str, expected: list, items: list = ITEMS) -> None:
+        for name, db in databases(items).items():
+            with self.subTest(query=query, database=name):
+                self.assertEqual(list(db.query(query)), expected)
+
+    def test_in_skips_missing_keys(self) -> None:
+        self._check("select n from items[] where id in (1, 2)", [ "a", "b" ])
+        self._check("select n from items[] where id in (7)", [])
+        self._check("select n from items[] where id in 2", [ "b" ])
+        self._check("select n from items[] where nokey in (1, 2)", [])
+        self._check("select n from items[] where not id in (1, 2)", [ "c", "d", "e", "f" ])
+
+    def test_ordering_skips_incomparable_values(self) -> None:
+        # The nulls and the strings cannot be ordered with numbers, so they do not match (instead of failing the query)
+        self._check("select n from items[] where id > 1", [ "b", "f" ])
+        self._check("select n from items[] where id <= 2", [ "a", "b" ])
+        self._check("select n from items[] where id >= 'a'", [ "e" ])
+        self._check("select n from items[] where not id < 3", [ "c", "d", "e", "f" ])
+
+    def test_ordering_on_numeric_column_with_nulls(self) -> None:
+        items = [ { "n": "a", "v": 1 }, { "n": "b", "v": None }, { "n": "c", "v": 5 }, { "n": "d" } ]
+        self._check("select n from items[] where v > 0", [ "a", "c" ], items)
+        self._check("select n from items[] where v < 3 or v >= 5", [ "a", "c" ], items)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The values encoded by a backend must be written in the same way whatever the indentation"""
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsonbackend import available_backends, get_backend
+from soj.output import write_rows
+
+ROWS = [ { "n": 1e16, "s": "café", "l": [ 1, 2.5, [] ], "o": {} }, 1e-05, "ü", { "big": 2 ** 70 } ]
+
+class TestIndentation(unittest.TestCase):
+    def test_indentation_does_not_change_the_values(self) -> None:
+        for name in available_backends():
+            backend = get_backend(name)
+            compact = backend.dumps(ROWS)
+            for indent in [ 2, 4 ]:
+                with self.subTest(backend=name, indent=indent):
+                    indented = backend.dumps(ROWS, indent=indent)
+                    self.assertEqual(json.loads(indented), ROWS)
+                    # Removing the layout of each line obtains the same tokens than the compact document
+                    lines = [ line.strip() for line in indented.split("\n") ]
+                    self.assertEqual("".join(lines).replace(": ", ":").replace(", ", ","), compact.replace(": ", ":").replace(", ", ","))
+
+    @unittest.skipUnless("orjson" in available_backends(), "orjson is not installed")
+    def test_orjson_reindents(self) -> None:
+        backend = get_backend("orjson")
+        self.assertEqual(backend.dumps(ROWS[:3], indent=4), json.dumps(ROWS[:3], indent=4, ensure_ascii=False).replace("1e+16", "1e16").replace("1e-05", "0.00001"))
+        output = io.StringIO()
+        write_rows(ROWS, output, "json", 4, backend)
+        self.assertIn("1e16", output.getvalue())
+        self.assertIn("café", output.getvalue())
+
+    @unittest.skipUnless("ujson" in available_backends(), "ujson is not installed")
+    def test_ujson_escapes_as_json(self) -> None:
+        strings = [ "a/b", "café", " ", "\U0001f600", "\"\\\n" ]
+        for indent in [ None, 4 ]:
+            with self.subTest(indent=indent):
+                self.assertEqual(get_backend("ujson").dumps(strings, indent=indent), get_backend("json").dumps(strings, indent=indent).replace(", ", ","))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""A memo (see RowMemo) can be reused by several queries: each query gets the slots for its own prefixes, and the
+    results of the previous queries are not altered
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+from soj.memo import RowMemo
+
+DOCUMENT = json.dumps({ "items": [ { "id": i, "a": { "x": i, "y": -i }, "b": { "x": str(i), "y": i * 2 } }
+    for i in range(10) ] })
+
+class TestReusedMemo(unittest.TestCase):
+    def test_slots_are_released(self) -> None:
+        db = JSONDB(DOCUMENT)
+        memo = RowMemo(max_slots=1)
+        for _ in range(100):
+            self.assertEqual(list(db.query("select a.y from items[] where a.x > 6", memo=memo)), [ -7, -8, -9 ])
+        self.assertEqual(memo.stats["hits"], 3)
+        self.assertEqual(len(memo._hits), 2)
+        # The slot used for .a by the previous queries is available for .b
+        self.assertEqual(list(db.query("select b.x from items[] where b.y > 12", memo=memo)), [ "7", "8", "9" ])
+        self.assertEqual(memo.stats["hits"], 3)
+
+    def test_interleaved_results(self) -> None:
+        db = JSONDB(DOCUMENT)
+        memo = RowMemo()
+        r1 = iter(db.query("select a.y from items[] where a.x > 6", memo=memo))
+        self.assertEqual(next(r1), -7)
+        r2 = iter(db.query("select b.x from items[] where b.y > 12", memo=memo))
+        # Both queries walk the same rows, one row at a time
+        values1, values2 = [], []
+        for v1, v2 in zip(r1, r2):
+            values1.append(v1)
+            values2.append(v2)
+        self.assertEqual(values1, [ -8, -9 ])
+        self.assertEqual(values2, [ "7", "8" ])
+        self.assertEqual(list(r2), [ "9" ])
+
+if __name__ == "__main__":
+    unittest.main()
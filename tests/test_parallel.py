@@ -0,0 +1,57 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The queries evaluated by a pool of processes (see query_parallel) must only keep the pool while their results are
+    being consumed
+"""
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+
+DOCUMENT = json.dumps({ "items": [ { "id": i, "price": i % 100 } for i in range(5000) ] })
+
+class TestParallelPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self._db = JSONDB(DOCUMENT)
+
+    def test_results(self) -> None:
+        for query in [ "select id from items[] where price > 90", "select id from items[] order by price desc, id limit 5",
+                "select price, count(*) from items[] group by price" ]:
+            with self.subTest(query=query):
+                self.assertEqual(list(self._db.query(query, jobs=2)), list(self._db.query(query)))
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_unconsumed_result(self) -> None:
+        result = self._db.query("select id from items[]", jobs=2)
+        self.assertEqual(multiprocessing.active_children(), [])
+        del result
+
+    def test_partially_consumed_result(self) -> None:
+        values = iter(self._db.query("select id from items[]", jobs=2))
+        self.assertEqual(next(values), 0)
+        self.assertNotEqual(multiprocessing.active_children(), [])
+        # Discarding the result shuts down the pool
+        del values
+        gc.collect()
+        self.assertEqual(multiprocessing.active_children(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The tokenizer and the parser must obtain the same tokens and the same errors than the original (character by
+    character) implementation. The expected values were recorded with that implementation.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.parser.parser import Parser
+from soj.parser.token import Token
+
+# The (token, data, position) tuples of each string, or the error message
+TOKENS = [
+    ('select $ from items[] where price > 900', [('Identifier', 'select', 1), ('$', None, 8), ('Identifier', 'from', 10), ('Identifier', 'items', 15), ('[', None, 20), (']', None, 21), ('Identifier', 'where', 23), ('Identifier', 'price', 29), ('Operator', '>', 35), ('Integer', 900, 37), ('EOF', None, None)]),
+    ("SELECT a, b.c FROM x[1:3] WHERE a == 'q\\'x' AND (b < 2.5e-3 OR NOT c) GROUP BY a ORDER BY b DESC, a LIMIT 10 OFFSET 2", [('Identifier', 'SELECT', 1), ('Identifier', 'a', 8), (',', None, 9), ('Identifier', 'b', 11), ('.', None, 12), ('Identifier', 'c', 13), ('Identifier', 'FROM', 15), ('Identifier', 'x', 20), ('[', None, 21), ('Integer', 1, 22), (':', None, 23), ('Integer', 3, 24), (']', None, 25), ('Identifier', 'WHERE', 27), ('Identifier', 'a', 33), ('Operator', '==', 35), ('String', "q\\'x", 38), ('Identifier', 'AND', 45), ('(', None, 49), ('Identifier', 'b', 50), ('Operator', '<', 52), ('Float', 0.0025, 54), ('Identifier', 'OR', 61), ('Identifier', 'NOT', 64), ('Identifier', 'c', 68), (')', None, 69), ('Identifier', 'GROUP', 71), ('Identifier', 'BY', 77), ('Identifier', 'a', 80), ('Identifier', 'ORDER', 82), ('Identifier', 'BY', 88), ('Identifier', 'b', 91), ('Identifier', 'DESC', 93), (',', None, 97), ('Identifier', 'a', 99), ('Identifier', 'LIMIT', 101), ('Integer', 10, 107), ('Identifier', 'OFFSET', 110), ('Integer', 2, 117), ('EOF', None, None)]),
+    ('select count(*), count(distinct user.id) from items[] group by user.name', [('Identifier', 'select', 1), ('Identifier', 'count', 8), ('(', None, 13), ('$', None, 14), (')', None, 15), (',', None, 16), ('Identifier', 'count', 18), ('(', None, 23), ('Identifier', 'distinct', 24), ('Identifier', 'user', 33), ('.', None, 37), ('Identifier', 'id', 38), (')', None, 40), ('Identifier', 'from', 42), ('Identifier', 'items', 47), ('[', None, 52), (']', None, 53), ('Identifier', 'group', 55), ('Identifier', 'by', 61), ('Identifier', 'user', 64), ('.', None, 68), ('Identifier', 'name', 69), ('EOF', None, None)]),
+    ("select x from a where y in (1, 2.5, 'z')", [('Identifier', 'select', 1), ('Identifier', 'x', 8), ('Identifier', 'from', 10), ('Identifier', 'a', 15), ('Identifier', 'where', 17), ('Identifier', 'y', 23), ('Identifier', 'in', 25), ('(', None, 28), ('Integer', 1, 29), (',', None, 30), ('Float', 2.5, 32), (',', None, 35), ('String', 'z', 37), (')', None, 40), ('EOF', None, None)]),
+    ('select * from ..id', [('Identifier', 'select', 1), ('$', None, 8), ('Identifier', 'from', 10), ('..', None, 15), ('Identifier', 'id', 17), ('EOF', None, None)]),
+    ("select a['b c'] from x", [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('[', None, 9), ('String', 'b c', 10), (']', None, 15), ('Identifier', 'from', 17), ('Identifier', 'x', 22), ('EOF', None, None)]),
+    ('select x from a[ 1 : 2 ]', [('Identifier', 'select', 1), ('Identifier', 'x', 8), ('Identifier', 'from', 10), ('Identifier', 'a', 15), ('[', None, 16), ('Integer', 1, 18), (':', None, 20), ('Integer', 2, 22), (']', None, 24), ('EOF', None, None)]),
+    ('select a.b..c[]..[1:] from x', [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('.', None, 9), ('Identifier', 'b', 10), ('..', None, 11), ('Identifier', 'c', 13), ('[', None, 14), (']', None, 15), ('..', None, 16), ('[', None, 18), ('Integer', 1, 19), (':', None, 20), (']', None, 21), ('Identifier', 'from', 23), ('Identifier', 'x', 28), ('EOF', None, None)]),
+    ('select a from b where c >= 1.5E+10', [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('Identifier', 'from', 10), ('Identifier', 'b', 15), ('Identifier', 'where', 17), ('Identifier', 'c', 23), ('Operator', '>=', 25), ('Float', 15000000000.0, 28), ('EOF', None, None)]),
+    ('select a from b where c != 1', [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('Identifier', 'from', 10), ('Identifier', 'b', 15), ('Identifier', 'where', 17), ('Identifier', 'c', 23), ('Operator', '!=', 25), ('Integer', 1, 28), ('EOF', None, None)]),
+    ('select a from b where c <> 1', [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('Identifier', 'from', 10), ('Identifier', 'b', 15), ('Identifier', 'where', 17), ('Identifier', 'c', 23), ('Operator', '<', 25), ('Operator', '>', 26), ('Integer', 1, 28), ('EOF', None, None)]),
+    ('select a from b where c<=1', [('Identifier', 'select', 1), ('Identifier', 'a', 8), ('Identifier', 'from', 10), ('Identifier', 'b', 15), ('Identifier', 'where', 17), ('Identifier', 'c', 23), ('Operator', '<=', 24), ('Integer', 1, 26), ('EOF', None, None)]),
+    ("select é from ñ where ü == 'ö'", [('Identifier', 'select', 1), ('Identifier', 'é', 8), ('Identifier', 'from', 10), ('Identifier', 'ñ', 15), ('Identifier', 'where', 17), ('Identifier', 'ü', 23), ('Operator', '==', 25), ('String', 'ö', 28), ('EOF', None, None)]),
+    ('select a1_b from c2', [('Identifier', 'select', 1), ('Identifier', 'a1_b', 8), ('Identifier', 'from', 13), ('Identifier', 'c2', 18), ('EOF', None, None)]),
+    ('select x from a\twhere\ny == 1', [('Identifier', 'select', 1), ('Identifier', 'x', 8), ('Identifier', 'from', 10), ('Identifier', 'a', 15), ('Identifier', 'where', 17), ('Identifier', 'y', 23), ('Operator', '==', 25), ('Integer', 1, 28), ('EOF', None, None)]),
+    ('select x from a where y == 12345678901234567890123', [('Identifier', 'select', 1), ('Identifier', 'x', 8), ('Identifier', 'from', 10), ('Identifier', 'a', 15), ('Identifier', 'where', 17), ('Identifier', 'y', 23), ('Operator', '==', 25), ('Integer', 12345678901234567890123, 28), ('EOF', None, None)]),
+    ('1.1e5x', [('Float', 110000.0, 1), ('Identifier', 'x', 6), ('EOF', None, None)]),
+    ('2.0e-3e2', [('Float', 0.002, 1), ('Identifier', 'e2', 7), ('EOF', None, None)]),
+    ('2.0e3E4', [('Float', 2000.0, 1), ('Identifier', 'E4', 6), ('EOF', None, None)]),
+    ('2.0e-3e', [('Float', 0.002, 1), ('Identifier', 'e', 7), ('EOF', None, None)]),
+    ('1.5e3.2', [('Float', 1500.0, 1), ('.', None, 6), ('Integer', 2, 7), ('EOF', None, None)]),
+    ('1.5.3', [('Float', 1.5, 1), ('.', None, 4), ('Integer', 3, 5), ('EOF', None, None)]),
+    ('3e5', [('Integer', 3, 1), ('Identifier', 'e5', 2), ('EOF', None, None)]),
+    ('1.5E-7', [('Float', 1.5e-07, 1), ('EOF', None, None)]),
+    ('007', [('Integer', 7, 1), ('EOF', None, None)]),
+    ('1.e5', 'Number expected'),
+    ('1.5ex', 'Number expected'),
+    ('1.5e+x', 'Number expected'),
+    ('5.x', 'Number expected'),
+    ("'unterminated", 'Closing quote expected'),
+    ('a ! b', 'Invalid operator: !'),
+    ('_a', 'Invalid identifier'),
+    ('a # b', 'Invalid character: #'),
+]
+
+# The error message when parsing each query (None if it is valid)
+PARSE = [
+    ("select count (x) from a", "Unexpected token: ( (None) at 14"),
+    ("select $ from $..[0]", None),
+    ("select x from a[:2] where b.c[0] != 3", None),
+    ("select x from a where y like 'a%' and z ilike 'B' or w regexp '^x'", None),
+    ("select a from b limit 5 offset 0", None),
+    ("select max(a) from b order by max(a)", None),
+    ("select a from b where ((a == 1) and (b == 2))", None),
+    ("select a from b where 1.5e3 == 1500", None),
+    ("select a from b where c == 2.0e-3e2", "Unexpected token: Identifier (e2) at 34"),
+    ("select a from b where c = 1", "Invalid operator: ="),
+    ("select a from b where c ! 1", "Invalid operator: !"),
+    ("select a from b where c <> 1", "Invalid selector"),
+    ("select a from b where (a == 1", "Closing parenthesis expected: EOF (None)"),
+    ("select a from b where c == 'unterminated", "Closing quote expected"),
+    ("select a from b where 1. == 2", "Number expected"),
+    ("select a from b where 1.5ex == 2", "Number expected"),
+    ("select", "Invalid selector"),
+    ("select a b from c", "Unexpected token: Identifier (b) at 10"),
+    ("select a from b limit -1", "Invalid character: -"),
+    ("select a from b order by", "Invalid selector"),
+    ("select _a from b", "Invalid identifier"),
+    ("select a from b where c == \"x\"", "Invalid character: \""),
+]
+
+class TestTokenizer(unittest.TestCase):
+    def test_tokens(self) -> None:
+        for s, expected in TOKENS:
+            with self.subTest(s=s):
+                try:
+                    tokens = [ (t.token, t.data, None if t == Token.T_EOF else t.position) for t in Parser().tokenize(s) ]
+                except Exception as e:
+                    tokens = str(e)
+                self.assertEqual(tokens, expected)
+
+    def test_number_types(self) -> None:
+        # The integers and the floats are different tokens, even if they have the same value
+        tokens = Parser().tokenize("1 1.0")
+        self.assertIs(type(tokens[0].data), int)
+        self.assertIs(type(tokens[1].data), float)
+
+    def test_assignment_operator(self) -> None:
+        # Unlike in the original implementation, a single = is a token (for the SET clause of UPDATE), but it is still
+        # rejected in the comparisons (see PARSE)
+        self.assertEqual([ (t.token, t.data) for t in Parser().tokenize("a = 1") ],
+            [ (Token.T_IDENTIFIER, "a"), (Token.T_OPERATOR, "="), (Token.T_INTEGER, 1), (Token.T_EOF, None) ])
+
+class TestParser(unittest.TestCase):
+    def test_parse(self) -> None:
+        for query, expected in PARSE:
+            with self.subTest(query=query):
+                try:
+                    Parser().parse(query)
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                self.assertEqual(error, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""A snapshot (see write_snapshot) must obtain the same results than the document from which it was written, and the
+    files that are not valid snapshots must be rejected when they are opened
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.jsondb import JSONDB
+from soj.snapshot import SnapshotDB
+
+DOCUMENT = json.dumps({ "items": [ { "id": i, "name": f"item{i}", "tags": [ "a", "b" ][:i % 3] } for i in range(20) ] })
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "doc.snap")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def test_queries(self) -> None:
+        db = JSONDB(DOCUMENT)
+        db.save_snapshot(self._path)
+        with JSONDB.open_snapshot(self._path) as snapshot:
+            for query in [ "select name from items[] where id > 15", "select $ from items[2:4].tags[0]", "select $ from ..id" ]:
+                with self.subTest(query=query):
+                    self.assertEqual(list(snapshot.query(query)), list(db.query(query)))
+        # The memory map is released when leaving the block
+        with self.assertRaises(ValueError):
+            list(snapshot.query("select $ from items[0]"))
+
+    def test_invalid_files(self) -> None:
+        JSONDB(DOCUMENT).save_snapshot(self._path)
+        with open(self._path, "rb") as f:
+            data = f.read()
+        # An empty file, a truncated header, a document instead of a snapshot, and a header without the nodes
+        for content in [ b"", data[:5], DOCUMENT.encode(), data[:16] ]:
+            with self.subTest(content=content[:16]):
+                with open(self._path, "wb") as f:
+                    f.write(content)
+                with self.assertRaisesRegex(Exception, "Invalid snapshot"):
+                    SnapshotDB(self._path)
+
+if __name__ == "__main__":
+    unittest.main()
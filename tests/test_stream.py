@@ -0,0 +1,85 @@
+#
+#    Copyright 2022 - Carlos A. <https://github.com/dealfonso>
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+"""The databases that read the document from a file (see FileDB) must let the lazy results of several queries be
+    consumed at the same time
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from soj.stream import JSONStreamDB, NDJSONDB
+
+ROWS = [ { "id": i, "name": f"item{i}" } for i in range(1, 6) ]
+
+class TestInterleavedResults(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._ndjson = os.path.join(self._dir.name, "rows.ndjson")
+        with open(self._ndjson, "w") as f:
+            f.write("\n".join([ json.dumps(row) for row in ROWS ]) + "\n")
+        self._json = os.path.join(self._dir.name, "rows.json")
+        with open(self._json, "w") as f:
+            # A small chunk size makes the stream read the document in several steps
+            json.dump({ "items": ROWS, "padding": "x" * 1000 }, f)
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _check_interleaved(self, db, from_clause: str) -> None:
+        r1 = db.query(f"select id from {from_clause}")
+        r2 = db.query(f"select id from {from_clause} where id > 2")
+        self.assertEqual(list(r1), [ 1, 2, 3, 4, 5 ])
+        self.assertEqual(list(r2), [ 3, 4, 5 ])
+
+        r1 = iter(db.query(f"select id from {from_clause}"))
+        r2 = iter(db.query(f"select id from {from_clause} where id > 2"))
+        # The results are consumed alternately, one row at a time
+        values1 = [ next(r1) ]
+        values2 = [ next(r2) ]
+        values1.append(next(r1))
+        values2.extend(r2)
+        values1.extend(r1)
+        self.assertEqual(values1, [ 1, 2, 3, 4, 5 ])
+        self.assertEqual(values2, [ 3, 4, 5 ])
+
+    def test_ndjson(self) -> None:
+        with open(self._ndjson) as f:
+            self._check_interleaved(NDJSONDB(f), "$")
+
+    def test_json_stream(self) -> None:
+        with open(self._json) as f:
+            self._check_interleaved(JSONStreamDB(f, chunk_size=16), "items[]")
+
+    def test_unnamed_file(self) -> None:
+        # The file cannot be opened again, so the results are read one after the other
+        db = NDJSONDB(io.StringIO("\n".join([ json.dumps(row) for row in ROWS ])))
+        r1 = db.query("select id from $")
+        r2 = db.query("select id from $ where id > 2")
+        self.assertEqual(list(r1), [ 1, 2, 3, 4, 5 ])
+        self.assertEqual(list(r2), [ 3, 4, 5 ])
+
+        r1 = iter(db.query("select id from $"))
+        next(r1)
+        with self.assertRaises(Exception):
+            list(db.query("select id from $"))
+        self.assertEqual(list(r1), [ 2, 3, 4, 5 ])
+
+if __name__ == "__main__":
+    unittest.main()